@@ -0,0 +1,170 @@
+"""Offline benchmark of the parsing of Google Scholar pages
+
+Parses the saved pages of ``test_data`` through the same code paths as a
+live crawl, without the network, and reports for each path the pages
+parsed per second, the time per record and the peak memory.
+
+Usage::
+
+    python benchmarks/bench_parse.py
+    python benchmarks/bench_parse.py --parser lxml --repeat 50
+    python benchmarks/bench_parse.py --save baseline.json
+    python benchmarks/bench_parse.py --compare baseline.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4.builder import builder_registry  # noqa: E402
+from scholarly._cache import url_class  # noqa: E402
+from scholarly._navigator import Navigator  # noqa: E402
+from scholarly.author import Author  # noqa: E402
+from scholarly.publication import Publication  # noqa: E402
+
+CORPUS = os.path.join(ROOT, 'test_data')
+
+
+def _read(name: str) -> str:
+    with open(os.path.join(CORPUS, name), encoding='utf-8') as f:
+        return f.read()
+
+
+class _CorpusNavigator(Navigator):
+    """Navigator serving the pages of the corpus, so that the requests
+    made while parsing (the cite popups and bibtex entries of search
+    results) are answered without the network"""
+
+    def _get_page(self, pagerequest: str) -> str:
+        if '.bib?' in pagerequest:
+            return _read('bibtex.bib')
+        if url_class(pagerequest) == 'bibtex':
+            return _read('bibcite.html')
+        raise ValueError(f"No page of the corpus for {pagerequest}")
+
+
+def _search_pubs(nav, html):
+    soup = nav._make_soup(html)
+    return [Publication(nav, row, 'scholar')
+            for row in soup.find_all('div', 'gs_or')]
+
+
+def _search_authors(nav, html):
+    soup = nav._make_soup(html)
+    return [Author(nav, row) for row in soup.find_all('div', 'gsc_1usr')]
+
+
+def _profile(nav, html):
+    soup = nav._make_soup(html)
+    author = Author(nav, '4bahYMkAAAAJ')
+    author.publications = []
+    for section in ('basics', 'indices', 'counts', 'coauthors'):
+        getattr(author, f'_fill_{section}')(soup)
+    author._add_publications(soup)
+    return author.publications
+
+
+def _citation(nav, html):
+    pub = Publication(nav, None)
+    pub._fill_citation(nav._make_soup(html))
+    return [pub]
+
+
+def _bibtex(nav, text):
+    pub = Publication(nav, None)
+    pub._fill_bibtex(text)
+    return [pub]
+
+
+# Parser path, function, and pages of the corpus it parses
+PATHS = [
+    ('search_pubs', _search_pubs, ['search_pubs.html',
+                                   'search_pubs_last.html']),
+    ('search_authors', _search_authors, ['search_authors.html']),
+    ('profile', _profile, ['author_profile_100.html',
+                           'author_profile.html']),
+    ('citation', _citation, ['citation.html']),
+    ('bibtex', _bibtex, ['bibtex.bib']),
+]
+
+
+def run_path(nav, fn, pages: list, repeat: int) -> dict:
+    """Parses the pages `repeat` times and returns the pages per second,
+    the milliseconds per record and the peak memory in KiB"""
+    texts = [_read(name) for name in pages]
+    for text in texts:
+        fn(nav, text)
+    records = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            records += len(fn(nav, text))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for text in texts:
+        fn(nav, text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'pages_per_sec': repeat * len(texts) / elapsed,
+            'ms_per_record': 1000 * elapsed / max(records, 1),
+            'peak_kib': peak / 1024}
+
+
+def run(parsers: list, repeat: int) -> dict:
+    nav = _CorpusNavigator()
+    results = {}
+    for parser in parsers:
+        nav._set_parser(parser)
+        for name, fn, pages in PATHS:
+            results[f'{parser}/{name}'] = run_path(nav, fn, pages, repeat)
+    return results
+
+
+def report(results: dict, baseline: dict = None):
+    header = (f"{'path':<28}{'pages/s':>10}{'ms/record':>11}"
+              f"{'peak KiB':>10}")
+    if baseline:
+        header += f"{'vs baseline':>13}"
+    print(header)
+    for key, r in results.items():
+        line = (f"{key:<28}{r['pages_per_sec']:>10.1f}"
+                f"{r['ms_per_record']:>11.3f}{r['peak_kib']:>10.0f}")
+        if baseline and key in baseline:
+            ratio = r['pages_per_sec'] / baseline[key]['pages_per_sec']
+            line += f"{ratio:>12.2f}x"
+        print(line)
+
+
+def main():
+    available = [p for p in ('html.parser', 'lxml', 'html5lib')
+                 if builder_registry.lookup(p) is not None]
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--parser', choices=available + ['all'],
+                        default='html.parser',
+                        help='tree builder of BeautifulSoup')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='number of passes over the corpus')
+    parser.add_argument('--save', help='write the results to a JSON file')
+    parser.add_argument('--compare', help='JSON file of baseline results')
+    args = parser.parse_args()
+
+    parsers = available if args.parser == 'all' else [args.parser]
+    results = run(parsers, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
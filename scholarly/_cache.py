@@ -0,0 +1,204 @@
+"""On-disk response cache for pages fetched from Google Scholar"""
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Time to live in seconds of a cached page, per class of url
+_DEFAULT_TTL = {
+    'profile': 24 * 3600,
+    'author_search': 24 * 3600,
+    'search': 24 * 3600,
+    'citation': 7 * 24 * 3600,
+    'bibtex': 30 * 24 * 3600,
+    'other': 24 * 3600
+}
+_DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+
+def normalize_url(url: str) -> str:
+    """Returns a canonical form of a url, used as the cache key.
+
+    The scheme and host are lowercased, the fragment is dropped and the
+    query parameters are sorted, so that the same page requested with the
+    parameters in a different order maps to the same key.
+
+    :param url: the url of the page
+    :type url: str
+    :returns: the normalized url
+    :rtype: {str}
+    """
+    parts = urlsplit(url.strip())
+    query = sorted(parse_qsl(parts.query, keep_blank_values=True))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(),
+                       parts.path or '/', urlencode(query), ''))
+
+
+def url_class(url: str) -> str:
+    """Classifies a url by the kind of Scholar page it points to.
+
+    :param url: the url of the page
+    :type url: str
+    :returns: one of ``profile``, ``author_search``, ``search``,
+              ``citation``, ``bibtex`` or ``other``
+    :rtype: {str}
+    """
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    if query.get('output') in ('cite', 'citation') or parts.path.endswith('.bib'):
+        return 'bibtex'
+    if parts.path.startswith('/citations'):
+        view_op = query.get('view_op')
+        if view_op == 'view_citation':
+            return 'citation'
+        if view_op == 'search_authors':
+            return 'author_search'
+        if 'user' in query:
+            return 'profile'
+    elif parts.path.startswith('/scholar'):
+        return 'search'
+    return 'other'
+
+
+class ResponseCache(object):
+    """A size-bounded cache of page bodies backed by a SQLite database.
+
+    Entries expire after a time to live that depends on the class of the
+    url (see :func:`url_class`). When the total size of the stored pages
+    grows above ``max_size`` bytes, the least recently used entries are
+    evicted.
+    """
+
+    def __init__(self, path: str, ttl: dict = None,
+                 max_size: int = _DEFAULT_MAX_SIZE):
+        """
+        :param path: the SQLite database file, or ``:memory:``
+        :type path: str
+        :param ttl: time to live in seconds per url class, overriding the
+                    defaults, defaults to None
+        :type ttl: dict, optional
+        :param max_size: maximum total size in bytes of the cached pages
+        :type max_size: int, optional
+        """
+        self.path = path
+        self.ttl = dict(_DEFAULT_TTL)
+        if ttl:
+            self.ttl.update(ttl)
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS pages (
+                                key TEXT PRIMARY KEY,
+                                url_class TEXT NOT NULL,
+                                body TEXT NOT NULL,
+                                size INTEGER NOT NULL,
+                                stored REAL NOT NULL,
+                                accessed REAL NOT NULL)""")
+        self._db.execute("""CREATE INDEX IF NOT EXISTS pages_accessed
+                            ON pages (accessed)""")
+        self._db.commit()
+        self._size = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def get(self, url: str) -> str:
+        """Returns the cached body of a page, or None if it is not cached
+        or has expired.
+
+        :param url: the url of the page
+        :type url: str
+        :rtype: {str}
+        """
+        key = normalize_url(url)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, url_class, stored FROM pages WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            body, cls, stored = row
+            if now - stored > self.ttl.get(cls, self.ttl['other']):
+                self._delete(key)
+                self._db.commit()
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE pages SET accessed = ? WHERE key = ?",
+                             (now, key))
+            self._db.commit()
+            self.hits += 1
+            return body
+
+    def put(self, url: str, body: str):
+        """Stores the body of a page, evicting old entries if needed.
+
+        :param url: the url of the page
+        :type url: str
+        :param body: the text of the page
+        :type body: str
+        """
+        key = normalize_url(url)
+        cls = url_class(url)
+        if self.ttl.get(cls, self.ttl['other']) <= 0:
+            return
+        size = len(body.encode('utf-8'))
+        if size > self.max_size:
+            return
+        now = time.time()
+        with self._lock:
+            self._delete(key)
+            self._db.execute("INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, cls, body, size, now, now))
+            self._size += size
+            self._evict()
+            self._db.commit()
+
+    def clear(self):
+        """Removes every entry from the cache"""
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.commit()
+            self._size = 0
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters and the current size of the cache
+
+        :rtype: {dict}
+        """
+        with self._lock:
+            entries = self._db.execute(
+                "SELECT COUNT(*) FROM pages").fetchone()[0]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': entries,
+                'size': self._size
+            }
+
+    def close(self):
+        """Closes the underlying database"""
+        with self._lock:
+            self._db.close()
+
+    def _delete(self, key: str):
+        row = self._db.execute("SELECT size FROM pages WHERE key = ?",
+                               (key,)).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM pages WHERE key = ?", (key,))
+            self._size -= row[0]
+
+    def _evict(self):
+        while self._size > self.max_size:
+            row = self._db.execute("""SELECT key, size FROM pages
+                                      ORDER BY accessed LIMIT 1""").fetchone()
+            if row is None:
+                break
+            self._db.execute("DELETE FROM pages WHERE key = ?", (row[0],))
+            self._size -= row[1]
+            self.evictions += 1
@@ -0,0 +1,88 @@
+"""Journal of the progress of a paginated search, for resuming it"""
+import json
+import os
+
+
+class Checkpoint(object):
+    """Records where a paginated search is: the url of the current page,
+    the number of its rows already read, and the ids of the results
+    already returned.
+
+    The state is written to a JSON file every `every` results, at every
+    new page and when the search ends. Opening a checkpoint on an existing
+    file resumes from the state it holds, so that the search restarts on
+    the page where it stopped instead of the first one.
+    """
+
+    def __init__(self, path: str, url: str, every: int = 10):
+        """
+        :param path: the journal file
+        :type path: str
+        :param url: the url of the first page of the search
+        :type url: str
+        :param every: number of results between two writes of the journal
+        :type every: int
+        :raises: ValueError if the journal belongs to another search
+        """
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.path = path
+        self.every = every
+        self.url = url
+        self.page_url = url
+        self.pos = 0
+        self.seen = []
+        self.done = False
+        self._unsaved = 0
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+            if state['url'] != url:
+                raise ValueError(f"The checkpoint {path} belongs to the "
+                                 f"search {state['url']}")
+            self.page_url = state['page_url']
+            self.pos = state['pos']
+            self.seen = state['seen']
+            self.done = state['done']
+
+    def page(self, page_url: str):
+        """Records that a new page of results is being read
+
+        :param page_url: the url of the page
+        :type page_url: str
+        """
+        if page_url != self.page_url:
+            self.page_url = page_url
+            self.pos = 0
+        self.save()
+
+    def advance(self, item_id: str, pos: int = None):
+        """Records that a result was returned
+
+        :param item_id: the id of the result, or None if it has none
+        :type item_id: str
+        :param pos: the number of rows of the page read so far, defaults to
+                    one more than before
+        :type pos: int
+        """
+        self.pos = self.pos + 1 if pos is None else pos
+        if item_id is not None:
+            self.seen.append(item_id)
+        self._unsaved += 1
+        if self._unsaved >= self.every:
+            self.save()
+
+    def finish(self):
+        """Records that the search reached its last result"""
+        self.done = True
+        self.save()
+
+    def save(self):
+        """Writes the journal, replacing the previous one atomically"""
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'url': self.url, 'page_url': self.page_url,
+                       'pos': self.pos, 'seen': self.seen,
+                       'done': self.done}, f)
+        os.replace(tmp, self.path)
+        self._unsaved = 0
@@ -0,0 +1,157 @@
+"""Helpers to run blocking scholarly calls concurrently"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Callable, Hashable, Iterable
+
+
+def imap_unordered(fn: Callable, items: Iterable, concurrency: int):
+    """Calls `fn` on every item over a bounded pool of threads and yields
+    ``(item, result, error)`` tuples as the calls finish.
+
+    At most `concurrency` calls are in flight, and items are only taken
+    from `items` when a worker is free, so it can be a lazy generator.
+    An exception raised by `fn` is returned as `error` instead of stopping
+    the other calls. When the caller stops iterating, the calls that have
+    not started yet are cancelled.
+
+    :param fn: the function to call on each item
+    :type fn: Callable
+    :param items: the items
+    :type items: Iterable
+    :param concurrency: maximum number of calls in flight
+    :type concurrency: int
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    items = iter(items)
+    executor = concurrent.futures.ThreadPoolExecutor(concurrency)
+    pending = {}
+    try:
+        while True:
+            for item in items:
+                pending[executor.submit(fn, item)] = item
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                return
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+                result = None if error is not None else future.result()
+                yield item, result, error
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+class _Abandoned(Exception):
+    """Set on a shared call whose caller was interrupted, so that the
+    callers waiting for it make the call again"""
+
+
+class SingleFlight(object):
+    """Shares a call among the callers asking for the same key at the same
+    time.
+
+    The first caller of a key makes the call, and the callers that ask for
+    the key while it is in flight wait for it and get its result, or its
+    exception, instead of making their own. A call that finished is
+    forgotten, so the next caller of the key makes a new one. Threads and
+    coroutines share the same calls.
+
+    Only an :class:`Exception` is shared. When the call is interrupted,
+    e.g. by a ``KeyboardInterrupt`` or the cancellation of a task, the
+    interruption is raised in its caller only, and one of the waiting
+    callers makes the call again.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: Hashable) -> tuple:
+        """Returns the future of the call in flight for a key and False,
+        or a new future and True when the caller must make the call"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = concurrent.futures.Future()
+            return future, True
+
+    def _finish(self, key: Hashable, future, result=None, error=None):
+        with self._lock:
+            del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def call(self, key: Hashable, fn: Callable, *args,
+             on_shared: Callable = None):
+        """Calls `fn` with `args`, or waits for the call in flight for the
+        same key
+
+        :param key: the key of the call
+        :type key: Hashable
+        :param fn: the function to call
+        :type fn: Callable
+        :param on_shared: function called when the caller waits for the
+                          call of another caller instead of making its own
+        :type on_shared: Callable
+        :returns: the result of the call
+        :raises: the exception raised by the call
+        """
+        shared = False
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            if not shared and on_shared is not None:
+                on_shared()
+            shared = True
+            try:
+                return future.result()
+            except _Abandoned:
+                continue
+        try:
+            result = fn(*args)
+        except Exception as e:
+            self._finish(key, future, error=e)
+            raise
+        except BaseException:
+            self._finish(key, future, error=_Abandoned())
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def acall(self, key: Hashable, fn: Callable, *args,
+                    on_shared: Callable = None):
+        """Coroutine version of :meth:`call`, where `fn` is a coroutine
+        function"""
+        shared = False
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            if not shared and on_shared is not None:
+                on_shared()
+            shared = True
+            try:
+                return await asyncio.wrap_future(future)
+            except _Abandoned:
+                continue
+        try:
+            result = await fn(*args)
+        except Exception as e:
+            self._finish(key, future, error=e)
+            raise
+        except BaseException:
+            self._finish(key, future, error=_Abandoned())
+            raise
+        self._finish(key, future, result)
+        return result
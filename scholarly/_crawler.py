@@ -0,0 +1,254 @@
+"""Resumable crawls of the coauthor and citation graphs"""
+import abc
+import itertools
+import json
+import os
+from ._concurrency import imap_unordered
+from ._export import _open, author_row, publication_row
+from .publication import _SearchScholarIterator
+
+
+class GraphSink(object):
+    """Writes the nodes and edges of a crawl to a JSONL file as they are
+    found.
+
+    Every node is written as an export row (see
+    :func:`scholarly._export.author_row` and
+    :func:`scholarly._export.publication_row`) with its `depth` in the crawl,
+    and every edge as ``{"type": "edge", "source": ..., "target": ...}``.
+    Lines are flushed as they are written, so the file holds the graph
+    crawled so far if the crawl dies.
+    """
+
+    def __init__(self, path: str, compression: str = None,
+                 append: bool = False):
+        """
+        :param path: the file to write
+        :type path: str
+        :param compression: None, ``gzip`` or ``zstd``
+        :type compression: str
+        :param append: whether to add to an existing file, when a crawl is
+                       resumed
+        :type append: bool
+        """
+        self._file = _open(path, compression, 'a' if append else 'w')
+
+    def _write(self, row: dict):
+        self._file.write(json.dumps(row, ensure_ascii=False))
+        self._file.write('\n')
+        self._file.flush()
+
+    def node(self, row: dict):
+        """Writes a node"""
+        self._write(row)
+
+    def edge(self, source: str, target: str):
+        """Writes an edge"""
+        self._write({'type': 'edge', 'source': source, 'target': target})
+
+    def flush(self):
+        """Flushes the lines written so far"""
+        self._file.flush()
+
+    def close(self):
+        """Closes the file"""
+        self._file.close()
+
+
+class _GraphCrawler(abc.ABC):
+    """Breadth-first crawl of a graph of Scholar pages.
+
+    The nodes of a level are expanded concurrently, with at most
+    `concurrency` requests in flight, before the next level. A node is
+    expanded once, however many nodes point to it, and the crawl stops
+    after `max_depth` levels or once `max_nodes` nodes were found. Edges
+    are only written between nodes of the crawl.
+
+    With a `checkpoint` file, the visited nodes and the frontier are
+    written to it every `checkpoint_every` nodes and at the end of every
+    level, and a crawl started on an existing checkpoint resumes from it,
+    retrying the nodes that failed. The nodes expanded after the last write
+    are expanded again, so the sink may hold a few duplicate lines.
+
+    The sink is a :class:`GraphSink`, or any object with the `node` and
+    `edge` methods of one. Subclasses implement :meth:`_expand`, called in
+    worker threads.
+    """
+
+    kind = None
+
+    def __init__(self, nav, sink, max_depth: int, max_nodes: int,
+                 concurrency: int = 4, checkpoint: str = None,
+                 checkpoint_every: int = 10):
+        if max_depth < 0:
+            raise ValueError("max_depth must be at least 0")
+        if max_nodes < 1:
+            raise ValueError("max_nodes must be at least 1")
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every must be at least 1")
+        self.nav = nav
+        self.sink = sink
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.concurrency = concurrency
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+
+    @abc.abstractmethod
+    def _expand(self, node: list) -> tuple:
+        """Fetches a node of the frontier
+
+        :param node: the ``[id, depth, data]`` entry of the frontier
+        :returns: the row written to the sink, and the ``(id, data)`` pairs
+                  of its neighbours
+        """
+
+    def _edge(self, node_id: str, neighbour_id: str) -> tuple:
+        """Returns the ``(source, target)`` edge between a node and one of
+        its neighbours"""
+        return node_id, neighbour_id
+
+    def _flush(self):
+        flush = getattr(self.sink, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def _load(self, seeds: list) -> dict:
+        key = sorted(id for id, _ in seeds)
+        if self.checkpoint is not None and os.path.exists(self.checkpoint):
+            with open(self.checkpoint, encoding='utf-8') as f:
+                state = json.load(f)
+            if state['kind'] != self.kind or state['seeds'] != key:
+                raise ValueError(f"The checkpoint {self.checkpoint} belongs "
+                                 "to another crawl")
+            # The nodes that failed are retried, at their depth
+            state['frontier'] = sorted(state['failed'] + state['frontier'],
+                                       key=lambda node: node[1])
+            state['failed'] = []
+            return state
+        frontier = []
+        seen = []
+        for id, data in seeds:
+            if id not in seen and len(seen) < self.max_nodes:
+                seen.append(id)
+                frontier.append([id, 0, data])
+        return {'kind': self.kind, 'seeds': key, 'seen': seen,
+                'frontier': frontier, 'failed': [], 'nodes': 0, 'edges': 0}
+
+    def _save(self, state: dict):
+        if self.checkpoint is None:
+            return
+        self._flush()
+        tmp = self.checkpoint + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.checkpoint)
+
+    def run(self, seeds: list) -> dict:
+        """Crawls the graph from the seeds
+
+        :param seeds: the ``(id, data)`` pairs of the first nodes
+        :type seeds: list
+        :returns: the number of nodes and edges written, and the
+                  ``(id, error)`` pairs of the nodes that failed
+        :rtype: {dict}
+        """
+        state = self._load(seeds)
+        seen = set(state['seen'])
+        errors = []
+        unsaved = 0
+        while state['frontier']:
+            depth = state['frontier'][0][1]
+            pending = {n[0]: n for n in state['frontier'] if n[1] == depth}
+            following = [n for n in state['frontier'] if n[1] != depth]
+            for node, result, error in imap_unordered(
+                    self._expand, list(pending.values()), self.concurrency):
+                del pending[node[0]]
+                if error is not None:
+                    state['failed'].append(node)
+                    errors.append((node[0], error))
+                    continue
+                row, neighbours = result
+                row['depth'] = depth
+                self.sink.node(row)
+                state['nodes'] += 1
+                for id, data in neighbours:
+                    if (id not in seen and depth < self.max_depth
+                            and len(seen) < self.max_nodes):
+                        seen.add(id)
+                        state['seen'].append(id)
+                        following.append([id, depth + 1, data])
+                    if id in seen and id != node[0]:
+                        self.sink.edge(*self._edge(node[0], id))
+                        state['edges'] += 1
+                unsaved += 1
+                if unsaved >= self.checkpoint_every:
+                    state['frontier'] = list(pending.values()) + following
+                    self._save(state)
+                    unsaved = 0
+            state['frontier'] = following
+            self._save(state)
+            unsaved = 0
+        self._flush()
+        return {'nodes': state['nodes'], 'edges': state['edges'],
+                'failures': errors}
+
+
+class CoauthorCrawler(_GraphCrawler):
+    """Crawls the coauthor graph from seed authors.
+
+    Every author is filled with `sections` plus ``coauthors``, written as
+    a node, and linked by an edge to each coauthor listed on their profile.
+    Coauthor lists are edited by every author, so the edges are directed:
+    an author may list a coauthor who does not list them back.
+    """
+
+    kind = 'coauthors'
+
+    def __init__(self, nav, sink, max_depth: int = 2, max_nodes: int = 1000,
+                 sections: list = ['basics', 'indices'], **kwargs):
+        super().__init__(nav, sink, max_depth, max_nodes, **kwargs)
+        self.sections = list(sections) + ['coauthors']
+
+    def _expand(self, node):
+        author = self.nav.get_author(node[0])._fill(self.sections)
+        return (author_row(author.to_record()),
+                [(coauthor.id, None) for coauthor in author.coauthors])
+
+
+class CitationCrawler(_GraphCrawler):
+    """Crawls the citation graph from seed publications.
+
+    The papers citing a publication are read from its ``Cited by`` search,
+    up to `max_citing` of them, and every paper is identified by its
+    Scholar cluster id, so a paper reached from several publications is
+    written and expanded once. Each edge goes from the citing paper to the
+    cited one. The papers at depth `max_depth` are written without
+    searching the papers citing them.
+    """
+
+    kind = 'citations'
+
+    def __init__(self, nav, sink, max_depth: int = 2, max_nodes: int = 1000,
+                 max_citing: int = 100, **kwargs):
+        if max_citing < 1:
+            raise ValueError("max_citing must be at least 1")
+        super().__init__(nav, sink, max_depth, max_nodes, **kwargs)
+        self.max_citing = max_citing
+
+    def _expand(self, node):
+        row = node[2]
+        link = row.get('citations_link')
+        if node[1] >= self.max_depth or link is None:
+            return row, []
+        pubs = _SearchScholarIterator(self.nav, link)
+        try:
+            citing = [(pub.cid, publication_row(pub.to_record()))
+                      for pub in itertools.islice(pubs, self.max_citing)
+                      if pub.cid is not None]
+        finally:
+            pubs.close()
+        return row, citing
+
+    def _edge(self, node_id, neighbour_id):
+        return neighbour_id, node_id
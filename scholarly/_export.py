@@ -0,0 +1,163 @@
+"""Streaming export of authors and publications to JSONL and CSV files"""
+import csv
+import gzip
+import json
+from typing import Iterable
+from .author import Author
+from .publication import Publication
+from .records import AuthorRecord, PublicationRecord
+
+PUBLICATION_FIELDS = ['type', 'source', 'title', 'author', 'venue', 'year',
+                      'cites', 'gsrank', 'url', 'eprint', 'abstract', 'cid',
+                      'id_citations', 'citations_link', 'url_scholarbib',
+                      'url_add_sclib', 'cites_per_year', 'filled', 'extra']
+AUTHOR_FIELDS = ['type', 'id', 'name', 'affiliation', 'email', 'homepage',
+                 'interests', 'citedby', 'citedby5y', 'hindex', 'hindex5y',
+                 'i10index', 'i10index5y', 'cites_per_year', 'coauthors',
+                 'publications', 'filled']
+
+
+def _authors(author) -> list:
+    if author is None:
+        return []
+    if isinstance(author, str):
+        return [a.strip() for a in author.split(' and ')]
+    return list(author)
+
+
+def publication_row(record: PublicationRecord) -> dict:
+    """Returns the export row of a publication, with the fields of
+    :data:`PUBLICATION_FIELDS`
+
+    :param record: the record of the publication
+    :type record: PublicationRecord
+    :rtype: {dict}
+    """
+    row = {key: getattr(record, key) for key in PUBLICATION_FIELDS[1:]}
+    row['type'] = 'publication'
+    row['author'] = _authors(record.author)
+    if record.cites_per_year is not None:
+        row['cites_per_year'] = {str(k): v
+                                 for k, v in record.cites_per_year.items()}
+    return row
+
+
+def author_row(record: AuthorRecord) -> dict:
+    """Returns the export row of an author, with the fields of
+    :data:`AUTHOR_FIELDS`. Co-authors are exported as their ids, and
+    publications as publication rows.
+
+    :param record: the record of the author
+    :type record: AuthorRecord
+    :rtype: {dict}
+    """
+    row = {key: getattr(record, key) for key in AUTHOR_FIELDS[1:]}
+    row['type'] = 'author'
+    row['filled'] = sorted(record.filled)
+    if record.interests is not None:
+        row['interests'] = list(record.interests)
+    if record.cites_per_year is not None:
+        row['cites_per_year'] = {str(k): v
+                                 for k, v in record.cites_per_year.items()}
+    if record.coauthors is not None:
+        row['coauthors'] = [c.id for c in record.coauthors]
+    if record.publications is not None:
+        row['publications'] = [publication_row(p)
+                               for p in record.publications]
+    return row
+
+
+def _row(item) -> dict:
+    if isinstance(item, (Publication, Author)):
+        item = item.to_record()
+    if isinstance(item, PublicationRecord):
+        return publication_row(item)
+    if isinstance(item, AuthorRecord):
+        return author_row(item)
+    raise TypeError(f"Cannot export objects of type {type(item).__name__}")
+
+
+def _open(path: str, compression: str, mode: str = 'w'):
+    if compression is None:
+        return open(path, mode, encoding='utf-8', newline='')
+    if compression == 'gzip':
+        return gzip.open(path, mode + 't', encoding='utf-8', newline='')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd compression requires the zstandard "
+                              "package: pip install zstandard")
+        return zstandard.open(path, mode + 't', encoding='utf-8', newline='')
+    raise ValueError(f"Unknown compression {compression}")
+
+
+def _csv_value(value):
+    """Flattens a value to a CSV cell: lists are joined with '; ', and
+    dicts and lists of rows are written as JSON"""
+    if value is None:
+        return ''
+    if isinstance(value, dict) or (isinstance(value, list) and value
+                                   and isinstance(value[0], dict)):
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+    if isinstance(value, list):
+        return '; '.join(str(v) for v in value)
+    return value
+
+
+def export(items: Iterable, path: str, format: str = 'jsonl',
+           compression: str = None, flush_every: int = 1) -> int:
+    """Writes authors or publications to a file as they are produced.
+
+    Items are consumed one at a time from `items`, so exporting a search
+    generator keeps memory constant, and the file is flushed every
+    `flush_every` items, so that the output written so far survives if the
+    crawl dies.
+
+    In ``jsonl`` format every line is a JSON object with the fields of
+    :data:`PUBLICATION_FIELDS` or :data:`AUTHOR_FIELDS`. In ``csv``
+    format the header is given by the type of the first item, and all the
+    items must have the same type.
+
+    :param items: Publication, Author, PublicationRecord or AuthorRecord
+                  objects
+    :type items: Iterable
+    :param path: the file to write
+    :type path: str
+    :param format: ``jsonl`` or ``csv``, defaults to ``jsonl``
+    :type format: str, optional
+    :param compression: None, ``gzip`` or ``zstd`` (requires the
+                        `zstandard` package), defaults to None
+    :type compression: str, optional
+    :param flush_every: number of items between flushes, defaults to 1
+    :type flush_every: int, optional
+    :returns: the number of items written
+    :rtype: {int}
+    """
+    if format not in ('jsonl', 'csv'):
+        raise ValueError(f"Unknown format {format}")
+    if flush_every < 1:
+        raise ValueError("flush_every must be at least 1")
+    count = 0
+    with _open(path, compression) as f:
+        writer = None
+        for item in items:
+            row = _row(item)
+            if format == 'jsonl':
+                f.write(json.dumps(row, ensure_ascii=False))
+                f.write('\n')
+            else:
+                if writer is None:
+                    kind = row['type']
+                    fields = (PUBLICATION_FIELDS if kind == 'publication'
+                              else AUTHOR_FIELDS)
+                    writer = csv.DictWriter(f, fieldnames=fields)
+                    writer.writeheader()
+                elif row['type'] != kind:
+                    raise ValueError("A CSV export cannot mix authors and "
+                                     "publications")
+                writer.writerow({k: _csv_value(v) for k, v in row.items()})
+            count += 1
+            if count % flush_every == 0:
+                f.flush()
+    return count
@@ -0,0 +1,211 @@
+"""Counters, latency histograms and hooks of the requests of the navigator"""
+import bisect
+import json
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger('scholarly')
+
+EVENTS = ('before_request', 'after_response', 'on_captcha', 'on_retry')
+
+# Upper bounds in seconds of the buckets of the histograms
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+           30.0, 60.0)
+
+
+class _Histogram(object):
+    """Distribution of observed durations over :data:`BUCKETS`"""
+
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(BUCKETS + (float('inf'),), self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {'count': self.count, 'sum': self.sum, 'buckets': buckets}
+
+
+class Metrics(object):
+    """Registry of the counters and latency histograms of the navigator,
+    labelled by url class and proxy, and of the hooks called on its events.
+
+    The counters are
+
+    - ``requests_total``: requests sent, by `url_class`, `proxy` and
+      `outcome` (``ok``, ``captcha``, ``error`` or the HTTP status code)
+    - ``retries_total``: failed attempts followed by another one
+    - ``captchas_total``: CAPTCHAs served, by `proxy`
+    - ``bytes_total``: bytes downloaded, by `url_class` and `proxy`
+    - ``cache_hits_total`` and ``cache_misses_total``, by `url_class`
+    - ``coalesced_total``: requests served by the fetch in flight of a
+      concurrent request for the same page, by `url_class`
+
+    and the histograms, in seconds
+
+    - ``request_seconds``: duration of the requests, by `url_class` and
+      `proxy`
+    - ``politeness_sleep_seconds``: wait of the rate limiter, by `proxy`
+    - ``parse_seconds``: parsing of a page, by `parser`
+
+    Hooks are called with keyword arguments: the `url` and `proxy` of the
+    request, and `status`, `seconds` and `size` for ``after_response``,
+    and `attempt` and `reason` for ``on_retry``. An exception raised by a
+    hook is logged and does not stop the request.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._hooks = {event: [] for event in EVENTS}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Adds `value` to a counter
+
+        :param name: the name of the counter
+        :type name: str
+        :param value: the increment, defaults to 1
+        :type value: float
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Records a duration in a histogram
+
+        :param name: the name of the histogram
+        :type name: str
+        :param value: the duration in seconds
+        :type value: float
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(value)
+
+    def add_hook(self, event: str, hook: Callable):
+        """Registers a function called on an event
+
+        :param event: one of :data:`EVENTS`
+        :type event: str
+        :param hook: the function, called with keyword arguments
+        :type hook: Callable
+        """
+        if event not in self._hooks:
+            raise ValueError(f"Unknown event {event}, expected one of "
+                             f"{', '.join(EVENTS)}")
+        with self._lock:
+            self._hooks[event] = self._hooks[event] + [hook]
+
+    def remove_hook(self, event: str, hook: Callable):
+        """Unregisters a function added with :meth:`add_hook`"""
+        with self._lock:
+            self._hooks[event] = [h for h in self._hooks.get(event, [])
+                                  if h is not hook]
+
+    def emit(self, event: str, **info):
+        """Calls the hooks of an event"""
+        for hook in self._hooks[event]:
+            try:
+                hook(**info)
+            except Exception as e:
+                logger.info(f"Exception {e} in a {event} hook")
+
+    def snapshot(self) -> dict:
+        """Returns the current value of every counter and histogram, as
+        lists of ``{'labels': ..., 'value': ...}`` and ``{'labels': ...,
+        'count': ..., 'sum': ..., 'buckets': ...}`` dicts keyed by name,
+        the buckets mapping their upper bound to a cumulative count
+
+        :rtype: {dict}
+        """
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = [(key, h.snapshot())
+                          for key, h in self._histograms.items()]
+        snapshot = {'counters': {}, 'histograms': {}}
+        for (name, labels), value in sorted(counters):
+            snapshot['counters'].setdefault(name, []).append(
+                {'labels': dict(labels), 'value': value})
+        for (name, labels), histogram in sorted(histograms,
+                                                key=lambda h: h[0]):
+            snapshot['histograms'].setdefault(name, []).append(
+                dict(histogram, labels=dict(labels)))
+        return snapshot
+
+    def reset(self):
+        """Sets every counter and histogram back to zero"""
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+    def to_json(self) -> str:
+        """Returns the snapshot as a JSON document
+
+        :rtype: {str}
+        """
+        snapshot = self.snapshot()
+        for series in snapshot['histograms'].values():
+            for histogram in series:
+                histogram['buckets'] = {_bound(b): c for b, c
+                                        in histogram['buckets'].items()}
+        return json.dumps(snapshot, sort_keys=True)
+
+    def to_prometheus(self, prefix: str = 'scholarly_') -> str:
+        """Returns the snapshot in the Prometheus text exposition format
+
+        :param prefix: prefix of the metric names
+        :type prefix: str
+        :rtype: {str}
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, series in snapshot['counters'].items():
+            lines.append(f"# TYPE {prefix}{name} counter")
+            for s in series:
+                lines.append(f"{prefix}{name}{_labels(s['labels'])} "
+                             f"{s['value']}")
+        for name, series in snapshot['histograms'].items():
+            lines.append(f"# TYPE {prefix}{name} histogram")
+            for s in series:
+                for bound, count in s['buckets'].items():
+                    labels = dict(s['labels'], le=_bound(bound))
+                    lines.append(f"{prefix}{name}_bucket{_labels(labels)} "
+                                 f"{count}")
+                labels = _labels(s['labels'])
+                lines.append(f"{prefix}{name}_sum{labels} {s['sum']}")
+                lines.append(f"{prefix}{name}_count{labels} {s['count']}")
+        return '\n'.join(lines) + '\n'
+
+
+def _bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"')
+               .replace('\n', '\\n') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"'
+                          for k, v in zip(labels, escaped)) + '}'
@@ -3,20 +3,35 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from typing import Callable
+from typing import Callable, Iterable
 from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
 
+import asyncio
 import codecs
 import hashlib
 import logging
+import os
 import random
 import time
 import requests
 import tempfile
+import threading
 import stem.process
-from stem import Signal
-from stem.control import Controller
 from fake_useragent import UserAgent
+from ._cache import ResponseCache, normalize_url, url_class
+from ._checkpoint import Checkpoint
+from ._concurrency import SingleFlight, imap_unordered
+from ._crawler import CitationCrawler, CoauthorCrawler, GraphSink
+from ._export import publication_row
+from ._metrics import Metrics
+from ._parse import ParsedPage, ParsePool, next_page_url, parse_search_authors
+from ._prefetch import PagePrefetcher
+from ._proxy_pool import ProxyPool
+from ._ratelimit import RateLimiter
+from ._tor import TorController, TorPool
+from ._transport import RequestsTransport
+from .publication import _AsyncSearchScholarIterator
 from .publication import _SearchScholarIterator
 from .author import Author
 from .publication import Publication
@@ -49,6 +64,10 @@ class Navigator(object, metaclass=Singleton):
         logging.basicConfig(filename='scholar.log', level=logging.INFO)
         self.logger = logging.getLogger('scholarly')
         self._proxy_gen = None
+        # Pool of proxies picked per request, replacing the single proxy
+        self._proxy_pool = None
+        # Maximum seconds a request waits for a working proxy of the pool
+        self._proxy_timeout = 60
         # If we use a proxy or Tor, we set this to True
         self._proxy_works = False
         # If we have a Tor server that we can refresh, we set this to True
@@ -56,17 +75,84 @@ class Navigator(object, metaclass=Singleton):
         self._can_refresh_tor = False
         self._tor_control_port = None
         self._tor_password = None
+        # Control connection renewing the circuits of the Tor server
+        self._tor_controller = None
+        self._tor_lock = threading.Lock()
         # Setting requests timeout to be reasonably long
         # to accomodate slowness of the Tor network
         self._TIMEOUT = 10
         self._max_retries = 5
+        # Optional on-disk cache of the fetched pages
+        self._cache = None
+        # Spaces the requests of each identity (proxy or the local IP)
+        self._rate_limiter = RateLimiter()
+        # Sends the requests, reusing connections through the same proxy
+        self._transport = RequestsTransport()
+        # Tree builder used by BeautifulSoup to parse the pages
+        self._parser = 'html.parser'
+        # Number of result pages read ahead in the background, and fraction
+        # of the current page after which the read-ahead starts
+        self._prefetch_depth = 0
+        self._prefetch_threshold = 0.5
+        # Counters, latency histograms and hooks of the requests
+        self._metrics = Metrics()
+        # Fetches in flight, shared by the requests of the same page
+        self._in_flight = SingleFlight()
+        # Serializes the switches of the proxy of the generator
+        self._proxy_lock = threading.Lock()
+        # Optional pool of processes extracting the records of the pages
+        self._parse_pool = None
 
     def __del__(self):
         if self._tor_process:
             self._tor_process.kill()
+        if self._tor_controller is not None:
+            self._tor_controller.close()
+        self._transport.close()
+        if self._proxy_pool is not None:
+            self._proxy_pool.close()
+        if self._parse_pool is not None:
+            self._parse_pool.close()
 
     def _get_page(self, pagerequest: str) -> str:
-        """Return the data from a webpage
+        """Return the data from a webpage, using the cache if it is enabled
+
+        Concurrent requests for the same page share a single fetch, and
+        all get its text or its exception.
+
+        :param pagerequest: the page url
+        :type pagerequest: str
+        :returns: the text from a webpage
+        :rtype: {str}
+        :raises: Exception
+        """
+        return self._in_flight.call(normalize_url(pagerequest),
+                                    self._load_page, pagerequest,
+                                    on_shared=self._coalesced(pagerequest))
+
+    def _coalesced(self, pagerequest: str) -> Callable:
+        """Returns the function counting a request served by the fetch in
+        flight of another one"""
+        return lambda: self._metrics.inc('coalesced_total',
+                                         url_class=url_class(pagerequest))
+
+    def _load_page(self, pagerequest: str) -> str:
+        """Return the data from a webpage from the cache, or fetch it"""
+        if self._cache is not None:
+            html = self._cache.get(pagerequest)
+            kind = url_class(pagerequest)
+            if html is not None:
+                self.logger.info("Cache hit for %s", pagerequest)
+                self._metrics.inc('cache_hits_total', url_class=kind)
+                return html
+            self._metrics.inc('cache_misses_total', url_class=kind)
+        html = self._fetch_page(pagerequest)
+        if self._cache is not None:
+            self._cache.put(pagerequest, html)
+        return html
+
+    def _fetch_page(self, pagerequest: str) -> str:
+        """Fetch a webpage from the network, retrying on errors
 
         :param pagerequest: the page url
         :type pagerequest: str
@@ -75,30 +161,166 @@ class Navigator(object, metaclass=Singleton):
         :raises: Exception
         """
         self.logger.info("Getting %s", pagerequest)
+        proxy = self._pick_proxy()
         # Space a bit the requests to avoid overloading the servers
-        time.sleep(random.uniform(1,5))
+        time.sleep(self._politeness_delay(proxy))
+        return self._request_page(pagerequest, proxy)
+
+    async def _aget_page(self, pagerequest: str) -> str:
+        """Coroutine version of :meth:`_get_page`.
+
+        The politeness delay of the rate limiter is awaited instead of
+        slept, so that other requests can be in flight in the meantime.
+        The request itself runs in the default executor.
+
+        :param pagerequest: the page url
+        :type pagerequest: str
+        :returns: the text from a webpage
+        :rtype: {str}
+        :raises: Exception
+        """
+        return await self._in_flight.acall(
+            normalize_url(pagerequest), self._aload_page, pagerequest,
+            on_shared=self._coalesced(pagerequest))
+
+    async def _aload_page(self, pagerequest: str) -> str:
+        """Coroutine version of :meth:`_load_page`"""
+        if self._cache is not None:
+            html = self._cache.get(pagerequest)
+            kind = url_class(pagerequest)
+            if html is not None:
+                self.logger.info("Cache hit for %s", pagerequest)
+                self._metrics.inc('cache_hits_total', url_class=kind)
+                return html
+            self._metrics.inc('cache_misses_total', url_class=kind)
+        self.logger.info("Getting %s", pagerequest)
+        loop = asyncio.get_running_loop()
+        pool = self._proxy_pool
+        if pool is not None:
+            # Waits for a working proxy without blocking the loop
+            pick = loop.run_in_executor(None, self._pick_proxy)
+            try:
+                proxy = await asyncio.shield(pick)
+            except asyncio.CancelledError:
+                pick.add_done_callback(
+                    lambda f: self._unpick_proxy(pool, f))
+                raise
+        else:
+            proxy = self._pick_proxy()
+        try:
+            await asyncio.sleep(self._politeness_delay(proxy))
+        except BaseException:
+            # The request is not sent. Once sent, it releases the proxy
+            # itself, even if the coroutine is cancelled meanwhile.
+            if pool is not None:
+                pool.release(proxy, None)
+            raise
+        html = await loop.run_in_executor(None, self._request_page,
+                                          pagerequest, proxy)
+        if self._cache is not None:
+            self._cache.put(pagerequest, html)
+        return html
+
+    def _identity(self) -> str:
+        """Returns the proxy the requests currently go through, or None
+        when the local IP is used"""
+        if self._proxy_works:
+            return self.proxies['http']
+        return None
+
+    def _politeness_delay(self, proxy: str) -> float:
+        """Reserves a request through a proxy from the rate limiter and
+        returns the seconds to wait before sending it"""
+        if not getattr(self._transport, 'remote', True):
+            return 0
+        delay = self._rate_limiter.reserve(proxy)
+        self._metrics.observe('politeness_sleep_seconds', delay,
+                              proxy=proxy or 'direct')
+        return delay
+
+    def _pick_proxy(self) -> str:
+        """Returns the proxy the next request goes through: a proxy of the
+        pool, which must be released once the request is done, or the
+        current identity when no pool is set"""
+        if self._proxy_pool is not None:
+            return self._proxy_pool.acquire(self._proxy_timeout)
+        return self._identity()
+
+    @staticmethod
+    def _unpick_proxy(pool, picked: asyncio.Future):
+        """Gives back to the pool the proxy picked for a coroutine that
+        was cancelled while waiting for it"""
+        if not picked.cancelled() and picked.exception() is None:
+            pool.release(picked.result(), None)
+
+    def _request_page(self, pagerequest: str, proxy: str = None) -> str:
+        """Request a webpage, switching proxy or Tor identity on failures
+
+        :param pagerequest: the page url
+        :type pagerequest: str
+        :param proxy: the proxy of the pool picked for the first attempt,
+                      when a pool is set
+        :type proxy: str
+        :returns: the text from a webpage
+        :rtype: {str}
+        :raises: Exception
+        """
         resp = None
         tries = 0
+        attempt = 0
+        pool = self._proxy_pool
+        metrics = self._metrics
+        kind = url_class(pagerequest)
         while tries < self._max_retries:
-            # If proxy/Tor was setup, use it.
-            # Otherwise the local IP is used
-            session = requests.Session()
-            if self._proxy_works:
-                session.proxies = self.proxies
+            if pool is not None:
+                if proxy is None:
+                    proxy = pool.acquire(self._proxy_timeout)
+                    time.sleep(self._politeness_delay(proxy))
+                proxies = {'http': proxy, 'https': proxy}
+                identity = proxy
+            else:
+                # If proxy/Tor was setup, use it.
+                # Otherwise the local IP is used
+                proxies = self.proxies if self._proxy_works else None
+                identity = self._identity()
+            fetched = captcha = False
+            outcome = 'error'
+            label = identity or 'direct'
+            attempt += 1
+            metrics.emit('before_request', url=pagerequest, proxy=identity)
+            start = time.monotonic()
 
             try:
-                _HEADERS['User-Agent'] = UserAgent().random
+                headers = dict(_HEADERS)
+                headers['User-Agent'] = UserAgent().random
                 _GOOGLEID = hashlib.md5(str(random.random()).encode('utf-8')).hexdigest()[:16]
                 _COOKIES = {'GSP': 'ID={0}:CF=4'.format(_GOOGLEID)}
 
-                resp = session.get(pagerequest,
-                                   headers=_HEADERS,
-                                   cookies=_COOKIES,
-                                   timeout=self._TIMEOUT)
+                resp = self._transport.get(pagerequest, headers, _COOKIES,
+                                           proxies, self._TIMEOUT)
+                seconds = time.monotonic() - start
+                metrics.observe('request_seconds', seconds, url_class=kind,
+                                proxy=label)
+                metrics.inc('bytes_total', len(resp.content), url_class=kind,
+                            proxy=label)
+                metrics.emit('after_response', url=pagerequest,
+                             proxy=identity, status=resp.status_code,
+                             seconds=seconds, size=len(resp.content))
+                outcome = str(resp.status_code)
 
                 if resp.status_code == 200:
                     if not self._has_captcha(resp.text):
+                        self._rate_limiter.on_success(identity)
+                        fetched = True
+                        outcome = 'ok'
                         return resp.text
+                    captcha = True
+                    outcome = 'captcha'
+                    self._transport.invalidate(pagerequest)
+                    self._rate_limiter.on_captcha(identity)
+                    metrics.inc('captchas_total', proxy=label)
+                    metrics.emit('on_captcha', url=pagerequest,
+                                 proxy=identity)
                     self.logger.info("Got a CAPTCHA. Retrying.")
                 else:
                     self.logger.info(f"""Response code {resp.status_code}.
@@ -108,26 +330,61 @@ class Navigator(object, metaclass=Singleton):
                 err = f"Exception {e} while fetching page. Retrying."
                 self.logger.info(err)
             finally:
-                session.close()
+                if pool is not None:
+                    pool.release(proxy, fetched, time.monotonic() - start,
+                                 captcha)
+                metrics.inc('requests_total', url_class=kind, proxy=label,
+                            outcome=outcome)
 
+            if pool is not None:
+                tries += 1
+                self.logger.info(f"Try #{tries} failed through {proxy}. "
+                                 "Switching proxy.")
+                proxy = None
             # Check if Tor is running and refresh it
-            if self._can_refresh_tor:
+            elif self._can_refresh_tor:
                 self.logger.info("Refreshing Tor ID...")
-                self._refresh_tor_id(self._tor_control_port, self._tor_password)
-                time.sleep(5) # wait for the refresh to happen
+                # Returns once a new circuit is built
+                if not self._refresh_tor_id(self._tor_control_port,
+                                            self._tor_password, since=start):
+                    # Without a new circuit the retries are bounded
+                    tries += 1
             elif self._proxy_gen:
                 tries += 1
                 self.logger.info(f"Try #{tries} failed. Switching proxy.")
-                # Try to get another proxy
-                new_proxy = self._proxy_gen()
-                while (not self._use_proxy(new_proxy)):
-                    new_proxy = self._proxy_gen()
+                self._switch_proxy(identity)
             else:
                 # we only increase the tries when we cannot refresh id
                 # to avoid an infinite loop
                 tries += 1
+            if tries < self._max_retries:
+                metrics.inc('retries_total', url_class=kind, proxy=label)
+                metrics.emit('on_retry', url=pagerequest, proxy=identity,
+                             attempt=attempt, reason=outcome)
+                if pool is None:
+                    # The retry waits for the rate limiter, which a CAPTCHA
+                    # slows down. A proxy of the pool waits when acquired.
+                    time.sleep(self._politeness_delay(self._identity()))
         raise Exception("Cannot fetch the page from Google Scholar.")
 
+    def _switch_proxy(self, failed: str):
+        """Replaces the proxy through which a request failed by a working
+        proxy of the generator. The requests that failed at the same time
+        through the same proxy switch it once."""
+        with self._proxy_lock:
+            if self._identity() != failed:
+                # Another request already switched the proxy
+                return
+            # The failed proxy stays enabled until a new one works, so that
+            # concurrent requests never fall back to the local IP
+            while True:
+                new_proxy = self._proxy_gen()
+                proxies = {'http': new_proxy, 'https': new_proxy}
+                if self._check_proxy(proxies):
+                    break
+                self.logger.info(f"Proxy {new_proxy} does not seem to work.")
+            self._enable_proxies(proxies)
+
     def _check_proxy(self, proxies) -> bool:
         """Checks if a proxy is working.
         :param proxies: A dictionary {'http': url1, 'https': url1}
@@ -148,30 +405,221 @@ class Navigator(object, metaclass=Singleton):
 
             return False
 
-    def _refresh_tor_id(self, tor_control_port: int, password: str) -> bool:
+    def _refresh_tor_id(self, tor_control_port: int, password: str,
+                        since: float = None) -> bool:
         """Refreshes the id by using a new ToR node.
 
+        The control connection is kept open across refreshes, and
+        concurrent refreshes are coalesced into a single one, see
+        :class:`TorController`.
+
+        :param since: the `time.monotonic()` at which the failed request
+                      was sent, no refresh being needed if the circuits
+                      were renewed after it
+        :type since: float
         :returns: Whether or not the refresh was succesful
         :rtype: {bool}
         """
-        try:
-            with Controller.from_port(port=tor_control_port) as controller:
-                if password:
-                    controller.authenticate(password=password)
-                else:
-                    controller.authenticate()
-                controller.signal(Signal.NEWNYM)
-            return True
-        except Exception as e:
-            err = f"Exception {e} while refreshing TOR. Retrying..."
-            self.logger.info(err)
+        with self._tor_lock:
+            # Threads failing at the same time share a single controller,
+            # and so a single NEWNYM
+            controller = self._tor_controller
+            if (controller is None or controller.port != tor_control_port
+                    or controller.password != password):
+                if controller is not None:
+                    controller.close()
+                controller = TorController(tor_control_port, password)
+                self._tor_controller = controller
+        if not controller.refresh(since):
+            self.logger.info("Could not refresh TOR. Retrying...")
             return False
+        # Connections kept alive would stay on the old circuit
+        if self._proxy_works:
+            self._transport.discard(self.proxies)
+        return True
 
     def _set_retries(self, num_retries: int) -> None:
         if (num_retries < 0):
             raise ValueError("num_retries must not be negative")
         self._max_retries = num_retries
 
+    def _set_cache(self, path: str, ttl: dict = None, max_size: int = None):
+        """Enables the on-disk cache of fetched pages, or disables it
+        when `path` is None.
+
+        :param path: the SQLite database file of the cache
+        :type path: str
+        :param ttl: time to live in seconds per url class
+        :type ttl: dict
+        :param max_size: maximum total size in bytes of the cache
+        :type max_size: int
+        """
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+        if path is not None:
+            kwargs = {'ttl': ttl}
+            if max_size is not None:
+                kwargs['max_size'] = max_size
+            self._cache = ResponseCache(path, **kwargs)
+        return self._cache is not None
+
+    def _set_parser(self, parser: str):
+        """Sets the tree builder used to parse the pages
+
+        :param parser: ``html.parser``, ``lxml`` or ``html5lib``
+        :type parser: str
+        """
+        if builder_registry.lookup(parser) is None:
+            raise ValueError(f"The parser {parser} is not available. "
+                             "Check that the library providing it is installed.")
+        self._parser = parser
+        return True
+
+    def _set_prefetch(self, depth: int, threshold: float):
+        """Sets how the next pages of results are read ahead
+
+        :param depth: maximum number of pages fetched ahead, 0 to disable
+        :type depth: int
+        :param threshold: fraction of the current page after which the
+                          next page starts loading
+        :type threshold: float
+        """
+        if depth < 0:
+            raise ValueError("depth must not be negative")
+        if not 0 <= threshold <= 1:
+            raise ValueError("threshold must be between 0 and 1")
+        self._prefetch_depth = depth
+        self._prefetch_threshold = threshold
+        return True
+
+    def _make_prefetcher(self, next_url: Callable, parse: Callable = None,
+                         *args) -> PagePrefetcher:
+        """Returns a prefetcher of pages following the settings of
+        :meth:`_set_prefetch`
+
+        :param next_url: function returning the url of the page following
+                         a page, given its url and soup
+        :type next_url: Callable
+        :param parse: function of :mod:`scholarly._parse` extracting the
+                      records of the pages, called with `args`. When the
+                      pages are parsed in a pool of processes, the
+                      prefetcher returns their :class:`ParsedPage` instead
+                      of their soup.
+        :type parse: Callable
+        """
+        if parse is not None and self._parse_pool is not None:
+            return PagePrefetcher(
+                lambda url: self._parse_page(url, parse, *args),
+                next_page_url, self._prefetch_depth,
+                self._prefetch_threshold)
+        return PagePrefetcher(self._get_soup, next_url,
+                              self._prefetch_depth, self._prefetch_threshold)
+
+    def _set_parse_pool(self, workers: int = None):
+        """Sets the pool of processes extracting the records of the pages
+
+        :param workers: number of processes, None for the number of
+                        processors, or 0 to parse the pages in the thread
+                        that fetched them
+        :type workers: int
+        """
+        if workers is not None and workers < 0:
+            raise ValueError("workers must not be negative")
+        old = self._parse_pool
+        self._parse_pool = ParsePool(workers) if workers != 0 else None
+        if old is not None:
+            old.close()
+        return True
+
+    def _parse_page(self, url: str, parse: Callable, *args) -> ParsedPage:
+        """Fetches a page on scholar.google.com and extracts its records in
+        the pool of processes
+
+        :param url: the url of the page
+        :type url: str
+        :param parse: function of :mod:`scholarly._parse` extracting the
+                      records, called with the text of the page, the
+                      parser, the url and `args`
+        :type parse: Callable
+        """
+        html = self._get_page(_HOST.format(url))
+        start = time.monotonic()
+        page = self._parse_pool.parse(parse, html, self._parser, url, *args)
+        self._metrics.observe('parse_seconds', time.monotonic() - start,
+                              parser=self._parser)
+        return page
+
+    def _set_rate_limiter(self, limiter):
+        """Replaces the rate limiter spacing the requests
+
+        :param limiter: an object with the `reserve`, `on_captcha` and
+                        `on_success` methods of :class:`RateLimiter`
+        """
+        for method in ('reserve', 'on_captcha', 'on_success'):
+            if not callable(getattr(limiter, method, None)):
+                raise ValueError(f"The rate limiter has no {method} method")
+        self._rate_limiter = limiter
+        return True
+
+    def _set_session_pool(self, size: int, idle_timeout: float):
+        """Sends the requests with `requests` through a new pool of
+        keep-alive sessions
+
+        :param size: maximum number of idle sessions kept per proxy,
+                     0 to open a new connection for every request
+        :type size: int
+        :param idle_timeout: seconds after which an idle session is closed
+        :type idle_timeout: float
+        """
+        return self._set_transport(RequestsTransport(size, idle_timeout))
+
+    def _set_transport(self, transport):
+        """Replaces the transport sending the requests
+
+        :param transport: an object with the `get`, `discard`,
+                          `invalidate` and `close` methods of
+                          :class:`scholarly._transport.Transport`
+        """
+        for method in ('get', 'discard', 'invalidate', 'close'):
+            if not callable(getattr(transport, method, None)):
+                raise ValueError(f"The transport has no {method} method")
+        old = self._transport
+        self._transport = transport
+        old.close()
+        return True
+
+    def _set_proxy_pool(self, proxies: list = None,
+                        gen: Callable[..., str] = None, size: int = 8,
+                        workers: int = 8, max_failures: int = 3,
+                        quarantine: float = 300.0) -> bool:
+        """Replaces the single proxy by a pool of proxies checked in the
+        background, or removes the pool when neither `proxies` nor `gen`
+        is given.
+
+        :param proxies: urls of the proxies
+        :type proxies: list
+        :param gen: function returning the url of a new proxy
+        :type gen: Callable
+        :param size: number of working proxies kept drawn from `gen`
+        :type size: int
+        :param workers: number of proxies checked at the same time
+        :type workers: int
+        :param max_failures: failures in a row putting a proxy in quarantine
+        :type max_failures: int
+        :param quarantine: seconds of the first quarantine of a proxy
+        :type quarantine: float
+        """
+        old = self._proxy_pool
+        self._proxy_pool = None
+        if proxies or gen is not None:
+            self._proxy_pool = ProxyPool(self._check_proxy, proxies or (),
+                                         gen, size, workers, max_failures,
+                                         quarantine)
+        if old is not None:
+            old.close()
+        return True
+
     def _set_proxy_generator(self, gen: Callable[..., str]) -> bool:
         self._proxy_gen = gen
         return True
@@ -192,13 +640,25 @@ class Navigator(object, metaclass=Singleton):
             https = http
 
         proxies = {'http': http, 'https': https}
-        self._proxy_works = self._check_proxy(proxies)
-        if self._proxy_works:
-            self.logger.info(f"Enabling proxies: http={http} https={https}")
-            self.proxies = proxies
+        # The current proxy is kept by the requests in flight while the
+        # new one is checked
+        works = self._check_proxy(proxies)
+        if works:
+            self._enable_proxies(proxies)
         else:
+            self._proxy_works = False
             self.logger.info(f"Proxy {http} does not seem to work.")
-        return self._proxy_works
+        return works
+
+    def _enable_proxies(self, proxies: dict):
+        """Sends the next requests through a checked proxy"""
+        previous = self.proxies if self._proxy_works else None
+        self.logger.info(f"Enabling proxies: http={proxies['http']} "
+                         f"https={proxies['https']}")
+        self.proxies = proxies
+        self._proxy_works = True
+        if previous is not None and previous != proxies:
+            self._transport.discard(previous)
 
     def _setup_tor(self, tor_sock_port: int, tor_control_port: int, tor_password: str):
         """
@@ -231,11 +691,18 @@ class Navigator(object, metaclass=Singleton):
             "tor_sock_port": tor_sock_port
         }
 
-    def _launch_tor(self, tor_cmd=None, tor_sock_port=None, tor_control_port=None):
+    def _launch_tor(self, tor_cmd=None, tor_sock_port=None, tor_control_port=None,
+                    pool_size=1):
         '''
         Starts a Tor client running in a schoar-specific port,
         together with a scholar-specific control port.
+
+        With a `pool_size` above 1, that many Tor clients are started and
+        the requests are spread over them, see :meth:`_launch_tor_pool`.
         '''
+        if pool_size > 1:
+            return self._launch_tor_pool(tor_cmd, pool_size, tor_sock_port,
+                                         tor_control_port)
         self.logger.info("Attempting to start owned Tor as the proxy")
 
         if tor_cmd is None:
@@ -271,6 +738,46 @@ class Navigator(object, metaclass=Singleton):
         )
         return self._setup_tor(tor_sock_port, tor_control_port, tor_password=None)
 
+    def _launch_tor_pool(self, tor_cmd, pool_size, tor_sock_port=None,
+                         tor_control_port=None):
+        '''
+        Starts `pool_size` Tor clients, each with its own data directory and
+        ports, and spreads the requests over them. The circuits of a client
+        are renewed when a request through it fails, independently of the
+        others. The pool replaces the proxy pool and is stopped with it.
+        '''
+        self.logger.info(f"Attempting to start {pool_size} owned Tor proxies")
+        failed = {
+            "proxy_works": False,
+            "refresh_works": False,
+            "proxies": [],
+            "tor_control_port": [],
+            "tor_sock_port": []
+        }
+        if tor_cmd is None:
+            self.logger.info("No tor_cmd argument passed. This should point to the location of tor executable")
+            return failed
+        try:
+            pool = TorPool.launch(tor_cmd, pool_size, tor_sock_port,
+                                  tor_control_port,
+                                  on_refresh=lambda p: self._transport.discard(p))
+        except ValueError:
+            raise
+        except Exception as e:
+            self.logger.info(f"Exception {e} while launching Tor")
+            return failed
+
+        old, self._proxy_pool = self._proxy_pool, pool
+        if old is not None:
+            old.close()
+        return {
+            "proxy_works": True,
+            "refresh_works": True,
+            "proxies": [i.proxy for i in pool.instances],
+            "tor_control_port": [i.control_port for i in pool.instances],
+            "tor_sock_port": [i.socks_port for i in pool.instances]
+        }
+
     def _has_captcha(self, text: str) -> bool:
         """Tests whether an error or captcha was shown.
 
@@ -289,9 +796,19 @@ class Navigator(object, metaclass=Singleton):
 
     def _get_soup(self, url: str) -> BeautifulSoup:
         """Return the BeautifulSoup for a page on scholar.google.com"""
-        html = self._get_page(_HOST.format(url))
+        return self._make_soup(self._get_page(_HOST.format(url)))
+
+    async def _aget_soup(self, url: str) -> BeautifulSoup:
+        """Coroutine version of :meth:`_get_soup`"""
+        return self._make_soup(await self._aget_page(_HOST.format(url)))
+
+    def _make_soup(self, html: str) -> BeautifulSoup:
+        """Parse the text of a page on scholar.google.com"""
+        start = time.monotonic()
         html = html.replace(u'\xa0', u' ')
-        res = BeautifulSoup(html, 'html.parser')
+        res = BeautifulSoup(html, self._parser)
+        self._metrics.observe('parse_seconds', time.monotonic() - start,
+                              parser=self._parser)
         try:
             self.publib = res.find('div', id='gs_res_glb').get('data-sva')
         except Exception:
@@ -302,26 +819,249 @@ class Navigator(object, metaclass=Singleton):
         """Obtain a single autor by Scholar Id"""
         return Author(self, id)
 
-    def search_authors(self, url: str):
-        """Generator that returns Author objects from the author search page"""
-        soup = self._get_soup(url)
+    def get_authors(self, ids: Iterable[str], sections: list = [],
+                    concurrency: int = 4):
+        """Generator that fills authors by Scholar Id concurrently, and
+        returns them as they are filled
+
+        :param ids: the Scholar Ids, duplicates being filled once
+        :type ids: Iterable[str]
+        :param sections: the sections to fill, see :meth:`Author.fill`
+        :type sections: list
+        :param concurrency: maximum number of authors filled at the same
+                            time
+        :type concurrency: int
+        :returns: ``(id, author, error)`` tuples, where `author` is None
+                  and `error` the exception when the author could not be
+                  filled
+        """
+        def unique(ids):
+            seen = set()
+            for id in ids:
+                if id not in seen:
+                    seen.add(id)
+                    yield id
+
+        def fill(id):
+            return self.get_author(id)._fill(sections)
+
+        yield from imap_unordered(fill, unique(ids), concurrency)
+
+    def resolve_bibtex(self, pubs: Iterable[Publication],
+                       concurrency: int = 4) -> list:
+        """Reads the bibtex links of search results from their cite popups
+        concurrently
+
+        :param pubs: the publications, those whose link is known being
+                     skipped
+        :type pubs: Iterable[Publication]
+        :param concurrency: maximum number of popups fetched at the same
+                            time
+        :type concurrency: int
+        :returns: the ``(publication, exception)`` pairs of the
+                  publications whose popup could not be fetched
+        :rtype: list
+        """
+        pending = (pub for pub in pubs if pub._has_cite_popup())
+        results = imap_unordered(lambda pub: pub.resolve_bibtex(), pending,
+                                 concurrency)
+        return [(pub, error) for pub, _, error in results
+                if error is not None]
+
+    def crawl_coauthors(self, ids: Iterable[str], sink, max_depth: int = 2,
+                        max_nodes: int = 1000,
+                        sections: list = ['basics', 'indices'],
+                        concurrency: int = 4, checkpoint: str = None,
+                        checkpoint_every: int = 10,
+                        compression: str = None) -> dict:
+        """Crawls the coauthor graph from seed authors, see
+        :class:`CoauthorCrawler`
+
+        :param ids: the Scholar Ids of the seed authors
+        :type ids: Iterable[str]
+        :param sink: a JSONL file, or an object with the `node` and `edge`
+                     methods of a :class:`GraphSink`
+        :param max_depth: number of coauthor hops from the seeds
+        :type max_depth: int
+        :param max_nodes: maximum number of authors crawled
+        :type max_nodes: int
+        :param sections: the sections filled besides ``coauthors``
+        :type sections: list
+        :param concurrency: maximum number of authors filled at the same
+                            time
+        :type concurrency: int
+        :param checkpoint: file of the state of the crawl, from which an
+                           interrupted crawl is resumed
+        :type checkpoint: str
+        :param checkpoint_every: number of authors between two writes of
+                                 the checkpoint
+        :type checkpoint_every: int
+        :param compression: compression of the JSONL file
+        :type compression: str
+        :returns: the number of nodes and edges written, and the
+                  ``(id, error)`` pairs of the authors that failed
+        :rtype: {dict}
+        """
+        crawler = CoauthorCrawler(self, None, max_depth, max_nodes, sections,
+                                  concurrency=concurrency,
+                                  checkpoint=checkpoint,
+                                  checkpoint_every=checkpoint_every)
+        return self._run_crawler(crawler, [(id, None) for id in ids], sink,
+                                 compression)
+
+    def crawl_citations(self, pubs: Iterable[Publication], sink,
+                        max_depth: int = 2, max_nodes: int = 1000,
+                        max_citing: int = 100, concurrency: int = 4,
+                        checkpoint: str = None, checkpoint_every: int = 10,
+                        compression: str = None) -> dict:
+        """Crawls the citation graph from seed publications, see
+        :class:`CitationCrawler`
+
+        :param pubs: the seed publications, from a search of publications
+        :type pubs: Iterable[Publication]
+        :param sink: a JSONL file, or an object with the `node` and `edge`
+                     methods of a :class:`GraphSink`
+        :param max_depth: number of citation hops from the seeds
+        :type max_depth: int
+        :param max_nodes: maximum number of publications crawled
+        :type max_nodes: int
+        :param max_citing: maximum number of citing papers read per
+                           publication
+        :type max_citing: int
+        :param concurrency: maximum number of citation searches at the same
+                            time
+        :type concurrency: int
+        :param checkpoint: file of the state of the crawl, from which an
+                           interrupted crawl is resumed
+        :type checkpoint: str
+        :param checkpoint_every: number of publications between two writes
+                                 of the checkpoint
+        :type checkpoint_every: int
+        :param compression: compression of the JSONL file
+        :type compression: str
+        :returns: the number of nodes and edges written, and the
+                  ``(cid, error)`` pairs of the publications that failed
+        :rtype: {dict}
+        """
+        seeds = []
+        for pub in pubs:
+            if getattr(pub, 'cid', None) is None:
+                raise ValueError("The seeds of a citation crawl must come "
+                                 "from a search of publications")
+            seeds.append((pub.cid, publication_row(pub.to_record())))
+        crawler = CitationCrawler(self, None, max_depth, max_nodes,
+                                  max_citing, concurrency=concurrency,
+                                  checkpoint=checkpoint,
+                                  checkpoint_every=checkpoint_every)
+        return self._run_crawler(crawler, seeds, sink, compression)
+
+    def _run_crawler(self, crawler, seeds: list, sink,
+                     compression: str) -> dict:
+        """Runs a crawl, writing to a :class:`GraphSink` when `sink` is a
+        path, appended to when the crawl is resumed"""
+        if not isinstance(sink, str):
+            crawler.sink = sink
+            return crawler.run(seeds)
+        append = (crawler.checkpoint is not None
+                  and os.path.exists(crawler.checkpoint))
+        crawler.sink = GraphSink(sink, compression, append)
+        try:
+            return crawler.run(seeds)
+        finally:
+            crawler.sink.close()
+
+    def search_authors(self, url: str, checkpoint: str = None,
+                       checkpoint_every: int = 10):
+        """Generator that returns Author objects from the author search page
+
+        :param url: the url of the first page of authors
+        :type url: str
+        :param checkpoint: journal file where the progress is recorded, and
+                           from which an interrupted search is resumed,
+                           defaults to None
+        :type checkpoint: str, optional
+        :param checkpoint_every: number of authors between two writes of
+                                 the journal, defaults to 10
+        :type checkpoint_every: int, optional
+        """
+        journal = None
+        skip = set()
+        # Rows of the first page read before the search was interrupted
+        read = 0
+        if checkpoint is not None:
+            journal = Checkpoint(checkpoint, url, checkpoint_every)
+            if journal.done:
+                return
+            url = journal.page_url
+            skip = set(journal.seen)
+            read = journal.pos
+        prefetcher = self._make_prefetcher(self._next_authors_page,
+                                           parse_search_authors)
+        try:
+            soup = prefetcher.get(url)
+
+            while True:
+                if journal is not None:
+                    journal.page(url)
+                if isinstance(soup, ParsedPage):
+                    rows = soup.records
+                else:
+                    rows = soup.find_all('div', 'gsc_1usr')
+                self.logger.info("Found %d authors", len(rows))
+                for i, row in enumerate(rows, 1):
+                    prefetcher.progress(url, soup, i, len(rows))
+                    if i <= read:
+                        continue
+                    if isinstance(soup, ParsedPage):
+                        author = row.to_author(self)
+                    else:
+                        author = Author(self, row)
+                    if author.id in skip:
+                        continue
+                    if journal is not None:
+                        journal.advance(author.id, i)
+                    yield author
+                read = 0
+                if isinstance(soup, ParsedPage):
+                    url = soup.next_url
+                else:
+                    url = self._next_authors_page(url, soup)
+                if url is None:
+                    self.logger.info("No more author pages")
+                    break
+                self.logger.info("Loading next page of authors")
+                soup = prefetcher.get(url)
+            if journal is not None:
+                journal.finish()
+        finally:
+            prefetcher.close()
+
+    async def asearch_authors(self, url: str):
+        """Async generator version of :meth:`search_authors`"""
+        soup = await self._aget_soup(url)
 
         while True:
             rows = soup.find_all('div', 'gsc_1usr')
             self.logger.info("Found %d authors", len(rows))
             for row in rows:
                 yield Author(self, row)
-            cls1 = 'gs_btnPR gs_in_ib gs_btn_half '
-            cls2 = 'gs_btn_lsb gs_btn_srt gsc_pgn_pnx'
-            next_button = soup.find(class_=cls1+cls2)  # Can be improved
-            if next_button and 'disabled' not in next_button.attrs:
-                self.logger.info("Loading next page of authors")
-                url = next_button['onclick'][17:-1]
-                url = codecs.getdecoder("unicode_escape")(url)[0]
-                soup = self._get_soup(url)
-            else:
+            url = self._next_authors_page(url, soup)
+            if url is None:
                 self.logger.info("No more author pages")
                 break
+            self.logger.info("Loading next page of authors")
+            soup = await self._aget_soup(url)
+
+    @staticmethod
+    def _next_authors_page(url: str, soup: BeautifulSoup) -> str:
+        """Returns the url of the page of authors after `url`, or None"""
+        cls1 = 'gs_btnPR gs_in_ib gs_btn_half '
+        cls2 = 'gs_btn_lsb gs_btn_srt gsc_pgn_pnx'
+        next_button = soup.find(class_=cls1+cls2)  # Can be improved
+        if next_button and 'disabled' not in next_button.attrs:
+            url = next_button['onclick'][17:-1]
+            return codecs.getdecoder("unicode_escape")(url)[0]
+        return None
 
     def search_publication(self, url: str,
                            filled: bool = False) -> Publication:
@@ -340,12 +1080,33 @@ class Navigator(object, metaclass=Singleton):
             res.fill()
         return res
 
-    def search_publications(self, url: str) -> _SearchScholarIterator:
+    def search_publications(self, url: str, checkpoint: str = None,
+                            checkpoint_every: int = 10) -> _SearchScholarIterator:
         """Returns a Publication Generator given a url
 
         :param url: the url where publications can be found.
         :type url: str
+        :param checkpoint: journal file where the progress is recorded, and
+                           from which an interrupted search is resumed,
+                           defaults to None
+        :type checkpoint: str, optional
+        :param checkpoint_every: number of publications between two writes
+                                 of the journal, defaults to 10
+        :type checkpoint_every: int, optional
         :returns: An iterator of Publications
         :rtype: {_SearchScholarIterator}
         """
-        return _SearchScholarIterator(self, url)
+        journal = None
+        if checkpoint is not None:
+            journal = Checkpoint(checkpoint, url, checkpoint_every)
+        return _SearchScholarIterator(self, url, journal)
+
+    def asearch_publications(self, url: str) -> _AsyncSearchScholarIterator:
+        """Returns an async Publication iterator given a url
+
+        :param url: the url where publications can be found.
+        :type url: str
+        :returns: An async iterator of Publications
+        :rtype: {_AsyncSearchScholarIterator}
+        """
+        return _AsyncSearchScholarIterator(self, url)
@@ -0,0 +1,139 @@
+"""Extraction of records from the text of pages in a pool of processes"""
+import collections
+import concurrent.futures
+import multiprocessing
+from typing import Callable
+from bs4 import BeautifulSoup
+
+# Records extracted from a page, the url of the page after it, and for a
+# profile the record of the author with the sections read from the page
+ParsedPage = collections.namedtuple('ParsedPage',
+                                    ['records', 'next_url', 'author'])
+
+
+class _PageNavigator(object):
+    """Stands for the navigator while the rows of a page are extracted in
+    a worker, which sends no request"""
+
+    def __init__(self, soup):
+        glb = soup.find('div', id='gs_res_glb')
+        self.publib = glb.get('data-sva') if glb is not None else None
+
+
+def next_page_url(url: str, page: ParsedPage) -> str:
+    """Returns the url of the page after a parsed page, or None"""
+    return page.next_url
+
+
+def _make_soup(html: str, parser: str) -> BeautifulSoup:
+    return BeautifulSoup(html.replace(u'\xa0', u' '), parser)
+
+
+def parse_search_pubs(html: str, parser: str, url: str) -> ParsedPage:
+    """Extracts the publications of a page of search results
+
+    :param html: the text of the page
+    :type html: str
+    :param parser: the tree builder of BeautifulSoup
+    :type parser: str
+    :param url: the url of the page
+    :type url: str
+    :rtype: {ParsedPage}
+    """
+    from .publication import Publication, _next_scholar_page
+    soup = _make_soup(html, parser)
+    nav = _PageNavigator(soup)
+    records = [Publication(nav, row, 'scholar').to_record()
+               for row in soup.find_all('div', class_='gs_r gs_or gs_scl')]
+    return ParsedPage(records, _next_scholar_page(url, soup), None)
+
+
+def parse_search_authors(html: str, parser: str, url: str) -> ParsedPage:
+    """Extracts the authors of a page of author search results
+
+    :param html: the text of the page
+    :type html: str
+    :param parser: the tree builder of BeautifulSoup
+    :type parser: str
+    :param url: the url of the page
+    :type url: str
+    :rtype: {ParsedPage}
+    """
+    from ._navigator import Navigator
+    from .author import Author
+    soup = _make_soup(html, parser)
+    records = [Author(None, row).to_record()
+               for row in soup.find_all('div', 'gsc_1usr')]
+    return ParsedPage(records, Navigator._next_authors_page(url, soup), None)
+
+
+def parse_profile(html: str, parser: str, url: str, id: str,
+                  sections: list) -> ParsedPage:
+    """Extracts sections of an author from a page of their profile, and
+    the publications it lists when ``publications`` is one of them
+
+    :param html: the text of the page
+    :type html: str
+    :param parser: the tree builder of BeautifulSoup
+    :type parser: str
+    :param url: the url of the page
+    :type url: str
+    :param id: the Scholar Id of the author
+    :type id: str
+    :param sections: the sections to extract, see :meth:`Author.fill`
+    :type sections: list
+    :rtype: {ParsedPage}
+    """
+    from .author import Author
+    soup = _make_soup(html, parser)
+    author = Author(None, id)
+    for section in sections:
+        if section != 'publications':
+            getattr(author, f'_fill_{section}')(soup)
+            author._filled.add(section)
+    records = []
+    next_url = None
+    if 'publications' in sections:
+        author.publications = []
+        author._add_publications(soup)
+        records = [pub.to_record() for pub in author.publications]
+        next_url = author._next_publications_page(url, soup)
+        del author.publications
+    return ParsedPage(records, next_url, author.to_record())
+
+
+class ParsePool(object):
+    """Pool of processes parsing the pages of the navigator.
+
+    The text of a page is sent to a worker process, which parses it with
+    BeautifulSoup and sends back the plain records of its rows instead of
+    the soup. The parsing of the pages then runs on other cores while the
+    threads of the navigator wait for the network.
+
+    The workers are spawned rather than forked, since the navigator may
+    hold locks in other threads when the first page is sent.
+    """
+
+    def __init__(self, workers: int = None):
+        """
+        :param workers: number of processes, defaults to the number of
+                        processors
+        :type workers: int
+        """
+        self.workers = workers
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def parse(self, fn: Callable, *args) -> ParsedPage:
+        """Calls an extraction function of this module in a worker and
+        waits for its result
+
+        :param fn: one of the ``parse_*`` functions
+        :type fn: Callable
+        :rtype: {ParsedPage}
+        """
+        return self._executor.submit(fn, *args).result()
+
+    def close(self):
+        """Stops the worker processes"""
+        self._executor.shutdown(wait=False)
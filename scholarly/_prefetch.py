@@ -0,0 +1,123 @@
+"""Read-ahead of the next pages of paginated results"""
+import collections
+import concurrent.futures
+import threading
+from typing import Callable
+
+
+class PagePrefetcher(object):
+    """Fetches the next pages of a paginated listing in a background thread
+    while the consumer is still reading the current one.
+
+    Pages are requested with :meth:`get`, which returns a page fetched
+    ahead of time when there is one and fetches it on the spot otherwise.
+    Once the consumer has gone through `threshold` of the rows of a page
+    (see :meth:`progress`), or when :meth:`prefetch` is called directly,
+    the next page starts loading, followed by the pages after it until
+    `depth` pages are waiting to be read. With a `depth` of 0 nothing is
+    read ahead and :meth:`get` fetches every page itself.
+
+    The consumer must call :meth:`close` when it stops early, to cancel the
+    pages that were not fetched yet.
+    """
+
+    def __init__(self, fetch: Callable, next_url: Callable,
+                 depth: int = 1, threshold: float = 0.5):
+        """
+        :param fetch: function returning the soup of a url
+        :type fetch: Callable
+        :param next_url: function returning the url of the page following
+                         a page, given its url and soup, or None
+        :type next_url: Callable
+        :param depth: maximum number of pages fetched ahead
+        :type depth: int
+        :param threshold: fraction of the rows of a page after which the
+                          next page starts loading
+        :type threshold: float
+        """
+        self._fetch = fetch
+        self._next_url = next_url
+        self._depth = depth
+        self._threshold = threshold
+        self._executor = None
+        self._pages = collections.OrderedDict()
+        self._advanced = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def get(self, url: str):
+        """Returns the soup of a page, waiting for it if it is being
+        prefetched
+
+        :param url: the url of the page
+        :type url: str
+        """
+        with self._lock:
+            future = self._pages.pop(url, None)
+            if future is None:
+                # The consumer did not follow the prefetched pages
+                stale = list(self._pages.values())
+                self._pages.clear()
+            else:
+                stale = []
+                last_url, last = next(reversed(self._pages.items()),
+                                      (None, None))
+        for f in stale:
+            f.cancel()
+        if future is None:
+            return self._fetch(url)
+        soup = future.result()
+        # A page that finished loading stopped reading ahead at the depth
+        # limit, so the pages after it are scheduled again
+        if last is not None and last.done() and last.exception() is None:
+            self.prefetch(self._next_url(last_url, last.result()))
+        return soup
+
+    def progress(self, url: str, soup, done: int, total: int):
+        """Tells how many rows of a page the consumer has read, starting
+        the read-ahead once the threshold is passed
+
+        :param url: the url of the current page
+        :type url: str
+        :param soup: the soup of the current page
+        :param done: the number of rows read
+        :type done: int
+        :param total: the number of rows of the page
+        :type total: int
+        """
+        if (self._depth > 0 and self._advanced is not soup
+                and done >= self._threshold * total):
+            self._advanced = soup
+            self.prefetch(self._next_url(url, soup))
+
+    def prefetch(self, url: str):
+        """Starts loading a page in the background, unless `depth` pages
+        are already waiting to be read
+
+        :param url: the url of the page, or None
+        :type url: str
+        """
+        with self._lock:
+            if (self._closed or url is None or url in self._pages
+                    or len(self._pages) >= self._depth):
+                return
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(1)
+            self._pages[url] = self._executor.submit(self._load, url)
+
+    def _load(self, url: str):
+        soup = self._fetch(url)
+        self.prefetch(self._next_url(url, soup))
+        return soup
+
+    def close(self):
+        """Cancels the pages that are not fetched yet"""
+        with self._lock:
+            self._closed = True
+            pending = list(self._pages.values())
+            self._pages.clear()
+            executor, self._executor = self._executor, None
+        for future in pending:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
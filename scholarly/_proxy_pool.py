@@ -0,0 +1,297 @@
+"""Pool of proxies validated in the background and picked by health"""
+import concurrent.futures
+import random
+import threading
+import time
+from typing import Callable, Iterable
+
+
+class _ProxyHealth(object):
+    """Counters and state of a single proxy"""
+
+    def __init__(self, drawn: bool = False):
+        self.state = 'checking'
+        # Drawn from the source and not seen working yet
+        self.drawn = drawn
+        self.successes = 0
+        self.failures = 0
+        self.captchas = 0
+        self.latency = None
+        self.in_use = 0
+        # Failed attempts since the last success
+        self.failed = 0
+        # Quarantines since the last success, lengthening the next one
+        self.strikes = 0
+        self.until = 0.0
+
+    def score(self) -> float:
+        """Success rate, with CAPTCHAs counting double, divided by the
+        average latency"""
+        rate = ((self.successes + 1)
+                / (self.successes + self.failures + 2 * self.captchas + 2))
+        return rate / (1 + (self.latency or 0))
+
+
+class ProxyPool(object):
+    """Keeps a set of proxies, checks them concurrently in the background
+    and picks the proxy of every request weighted by its health.
+
+    Each proxy has a score built from its successes, failures, CAPTCHAs
+    and average latency, as reported by :meth:`release`. Proxies with
+    fewer requests in flight are picked first, so that concurrent requests
+    go through different proxies. A proxy that fails `max_failures` times
+    in a row, or that is served a CAPTCHA, is put in quarantine for
+    `quarantine` seconds, doubled at each new quarantine, after which it is
+    checked again in the background. A proxy that fails `max_strikes`
+    quarantines in a row is dropped.
+
+    When a `source` is given, new proxies are drawn from it in the
+    background whenever fewer than `size` proxies are working or being
+    checked. A drawn proxy that fails its first check is dropped, and the
+    source is given up after `max_bad_draws` draws in a row that raise,
+    return None, return a proxy of the pool or return a proxy that does
+    not work.
+    """
+
+    def __init__(self, check: Callable, proxies: Iterable[str] = (),
+                 source: Callable[..., str] = None, size: int = 8,
+                 workers: int = 8, max_failures: int = 3,
+                 quarantine: float = 300.0, max_strikes: int = 3,
+                 max_bad_draws: int = 10):
+        """
+        :param check: function telling whether a proxy works, given a
+                      dictionary {'http': url, 'https': url}
+        :type check: Callable
+        :param proxies: urls of the proxies to start with
+        :type proxies: Iterable[str]
+        :param source: function returning the url of a new proxy
+        :type source: Callable
+        :param size: number of proxies drawn from `source` and kept working
+        :type size: int
+        :param workers: number of proxies checked at the same time
+        :type workers: int
+        :param max_failures: failures in a row putting a proxy in quarantine
+        :type max_failures: int
+        :param quarantine: seconds of the first quarantine of a proxy
+        :type quarantine: float
+        :param max_strikes: failed quarantines after which a proxy is dropped
+        :type max_strikes: int
+        :param max_bad_draws: draws in a row without a new proxy after
+                              which the source is given up
+        :type max_bad_draws: int
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if max_failures < 1:
+            raise ValueError("max_failures must be at least 1")
+        self.check = check
+        self.source = source
+        self.size = size
+        self.max_failures = max_failures
+        self.quarantine = quarantine
+        self.max_strikes = max_strikes
+        self.max_bad_draws = max_bad_draws
+        self._proxies = {}
+        self._drawing = 0
+        self._bad_draws = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._executor = concurrent.futures.ThreadPoolExecutor(workers)
+        for proxy in proxies:
+            self.add(proxy)
+        with self._cond:
+            self._replenish()
+
+    def add(self, proxy: str):
+        """Adds a proxy, which can be picked once it has been checked
+
+        :param proxy: the url of the proxy
+        :type proxy: str
+        """
+        with self._cond:
+            if self._closed or proxy in self._proxies:
+                return
+            self._proxies[proxy] = _ProxyHealth()
+            self._executor.submit(self._probe, proxy)
+
+    def acquire(self, timeout: float = None) -> str:
+        """Picks the proxy of a request, waiting for one to be checked
+        if none is working yet. The proxy must be given back with
+        :meth:`release`.
+
+        Without a `timeout`, it only waits for the proxies being checked
+        or drawn, and with one also for the quarantines ending before it.
+
+        :param timeout: maximum seconds to wait, defaults to None
+        :type timeout: float
+        :returns: the url of the proxy
+        :rtype: {str}
+        :raises: Exception if no proxy works
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._reprobe()
+                active = [(p, h) for p, h in self._proxies.items()
+                          if h.state == 'active']
+                if active:
+                    # Requests in flight go through different proxies
+                    least = min(h.in_use for _, h in active)
+                    active = [(p, h) for p, h in active if h.in_use == least]
+                    weights = [h.score() for _, h in active]
+                    proxy, health = random.choices(active, weights)[0]
+                    health.in_use += 1
+                    return proxy
+                self._replenish()
+                if self._closed or not self._pending(deadline):
+                    raise Exception("No working proxy in the pool.")
+                wait = self._next_event()
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Exception("No working proxy in the pool.")
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+
+    def release(self, proxy: str, ok: bool, latency: float = None,
+                captcha: bool = False):
+        """Records the outcome of a request made through a proxy
+
+        :param proxy: the url of the proxy, as returned by :meth:`acquire`
+        :type proxy: str
+        :param ok: whether the page was fetched, or None when the request
+                   was not sent
+        :type ok: bool
+        :param latency: the seconds the request took
+        :type latency: float
+        :param captcha: whether a CAPTCHA was served
+        :type captcha: bool
+        """
+        with self._cond:
+            health = self._proxies.get(proxy)
+            if health is None:
+                return
+            health.in_use = max(health.in_use - 1, 0)
+            if ok is None:
+                return
+            if latency is not None:
+                health.latency = (latency if health.latency is None
+                                  else 0.8 * health.latency + 0.2 * latency)
+            if ok:
+                health.successes += 1
+                health.failed = 0
+                health.strikes = 0
+                return
+            if captcha:
+                health.captchas += 1
+            else:
+                health.failures += 1
+            health.failed += 1
+            if (health.state == 'active'
+                    and (captcha or health.failed >= self.max_failures)):
+                self._quarantine(proxy, health)
+
+    def stats(self) -> dict:
+        """Returns the state, score and counters of every proxy
+
+        :rtype: {dict}
+        """
+        with self._cond:
+            return {proxy: {'state': h.state, 'score': h.score(),
+                            'successes': h.successes, 'failures': h.failures,
+                            'captchas': h.captchas, 'latency': h.latency,
+                            'in_use': h.in_use}
+                    for proxy, h in self._proxies.items()}
+
+    def close(self):
+        """Stops checking proxies"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._executor.shutdown(wait=False)
+
+    def _probe(self, proxy: str):
+        try:
+            works = self.check({'http': proxy, 'https': proxy})
+        except Exception:
+            works = False
+        with self._cond:
+            health = self._proxies.get(proxy)
+            if health is None or health.state != 'checking':
+                return
+            if works:
+                health.state = 'active'
+                health.failed = 0
+                if health.drawn:
+                    health.drawn = False
+                    self._bad_draws = 0
+            elif health.drawn:
+                # The source gives dead proxies, which are not kept
+                del self._proxies[proxy]
+                self._bad_draws += 1
+                self._replenish()
+            else:
+                self._quarantine(proxy, health)
+            self._cond.notify_all()
+
+    def _quarantine(self, proxy: str, health: _ProxyHealth):
+        health.strikes += 1
+        if health.strikes > self.max_strikes:
+            del self._proxies[proxy]
+            self._replenish()
+            return
+        health.state = 'quarantined'
+        health.until = (time.monotonic()
+                        + self.quarantine * 2 ** (health.strikes - 1))
+        self._replenish()
+
+    def _reprobe(self):
+        """Checks again the proxies whose quarantine is over"""
+        now = time.monotonic()
+        for proxy, health in self._proxies.items():
+            if health.state == 'quarantined' and health.until <= now:
+                health.state = 'checking'
+                self._executor.submit(self._probe, proxy)
+
+    def _pending(self, deadline: float = None) -> bool:
+        """Tells whether a proxy may become active before the deadline:
+        a proxy is being drawn or checked, or its quarantine ends before
+        the deadline"""
+        return bool(self._drawing) or any(
+            h.state == 'checking'
+            or (h.state == 'quarantined' and deadline is not None
+                and h.until <= deadline)
+            for h in self._proxies.values())
+
+    def _next_event(self) -> float:
+        """Seconds until the end of the next quarantine, or None"""
+        ends = [h.until for h in self._proxies.values()
+                if h.state == 'quarantined']
+        if not ends:
+            return None
+        return max(min(ends) - time.monotonic(), 0)
+
+    def _replenish(self):
+        """Draws new proxies from the source until `size` proxies are
+        working or being checked"""
+        if (self.source is None or self._closed
+                or self._bad_draws >= self.max_bad_draws):
+            return
+        live = sum(h.state != 'quarantined' for h in self._proxies.values())
+        while live + self._drawing < self.size:
+            self._drawing += 1
+            self._executor.submit(self._draw)
+
+    def _draw(self):
+        try:
+            proxy = self.source()
+        except Exception:
+            proxy = None
+        with self._cond:
+            self._drawing -= 1
+            if proxy is None or self._closed or proxy in self._proxies:
+                self._bad_draws += 1
+                self._cond.notify_all()
+                return
+            self._proxies[proxy] = _ProxyHealth(drawn=True)
+        self._probe(proxy)
@@ -0,0 +1,121 @@
+"""Rate limiting of the requests sent to Google Scholar"""
+import random
+import threading
+import time
+
+
+class _TokenBucket(object):
+    """Token bucket of a single identity"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+
+class RateLimiter(object):
+    """Token bucket rate limiter, with one bucket per identity.
+
+    An identity is the proxy (or Tor instance) the requests go through, or
+    None for the local IP. Each bucket refills at `rate` requests per second
+    up to `burst` requests, so that a request made after an idle period
+    does not wait at all, while sustained crawling is held to `rate`.
+    A random `jitter` is added to every wait so that requests do not follow
+    a regular pattern.
+
+    In adaptive mode, the rate of an identity is divided by two every time
+    a CAPTCHA is served through it, down to `min_rate`, and grows back by
+    10% after every clean response until it reaches `rate` again.
+
+    The limiter is thread safe. Any object with the same `reserve`,
+    `on_captcha` and `on_success` methods can be used in its place.
+    """
+
+    def __init__(self, rate: float = 1 / 3, burst: int = 1,
+                 jitter: float = 1.0, adaptive: bool = False,
+                 min_rate: float = 1 / 60):
+        """
+        :param rate: sustained requests per second per identity
+        :type rate: float
+        :param burst: requests that can be sent without waiting after an
+                      idle period
+        :type burst: int
+        :param jitter: maximum random delay in seconds added to every wait
+        :type jitter: float
+        :param adaptive: back off when CAPTCHAs are served
+        :type adaptive: bool
+        :param min_rate: lowest rate the adaptive mode backs off to
+        :type min_rate: float
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        if jitter < 0:
+            raise ValueError("jitter must not be negative")
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.adaptive = adaptive
+        self.min_rate = min(min_rate, rate)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, identity: str) -> _TokenBucket:
+        bucket = self._buckets.get(identity)
+        if bucket is None:
+            bucket = self._buckets[identity] = _TokenBucket(self.rate,
+                                                            self.burst)
+        return bucket
+
+    def reserve(self, identity: str = None) -> float:
+        """Takes a token from the bucket of an identity and returns how long
+        the caller has to wait before sending its request
+
+        :param identity: the proxy the request goes through
+        :type identity: str
+        :returns: the delay in seconds
+        :rtype: {float}
+        """
+        with self._lock:
+            bucket = self._bucket(identity)
+            now = time.monotonic()
+            bucket.tokens = min(self.burst, bucket.tokens
+                                + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+            bucket.tokens -= 1
+            delay = max(0.0, -bucket.tokens / bucket.rate)
+        return delay + random.uniform(0, self.jitter)
+
+    def on_captcha(self, identity: str = None):
+        """Slows down an identity after it was served a CAPTCHA
+
+        :param identity: the proxy the request went through
+        :type identity: str
+        """
+        if not self.adaptive:
+            return
+        with self._lock:
+            bucket = self._bucket(identity)
+            bucket.rate = max(self.min_rate, bucket.rate / 2)
+            bucket.tokens = min(bucket.tokens, 0.0)
+
+    def on_success(self, identity: str = None):
+        """Speeds an identity back up after a clean response
+
+        :param identity: the proxy the request went through
+        :type identity: str
+        """
+        if not self.adaptive:
+            return
+        with self._lock:
+            bucket = self._bucket(identity)
+            bucket.rate = min(self.rate, bucket.rate * 1.1)
+
+    def get_rate(self, identity: str = None) -> float:
+        """Returns the current rate of an identity in requests per second
+
+        :rtype: {float}
+        """
+        with self._lock:
+            return self._bucket(identity).rate
@@ -1,7 +1,10 @@
 """scholarly.py"""
 import requests
-from typing import Callable
+from typing import Callable, Iterable
+from ._export import export
 from ._navigator import Navigator
+from ._ratelimit import RateLimiter
+from ._transport import HttpxTransport, ReplayTransport, RequestsTransport
 
 _AUTHSEARCH = '/citations?hl=en&view_op=search_authors&mauthors={0}'
 _KEYWORDSEARCH = '/citations?hl=en&view_op=search_authors&mauthors=label:{0}'
@@ -23,6 +26,263 @@ class _Scholarly:
 
         return self.__nav._set_retries(num_retries)
 
+    def set_cache(self, path: str, ttl: dict = None, max_size: int = None):
+        """Enables an on-disk cache of the pages fetched from Google Scholar.
+
+        Pages are keyed on their normalized url and expire after a time to
+        live that depends on the kind of page. When the cache grows larger
+        than `max_size`, the least recently used pages are evicted.
+        Passing ``None`` as `path` disables the cache.
+
+        :param path: the SQLite database file of the cache
+        :type path: str
+        :param ttl: time to live in seconds for each kind of page, among
+                    ``profile``, ``author_search``, ``search``,
+                    ``citation``, ``bibtex`` and ``other``,
+                    defaults to None
+        :type ttl: dict, optional
+        :param max_size: maximum size of the cache in bytes,
+                         defaults to 512MB
+        :type max_size: int, optional
+
+        :Example::
+
+            scholarly.set_cache('scholar_cache.sqlite', ttl={'search': 3600})
+        """
+        return self.__nav._set_cache(path, ttl, max_size)
+
+    def cache_stats(self):
+        """Returns the hits, misses, evictions, entries and size of the cache
+
+        :returns: the statistics of the cache, or None if it is disabled
+        :rtype: dict
+        """
+        if self.__nav._cache is None:
+            return None
+        return self.__nav._cache.stats()
+
+    def clear_cache(self):
+        """Removes all the pages stored in the cache"""
+        if self.__nav._cache is not None:
+            self.__nav._cache.clear()
+
+    def metrics(self):
+        """Returns the counters and latency histograms of the requests,
+        labelled by kind of page and proxy: requests by outcome, retries,
+        CAPTCHAs, bytes downloaded, cache hits and misses, and the
+        durations of the requests, of the politeness waits and of the
+        parsing. See :class:`scholarly._metrics.Metrics`.
+
+        :returns: the ``counters`` and ``histograms`` by name
+        :rtype: dict
+        """
+        return self.__nav._metrics.snapshot()
+
+    def export_metrics(self, format: str = 'prometheus'):
+        """Returns the metrics as text, to be served to a Prometheus
+        scraper or stored
+
+        :param format: ``prometheus`` or ``json``, defaults to
+                       ``prometheus``
+        :type format: str, optional
+        :rtype: str
+        """
+        if format == 'prometheus':
+            return self.__nav._metrics.to_prometheus()
+        if format == 'json':
+            return self.__nav._metrics.to_json()
+        raise ValueError(f"Unknown format {format}")
+
+    def reset_metrics(self):
+        """Sets the counters and histograms of the requests back to zero"""
+        self.__nav._metrics.reset()
+
+    def add_hook(self, event: str, hook: Callable):
+        """Registers a function called on the requests to Google Scholar.
+
+        The events are ``before_request``, ``after_response``,
+        ``on_captcha`` and ``on_retry``. The hook is called with the `url`
+        and `proxy` of the request as keyword arguments, plus `status`,
+        `seconds` and `size` after a response, and `attempt` and `reason`
+        before a retry, so it should accept ``**kwargs``.
+
+        :param event: the event
+        :type event: str
+        :param hook: the function to call
+        :type hook: Callable
+
+        :Example::
+
+            def slow(url, proxy, seconds, **kwargs):
+                if seconds > 5:
+                    print(f"{proxy} took {seconds:.1f}s for {url}")
+
+            scholarly.add_hook('after_response', slow)
+        """
+        return self.__nav._metrics.add_hook(event, hook)
+
+    def remove_hook(self, event: str, hook: Callable):
+        """Unregisters a function added with :meth:`add_hook`
+
+        :param event: the event
+        :type event: str
+        :param hook: the function
+        :type hook: Callable
+        """
+        return self.__nav._metrics.remove_hook(event, hook)
+
+    def set_parser(self, parser: str):
+        """Sets the parser used to read the pages of Google Scholar.
+
+        The pages are parsed with ``html.parser`` until another parser is
+        set. It is written in pure Python. ``lxml`` parses the pages
+        several times faster, and gives the same results; it requires the
+        `lxml` package, installed by ``pip install scholarly[lxml]``.
+        ``html5lib`` is also supported.
+
+        :param parser: ``html.parser``, ``lxml`` or ``html5lib``
+        :type parser: str
+
+        :Example::
+
+            scholarly.set_parser('lxml')
+        """
+        return self.__nav._set_parser(parser)
+
+    def set_parse_workers(self, workers: int = None):
+        """Parses the pages of Google Scholar in a pool of processes.
+
+        The text of the pages of search results and of profiles is sent to
+        worker processes, which extract the publications and authors and
+        send back plain records, so that parsing runs on several cores
+        while other requests are in flight. The pages are still parsed
+        with the parser of :meth:`set_parser`. The workers are spawned
+        with :mod:`multiprocessing`, so the main module of a script using
+        them must be guarded by ``if __name__ == '__main__':``.
+
+        :param workers: number of processes, defaults to the number of
+                        processors, 0 to parse the pages in the thread
+                        that fetched them
+        :type workers: int, optional
+
+        :Example::
+
+            scholarly.set_parse_workers(4)
+        """
+        return self.__nav._set_parse_pool(workers)
+
+    def set_prefetch(self, depth: int = 1, threshold: float = 0.5):
+        """Reads the next pages of results ahead in the background.
+
+        When iterating over the results of :meth:`search_pubs` or
+        :meth:`search_author`, the next page starts loading once
+        `threshold` of the current page has been consumed, so that the
+        iteration does not stall at the end of every page. The following
+        pages of publications of :meth:`Author.fill` are also fetched while
+        the current one is parsed. Stopping an iteration early cancels the
+        pages that are not fetched yet. A `depth` of 0 disables read-ahead.
+
+        :param depth: maximum number of pages fetched ahead, defaults to 1
+        :type depth: int, optional
+        :param threshold: fraction of the current page after which the next
+                          one starts loading, defaults to 0.5
+        :type threshold: float, optional
+        """
+        return self.__nav._set_prefetch(depth, threshold)
+
+    def set_rate_limit(self, rate: float = 1 / 3, burst: int = 1,
+                       jitter: float = 1.0, adaptive: bool = False):
+        """Configures how fast requests are sent to Google Scholar.
+
+        Each proxy or Tor identity, and the local IP, has its own token
+        bucket refilling at `rate` requests per second. After an idle
+        period up to `burst` requests go out without waiting. In adaptive
+        mode the rate of an identity is halved whenever it is served a
+        CAPTCHA and recovers after clean responses.
+
+        :param rate: sustained requests per second per identity,
+                     defaults to one request every 3 seconds
+        :type rate: float, optional
+        :param burst: requests sent without waiting after an idle period,
+                      defaults to 1
+        :type burst: int, optional
+        :param jitter: maximum random delay in seconds added to every
+                       request, defaults to 1
+        :type jitter: float, optional
+        :param adaptive: whether to back off on CAPTCHAs, defaults to False
+        :type adaptive: bool, optional
+
+        :Example::
+
+            scholarly.set_rate_limit(rate=0.5, burst=3, adaptive=True)
+        """
+        return self.__nav._set_rate_limiter(
+            RateLimiter(rate, burst, jitter, adaptive))
+
+    def set_rate_limiter(self, limiter):
+        """Sets a custom rate limiter.
+
+        :param limiter: an object with the `reserve(identity)`,
+                        `on_captcha(identity)` and `on_success(identity)`
+                        methods of :class:`scholarly._ratelimit.RateLimiter`,
+                        where `reserve` returns the seconds to wait before
+                        the request
+        """
+        return self.__nav._set_rate_limiter(limiter)
+
+    def set_session_pool(self, size: int = 4, idle_timeout: float = 60.0):
+        """Configures the pool of keep-alive HTTP sessions.
+
+        Connections to Google Scholar are reused across requests that go
+        through the same proxy, which saves a TCP and TLS handshake per
+        request. The sessions of a proxy are closed when it is replaced or
+        when its Tor identity is refreshed. It sets the ``requests``
+        transport back if another one was set with :meth:`set_transport`.
+
+        :param size: maximum number of idle sessions kept per proxy,
+                     0 disables the reuse of connections, defaults to 4
+        :type size: int, optional
+        :param idle_timeout: seconds after which an idle session is closed,
+                             defaults to 60
+        :type idle_timeout: float, optional
+        """
+        return self.__nav._set_session_pool(size, idle_timeout)
+
+    def set_transport(self, transport='requests', **kwargs):
+        """Sets how the requests are sent to Google Scholar.
+
+        * ``requests``: the default, with keep-alive sessions per proxy,
+          see :meth:`set_session_pool` for the arguments;
+        * ``httpx``: a connection pool per proxy and optionally HTTP/2
+          (``http2=True``), which requires the `httpx` package;
+        * ``replay``: the pages saved in `directory` are served without
+          the network. With ``mode='record'`` the pages are fetched and
+          saved, and with ``mode='auto'`` only the pages that are not
+          saved yet are fetched. CAPTCHAs are not saved.
+
+        A :class:`scholarly._transport.Transport` object can be passed
+        instead of a name.
+
+        :param transport: ``requests``, ``httpx``, ``replay`` or a
+                          transport, defaults to ``requests``
+
+        :Example::
+
+            scholarly.set_transport('replay', directory='pages', mode='record')
+            author = scholarly.get_author('4bahYMkAAAAJ').fill()
+            # Later, without the network
+            scholarly.set_transport('replay', directory='pages')
+            author = scholarly.get_author('4bahYMkAAAAJ').fill()
+        """
+        transports = {'requests': RequestsTransport,
+                      'httpx': HttpxTransport,
+                      'replay': ReplayTransport}
+        if isinstance(transport, str):
+            if transport not in transports:
+                raise ValueError(f"Unknown transport {transport}")
+            transport = transports[transport](**kwargs)
+        return self.__nav._set_transport(transport)
+
     def use_proxy(self, http: str, https: str):
         """Setups a proxy without refreshing capabilities.
 
@@ -42,6 +302,73 @@ class _Scholarly:
 
         return self.__nav._set_proxy_generator(gen)
 
+    def set_proxy_pool(self, proxies: Iterable[str] = None,
+                       gen: Callable[..., str] = None, size: int = 8,
+                       workers: int = 8, max_failures: int = 3,
+                       quarantine: float = 300.0):
+        """Spreads the requests over a pool of proxies.
+
+        The proxies are checked concurrently in the background, and every
+        request goes through a working proxy picked at random, weighted by
+        its rate of success and its latency. Concurrent requests go through
+        different proxies. A proxy that fails `max_failures` times in a row
+        or gets a CAPTCHA is put in quarantine, and checked again once the
+        quarantine is over. When `gen` is given, new proxies are drawn from
+        it to keep `size` proxies working. Calling it without `proxies`
+        nor `gen` removes the pool.
+
+        :param proxies: urls of the proxies, defaults to None
+        :type proxies: Iterable[str], optional
+        :param gen: the function to call to obtain a new proxy,
+                    defaults to None
+        :type gen: Callable, optional
+        :param size: number of working proxies kept drawn from `gen`,
+                     defaults to 8
+        :type size: int, optional
+        :param workers: number of proxies checked at the same time,
+                        defaults to 8
+        :type workers: int, optional
+        :param max_failures: failures in a row putting a proxy in
+                             quarantine, defaults to 3
+        :type max_failures: int, optional
+        :param quarantine: seconds of the first quarantine of a proxy,
+                           doubled at each new quarantine, defaults to 300
+        :type quarantine: float, optional
+
+        :Example::
+
+            scholarly.set_proxy_pool(['http://10.0.0.1:3128',
+                                      'http://10.0.0.2:3128'])
+        """
+        return self.__nav._set_proxy_pool(proxies and list(proxies), gen,
+                                          size, workers, max_failures,
+                                          quarantine)
+
+    def proxy_stats(self):
+        """Returns the state, score and counters of the proxies of the pool
+
+        :returns: the statistics of every proxy keyed by its url, or None
+                  if no pool is set
+        :rtype: dict
+        """
+        if self.__nav._proxy_pool is None:
+            return None
+        return self.__nav._proxy_pool.stats()
+
+    def tor_stats(self):
+        """Returns the statistics of the renewals of the Tor circuits: the
+        number of renewals, of refresh requests coalesced into another
+        one and of failed renewals, and the mean, maximum and last
+        durations in seconds. The statistics of the processes launched
+        with a `pool_size` are given by :meth:`proxy_stats`.
+
+        :returns: the statistics, or None if Tor is not used
+        :rtype: dict
+        """
+        if self.__nav._tor_controller is None:
+            return None
+        return self.__nav._tor_controller.stats()
+
     def use_tor(self, tor_sock_port: int, tor_control_port: int, tor_pw: str):
         """[summary]
 
@@ -61,30 +388,49 @@ class _Scholarly:
         return self.__nav._setup_tor(tor_sock_port, tor_control_port, tor_pw)
 
     def launch_tor(self,
-                   tor_path: str, tor_sock_port: int, tor_control_port: int):
+                   tor_path: str, tor_sock_port: int = None,
+                   tor_control_port: int = None, pool_size: int = 1):
         """
         Launches a temporary Tor connector to be used by scholarly.
 
         This method requires the absolute path to a Tor executable file,
         or that the executable is in the PATH.
 
+        With a `pool_size` above 1, that many Tor processes are started,
+        each with its own data directory, ports and exit identity. The
+        requests are spread over them, and the circuits of a process are
+        renewed when a request through it fails while the others keep
+        serving. The processes are stopped when scholarly exits.
+
+        Process `i` of a pool listens on ``tor_sock_port + 2*i`` and
+        ``tor_control_port + 2*i``, and the pool is not started if these
+        ports overlap or if one of its processes fails to start.
+
         :param tor_path: Absolute path to the local Tor binary
         :type tor_path: str
-        :param tor_sock_port: Tor sock proxy port.
-        :type tor_sock_port: int
-        :param tor_control_port: Tor controller port.
-        :type tor_control_port: int
+        :param tor_sock_port: Tor sock proxy port, or the port of the first
+                              process of a pool, defaults to a random port
+        :type tor_sock_port: int, optional
+        :param tor_control_port: Tor controller port, or the port of the
+                                 first process of a pool, defaults to a
+                                 random port
+        :type tor_control_port: int, optional
+        :param pool_size: number of Tor processes, defaults to 1
+        :type pool_size: int, optional
 
         :Example::
 
             scholarly.launch_tor('/usr/bin/tor')
+            scholarly.launch_tor('/usr/bin/tor', pool_size=4)
         """
-        return self.__nav._launch_tor(tor_path, tor_sock_port, tor_control_port)
+        return self.__nav._launch_tor(tor_path, tor_sock_port,
+                                      tor_control_port, pool_size)
 
     def search_pubs(self,
                     query: str, patents: bool = True,
                     citations: bool = True, year_low: int = None,
-                    year_high: int = None):
+                    year_high: int = None, checkpoint: str = None,
+                    checkpoint_every: int = 10):
         """Searches by query and returns a generator of Publication objects
 
         [description]
@@ -98,6 +444,13 @@ class _Scholarly:
         :type year_low: int, optional
         :param year_high: maximum year of publication, defaults to None
         :type year_high: int, optional
+        :param checkpoint: journal file where the progress of the search is
+                           recorded; if it exists, the search resumes where
+                           it stopped, defaults to None
+        :type checkpoint: str, optional
+        :param checkpoint_every: number of results between two writes of the
+                                 journal, defaults to 10
+        :type checkpoint_every: int, optional
         :returns: Generator of Publication objects
         :rtype: Iterator[:class:`Publication`]
 
@@ -141,6 +494,34 @@ class _Scholarly:
                 }
 
         """
+        url = self._construct_pubs_url(query, patents, citations,
+                                       year_low, year_high)
+        return self.__nav.search_publications(url, checkpoint,
+                                              checkpoint_every)
+
+    def asearch_pubs(self,
+                     query: str, patents: bool = True,
+                     citations: bool = True, year_low: int = None,
+                     year_high: int = None):
+        """Async version of :meth:`search_pubs`, returning an async iterator
+        of Publication objects
+
+        Several searches and fills can run concurrently in the same event
+        loop, each request keeping the politeness delay of its proxy.
+
+        :Example::
+
+            async def titles(query):
+                return [pub.bib['title'] async for pub in scholarly.asearch_pubs(query)]
+
+            asyncio.run(titles('naive physics'))
+        """
+        url = self._construct_pubs_url(query, patents, citations,
+                                       year_low, year_high)
+        return self.__nav.asearch_publications(url)
+
+    def _construct_pubs_url(self, query: str, patents: bool, citations: bool,
+                            year_low: int, year_high: int) -> str:
         url = _PUBSEARCH.format(requests.utils.quote(query))
 
         yr_lo = '&as_ylo={0}'.format(year_low) if year_low is not None else ''
@@ -148,21 +529,210 @@ class _Scholarly:
         citations = '&as_vis={0}'.format(1 - int(citations))
         patents = '&as_sdt={0},33'.format(1 - int(patents))
         # improve str below
-        url = url + yr_lo + yr_hi + citations + patents
-        return self.__nav.search_publications(url)
+        return url + yr_lo + yr_hi + citations + patents
 
     def search_single_pub(self, pub_title: str, filled: bool = False):
         """Search by scholar query and return a single Publication object"""
         url = _PUBSEARCH.format(requests.utils.quote(pub_title))
         return self.__nav.search_publication(url, filled)
 
+    def resolve_bibtex(self, pubs: Iterable, concurrency: int = 4):
+        """Reads the bibtex links of many search results at once.
+
+        The link to the bibtex entry of a search result is in its cite
+        popup, which costs one request. It is only fetched when
+        ``url_scholarbib`` is read, by :meth:`Publication.resolve_bibtex`,
+        :meth:`Publication.fill` or :attr:`Publication.bibtex`, so that
+        iterating over a search costs one request per page of results.
+        Reading the attribute itself also makes the request, whose failure
+        is then an ``AttributeError``. This fetches the popups of many
+        publications with at most `concurrency` requests in flight, through
+        the cache, before filling them.
+
+        :param pubs: the publications returned by :meth:`search_pubs`
+        :type pubs: Iterable[Publication]
+        :param concurrency: maximum number of popups fetched at the same
+                            time, defaults to 4
+        :type concurrency: int, optional
+        :returns: the ``(publication, exception)`` pairs of the
+                  publications whose popup could not be fetched
+        :rtype: list
+
+        :Example::
+
+            pubs = list(itertools.islice(scholarly.search_pubs('naive physics'), 20))
+            scholarly.resolve_bibtex(pubs, concurrency=8)
+            for pub in pubs:
+                print(pub.url_scholarbib)
+        """
+        return self.__nav.resolve_bibtex(pubs, concurrency)
+
     def get_author(self, id: str):
         """Obtain a single autor by Scholar Id"""
         return self.__nav.get_author(id)
 
-    def search_author(self, name: str):
+    def get_authors(self, ids: Iterable[str], sections: list = [],
+                    concurrency: int = 4):
+        """Fills many authors by Scholar Id concurrently, and returns a
+        generator of the authors as they are filled.
+
+        Duplicate ids are filled once, and at most `concurrency` authors
+        are filled at the same time, each request keeping the politeness
+        delay of its proxy. An author that cannot be filled is reported
+        with its exception without stopping the others.
+
+        :param ids: the Scholar Ids of the authors
+        :type ids: Iterable[str]
+        :param sections: the sections to fill, see :meth:`Author.fill`,
+                         defaults to all of them
+        :type sections: list, optional
+        :param concurrency: maximum number of authors filled at the same
+                            time, defaults to 4
+        :type concurrency: int, optional
+        :returns: ``(id, author, error)`` tuples, with `author` None and
+                  `error` the exception if the author could not be filled
+
+        :Example::
+
+            for id, author, error in scholarly.get_authors(ids, sections=['basics', 'indices'],
+                                                           concurrency=8):
+                if error is not None:
+                    print(f"Could not fill {id}: {error}")
+                else:
+                    print(author.name, author.hindex)
+        """
+        return self.__nav.get_authors(ids, sections, concurrency)
+
+    def crawl_coauthors(self, ids: Iterable[str], sink, max_depth: int = 2,
+                        max_nodes: int = 1000,
+                        sections: list = ['basics', 'indices'],
+                        concurrency: int = 4, checkpoint: str = None,
+                        checkpoint_every: int = 10,
+                        compression: str = None):
+        """Crawls the coauthor graph breadth-first from seed authors, and
+        streams its nodes and edges to a JSONL file.
+
+        Every author is filled once, however many coauthors list them, with
+        at most `concurrency` authors filled at the same time. The crawl
+        stops after `max_depth` hops from the seeds or once `max_nodes`
+        authors were found. Each author is written as an export row with
+        its `depth`, and each coauthor it lists that is part of the crawl
+        as a ``{"type": "edge", "source": ..., "target": ...}`` line.
+
+        With a `checkpoint` file, an interrupted crawl started again with
+        the same seeds resumes where it stopped, appending to the file, and
+        retries the authors that could not be filled.
+
+        :param ids: the Scholar Ids of the seed authors
+        :type ids: Iterable[str]
+        :param sink: the JSONL file to write, or an object with the `node`
+                     and `edge` methods of
+                     :class:`scholarly._crawler.GraphSink`
+        :param max_depth: number of coauthor hops from the seeds, defaults
+                          to 2
+        :type max_depth: int, optional
+        :param max_nodes: maximum number of authors crawled, defaults to 1000
+        :type max_nodes: int, optional
+        :param sections: the sections filled besides ``coauthors``, see
+                         :meth:`Author.fill`, defaults to ``['basics',
+                         'indices']``
+        :type sections: list, optional
+        :param concurrency: maximum number of authors filled at the same
+                            time, defaults to 4
+        :type concurrency: int, optional
+        :param checkpoint: file of the state of the crawl, defaults to None
+        :type checkpoint: str, optional
+        :param checkpoint_every: number of authors between two writes of
+                                 the checkpoint, defaults to 10
+        :type checkpoint_every: int, optional
+        :param compression: None, ``gzip`` or ``zstd``, defaults to None
+        :type compression: str, optional
+        :returns: the number of ``nodes`` and ``edges`` written, and the
+                  ``(id, error)`` pairs of the authors that failed in
+                  ``failures``
+        :rtype: {dict}
+
+        :Example::
+
+            stats = scholarly.crawl_coauthors(['4bahYMkAAAAJ'], 'graph.jsonl',
+                                              max_depth=2, max_nodes=5000,
+                                              concurrency=8, checkpoint='graph.json')
+            print(stats['nodes'], stats['edges'])
+        """
+        return self.__nav.crawl_coauthors(ids, sink, max_depth, max_nodes,
+                                          sections, concurrency, checkpoint,
+                                          checkpoint_every, compression)
+
+    def crawl_citations(self, pubs: Iterable, sink, max_depth: int = 2,
+                        max_nodes: int = 1000, max_citing: int = 100,
+                        concurrency: int = 4, checkpoint: str = None,
+                        checkpoint_every: int = 10, compression: str = None):
+        """Crawls the citation graph breadth-first from seed publications,
+        following their ``Cited by`` links, and streams its nodes and edges
+        to a JSONL file.
+
+        Papers are identified by their Scholar cluster id, ``cid``, so a
+        paper cited by several publications of the crawl is written and
+        searched once. At most `max_citing` citing papers are read per
+        publication, and at most `concurrency` citation searches run at the
+        same time. Each paper is written as an export row with its `depth`,
+        and each citation between papers of the crawl as a ``{"type":
+        "edge", "source": citing, "target": cited}`` line.
+
+        With a `checkpoint` file, an interrupted crawl started again with
+        the same seeds resumes where it stopped, appending to the file.
+
+        :param pubs: the seed publications, returned by :meth:`search_pubs`
+        :type pubs: Iterable[Publication]
+        :param sink: the JSONL file to write, or an object with the `node`
+                     and `edge` methods of
+                     :class:`scholarly._crawler.GraphSink`
+        :param max_depth: number of citation hops from the seeds, defaults
+                          to 2
+        :type max_depth: int, optional
+        :param max_nodes: maximum number of publications crawled, defaults
+                          to 1000
+        :type max_nodes: int, optional
+        :param max_citing: maximum number of citing papers read per
+                           publication, defaults to 100
+        :type max_citing: int, optional
+        :param concurrency: maximum number of citation searches at the same
+                            time, defaults to 4
+        :type concurrency: int, optional
+        :param checkpoint: file of the state of the crawl, defaults to None
+        :type checkpoint: str, optional
+        :param checkpoint_every: number of publications between two writes
+                                 of the checkpoint, defaults to 10
+        :type checkpoint_every: int, optional
+        :param compression: None, ``gzip`` or ``zstd``, defaults to None
+        :type compression: str, optional
+        :returns: the number of ``nodes`` and ``edges`` written, and the
+                  ``(cid, error)`` pairs of the publications that failed in
+                  ``failures``
+        :rtype: {dict}
+
+        :Example::
+
+            seed = next(scholarly.search_pubs('Perception of physical stability and center of mass of 3D objects'))
+            scholarly.crawl_citations([seed], 'citations.jsonl', max_depth=2,
+                                      max_citing=50, checkpoint='citations.json')
+        """
+        return self.__nav.crawl_citations(pubs, sink, max_depth, max_nodes,
+                                          max_citing, concurrency, checkpoint,
+                                          checkpoint_every, compression)
+
+    def search_author(self, name: str, checkpoint: str = None,
+                      checkpoint_every: int = 10):
         """Search by author name and return a generator of Author objects
 
+        :param checkpoint: journal file where the progress of the search is
+                           recorded; if it exists, the search resumes where
+                           it stopped, defaults to None
+        :type checkpoint: str, optional
+        :param checkpoint_every: number of results between two writes of the
+                                 journal, defaults to 10
+        :type checkpoint_every: int, optional
+
         :Example::
 
             .. testcode::
@@ -186,11 +756,33 @@ class _Scholarly:
                 }
         """
         url = _AUTHSEARCH.format(requests.utils.quote(name))
-        return self.__nav.search_authors(url)
+        return self.__nav.search_authors(url, checkpoint, checkpoint_every)
 
-    def search_keyword(self, keyword: str):
+    def asearch_author(self, name: str):
+        """Async version of :meth:`search_author`, returning an async
+        generator of Author objects
+
+        :Example::
+
+            async def first_author(name):
+                async for author in scholarly.asearch_author(name):
+                    return await author.afill()
+        """
+        url = _AUTHSEARCH.format(requests.utils.quote(name))
+        return self.__nav.asearch_authors(url)
+
+    def search_keyword(self, keyword: str, checkpoint: str = None,
+                       checkpoint_every: int = 10):
         """Search by keyword and return a generator of Author objects
 
+        :param checkpoint: journal file where the progress of the search is
+                           recorded; if it exists, the search resumes where
+                           it stopped, defaults to None
+        :type checkpoint: str, optional
+        :param checkpoint_every: number of results between two writes of the
+                                 journal, defaults to 10
+        :type checkpoint_every: int, optional
+
         :Example::
 
             .. testcode::
@@ -217,14 +809,53 @@ class _Scholarly:
                 }
         """
         url = _KEYWORDSEARCH.format(requests.utils.quote(keyword))
-        return self.__nav.search_authors(url)
+        return self.__nav.search_authors(url, checkpoint, checkpoint_every)
 
-    def search_pubs_custom_url(self, url: str):
+    def asearch_keyword(self, keyword: str):
+        """Async version of :meth:`search_keyword`, returning an async
+        generator of Author objects"""
+        url = _KEYWORDSEARCH.format(requests.utils.quote(keyword))
+        return self.__nav.asearch_authors(url)
+
+    def search_pubs_custom_url(self, url: str, checkpoint: str = None,
+                               checkpoint_every: int = 10):
         """Search by custom URL and return a generator of Publication objects
         URL should be of the form '/scholar?q=...'"""
-        return self.__nav.search_publications(url)
+        return self.__nav.search_publications(url, checkpoint,
+                                              checkpoint_every)
 
-    def search_author_custom_url(self, url: str):
+    def search_author_custom_url(self, url: str, checkpoint: str = None,
+                                 checkpoint_every: int = 10):
         """Search by custom URL and return a generator of Author objects
         URL should be of the form '/citation?q=...'"""
-        return self.__nav.search_authors(url)
+        return self.__nav.search_authors(url, checkpoint, checkpoint_every)
+
+    def export(self, items: Iterable, path: str, format: str = 'jsonl',
+               compression: str = None, flush_every: int = 1):
+        """Writes authors or publications to a JSONL or CSV file as they
+        are produced, with a stable schema.
+
+        Items are written one at a time as the generator yields them, so
+        long crawls run in constant memory, and the file is flushed every
+        `flush_every` items, so that partial output is kept if the crawl
+        is interrupted.
+
+        :param items: Publication or Author objects, or their records
+        :type items: Iterable
+        :param path: the file to write
+        :type path: str
+        :param format: ``jsonl`` or ``csv``, defaults to ``jsonl``
+        :type format: str, optional
+        :param compression: None, ``gzip`` or ``zstd``, defaults to None
+        :type compression: str, optional
+        :param flush_every: number of items between flushes, defaults to 1
+        :type flush_every: int, optional
+        :returns: the number of items written
+        :rtype: int
+
+        :Example::
+
+            scholarly.export(scholarly.search_pubs('naive physics'),
+                             'naive_physics.jsonl.gz', compression='gzip')
+        """
+        return export(items, path, format, compression, flush_every)
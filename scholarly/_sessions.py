@@ -0,0 +1,115 @@
+"""Pool of keep-alive HTTP sessions, keyed by proxy"""
+import threading
+import time
+import requests
+
+
+class SessionPool(object):
+    """Keeps idle `requests` sessions around so that their connections are
+    reused by the next requests going through the same proxy.
+
+    Opening a connection through Tor or a SOCKS proxy can take seconds, so
+    reusing it saves the TCP and TLS handshakes of every request. Sessions
+    that stay idle longer than `idle_timeout` seconds are closed, and all
+    the sessions of a proxy are torn down with :meth:`discard` when the
+    proxy is rotated or its Tor circuit is renewed.
+    """
+
+    def __init__(self, size: int = 4, idle_timeout: float = 60.0):
+        """
+        :param size: maximum number of idle sessions kept per proxy
+        :type size: int
+        :param idle_timeout: seconds after which an idle session is closed
+        :type idle_timeout: float
+        """
+        if size < 0:
+            raise ValueError("size must not be negative")
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._idle = {}
+        self._generation = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(proxies: dict) -> str:
+        if not proxies:
+            return None
+        return proxies.get('https') or proxies.get('http')
+
+    def acquire(self, proxies: dict = None) -> requests.Session:
+        """Returns an idle session for the proxy, or a new one
+
+        :param proxies: A dictionary {'http': url1, 'https': url1}
+                        with the urls of the proxies, or None
+        :type proxies: dict
+        :rtype: {requests.Session}
+        """
+        key = self._key(proxies)
+        session = None
+        with self._lock:
+            self._evict_idle()
+            idle = self._idle.get(key)
+            if idle:
+                session = idle.pop()[0]
+            generation = self._generation.get(key, 0)
+        if session is None:
+            session = requests.Session()
+            if proxies:
+                session.proxies = dict(proxies)
+        # Requests of the same session must not share cookies
+        session.cookies.clear()
+        session._scholarly_generation = generation
+        return session
+
+    def release(self, proxies: dict, session: requests.Session,
+                discard: bool = False):
+        """Gives a session back to the pool once a request is done
+
+        :param proxies: the proxies the session was acquired for
+        :type proxies: dict
+        :param session: the session
+        :type session: requests.Session
+        :param discard: close the session instead of keeping it, e.g.
+                        after a connection error, defaults to False
+        :type discard: bool, optional
+        """
+        key = self._key(proxies)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if (not discard
+                    and session._scholarly_generation == self._generation.get(key, 0)
+                    and len(idle) < self.size):
+                idle.append((session, time.monotonic()))
+                return
+        session.close()
+
+    def discard(self, proxies: dict = None):
+        """Closes the sessions of a proxy, including the ones in use when
+        they are released
+
+        :param proxies: the proxies whose sessions are closed
+        :type proxies: dict
+        """
+        key = self._key(proxies)
+        with self._lock:
+            self._generation[key] = self._generation.get(key, 0) + 1
+            idle = self._idle.pop(key, [])
+        for session, _ in idle:
+            session.close()
+
+    def close(self):
+        """Closes every idle session"""
+        with self._lock:
+            idle = [s for sessions in self._idle.values() for s, _ in sessions]
+            self._idle = {}
+        for session in idle:
+            session.close()
+
+    def _evict_idle(self):
+        deadline = time.monotonic() - self.idle_timeout
+        for key, idle in self._idle.items():
+            expired = [s for s, last_used in idle if last_used < deadline]
+            if expired:
+                self._idle[key] = [(s, t) for s, t in idle if t >= deadline]
+                for session in expired:
+                    session.close()
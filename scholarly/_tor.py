@@ -0,0 +1,450 @@
+"""Tor processes owned by scholarly and the control of their circuits"""
+import collections
+import concurrent.futures
+import itertools
+import logging
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from typing import Callable
+import stem.process
+from stem import CircStatus, Signal
+from stem.control import Controller, EventType
+
+logger = logging.getLogger('scholarly')
+
+
+def _free_port() -> int:
+    """Returns a local port that no process listens on"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class TorController(object):
+    """Keeps one authenticated connection to the control port of a Tor
+    process, and renews its circuits on demand.
+
+    Concurrent calls to :meth:`refresh` are coalesced: while a NEWNYM is
+    in progress, the other callers wait for it and share its outcome, and
+    a caller whose failed request was sent before the last renewal does not
+    trigger another one. The NEWNYM rate limit of Tor is respected, and
+    instead of sleeping for a fixed time the refresh returns as soon as Tor
+    reports a newly built circuit, or fails after `timeout` seconds.
+    """
+
+    def __init__(self, port: int, password: str = None,
+                 timeout: float = 10.0):
+        """
+        :param port: the control port
+        :type port: int
+        :param password: the password of the control server
+        :type password: str
+        :param timeout: maximum seconds to wait for a new circuit
+        :type timeout: float
+        """
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.refreshes = 0
+        self.coalesced = 0
+        self.failures = 0
+        self._controller = None
+        self._built = 0
+        self._refreshing = False
+        self._result = False
+        # Time of the last renewal, and number of renewals so far
+        self._renewed_at = None
+        self._generation = 0
+        self._latencies = collections.deque(maxlen=100)
+        self._cond = threading.Condition()
+
+    def _connect(self) -> Controller:
+        if self._controller is None or not self._controller.is_alive():
+            controller = Controller.from_port(port=self.port)
+            try:
+                if self.password:
+                    controller.authenticate(password=self.password)
+                else:
+                    controller.authenticate()
+                controller.add_event_listener(self._on_circuit,
+                                              EventType.CIRC)
+            except Exception:
+                controller.close()
+                raise
+            self._controller = controller
+        return self._controller
+
+    def _on_circuit(self, event):
+        if event.status == CircStatus.BUILT:
+            with self._cond:
+                self._built += 1
+                self._cond.notify_all()
+
+    def refresh(self, since: float = None) -> bool:
+        """Asks Tor for new circuits and waits for one to be built
+
+        :param since: the `time.monotonic()` at which the failed request was
+                      sent. If the circuits were renewed after it, nothing
+                      is done.
+        :type since: float
+        :returns: whether the circuits were renewed
+        :rtype: {bool}
+        """
+        with self._cond:
+            if (since is not None and self._renewed_at is not None
+                    and self._renewed_at >= since):
+                self.coalesced += 1
+                return True
+            if self._refreshing:
+                self.coalesced += 1
+                generation = self._generation
+                while self._generation == generation:
+                    self._cond.wait()
+                return self._result
+            self._refreshing = True
+        result = self._newnym()
+        with self._cond:
+            self._refreshing = False
+            self._result = result
+            self._generation += 1
+            if result:
+                self._renewed_at = time.monotonic()
+            self._cond.notify_all()
+        return result
+
+    def _newnym(self) -> bool:
+        start = time.monotonic()
+        try:
+            controller = self._connect()
+            # Tor ignores a NEWNYM sent too soon after the previous one
+            time.sleep(controller.get_newnym_wait())
+            with self._cond:
+                built = self._built
+            controller.signal(Signal.NEWNYM)
+            deadline = time.monotonic() + self.timeout
+            with self._cond:
+                while self._built == built:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        logger.info("No new Tor circuit after "
+                                    f"{self.timeout}s on port {self.port}")
+                        self.failures += 1
+                        return False
+                    self._cond.wait(remaining)
+                self.refreshes += 1
+                self._latencies.append(time.monotonic() - start)
+            return True
+        except Exception as e:
+            logger.info(f"Exception {e} while refreshing Tor on port "
+                        f"{self.port}")
+            with self._cond:
+                self.failures += 1
+            self.close()
+            return False
+
+    def stats(self) -> dict:
+        """Returns the number of renewals, of coalesced requests and of
+        failed renewals, and the mean, maximum and last durations of the last 100
+        renewals in seconds
+
+        :rtype: {dict}
+        """
+        with self._cond:
+            latencies = list(self._latencies)
+            return {'refreshes': self.refreshes,
+                    'coalesced': self.coalesced,
+                    'refresh_failures': self.failures,
+                    'latency_mean': (sum(latencies) / len(latencies)
+                                     if latencies else None),
+                    'latency_max': max(latencies, default=None),
+                    'latency_last': latencies[-1] if latencies else None}
+
+    def close(self):
+        """Closes the control connection"""
+        controller, self._controller = self._controller, None
+        if controller is not None:
+            controller.close()
+
+
+class TorInstance(object):
+    """A Tor process with its own data directory, SOCKS port and control
+    port, and so its own circuits and exit identity"""
+
+    def __init__(self, process, socks_port: int, control_port: int,
+                 data_dir: str = None, password: str = None):
+        """
+        :param process: the Tor process, or None if it is not owned
+        :param socks_port: the port of the SOCKS proxy
+        :type socks_port: int
+        :param control_port: the port of the control server
+        :type control_port: int
+        :param data_dir: the data directory, removed on :meth:`close`
+        :type data_dir: str
+        :param password: the password of the control server
+        :type password: str
+        """
+        self.process = process
+        self.socks_port = socks_port
+        self.control_port = control_port
+        self.data_dir = data_dir
+        self.password = password
+        self.proxy = f"socks5://127.0.0.1:{socks_port}"
+        self.controller = TorController(control_port, password)
+        self.in_use = 0
+        self.requests = 0
+        self.failures = 0
+        # Whether the circuits are being renewed
+        self.refreshing = False
+
+    @classmethod
+    def launch(cls, tor_cmd: str, socks_port: int = None,
+               control_port: int = None) -> 'TorInstance':
+        """Starts a Tor process and waits for it to be bootstrapped
+
+        :param tor_cmd: the Tor executable
+        :type tor_cmd: str
+        :param socks_port: the port of the SOCKS proxy, defaults to a free
+                           port
+        :type socks_port: int
+        :param control_port: the port of the control server, defaults to a
+                             free port
+        :type control_port: int
+        """
+        socks_port = socks_port or _free_port()
+        control_port = control_port or _free_port()
+        data_dir = tempfile.mkdtemp(prefix='scholarly_tor_')
+        try:
+            process = stem.process.launch_tor_with_config(
+                tor_cmd=tor_cmd,
+                config={
+                    'ControlPort': str(control_port),
+                    'SocksPort': str(socks_port),
+                    'DataDirectory': data_dir
+                },
+            )
+        except Exception:
+            shutil.rmtree(data_dir, ignore_errors=True)
+            raise
+        return cls(process, socks_port, control_port, data_dir)
+
+    def refresh(self, since: float = None) -> bool:
+        """Renews the circuits, and so the exit identity, see
+        :meth:`TorController.refresh`
+
+        :returns: whether the circuits were renewed
+        :rtype: {bool}
+        """
+        return self.controller.refresh(since)
+
+    def close(self):
+        """Stops the process and removes its data directory"""
+        self.controller.close()
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+        if self.data_dir is not None:
+            shutil.rmtree(self.data_dir, ignore_errors=True)
+            self.data_dir = None
+
+
+class TorPool(object):
+    """Spreads the requests over several Tor instances.
+
+    Every request goes through the instance with the fewest requests in
+    flight, in turn among equals. When a request fails, the circuits of its
+    instance are renewed in a background thread and the instance is left
+    aside until a new circuit is built, while the other instances keep
+    serving.
+
+    It has the `acquire`, `release`, `stats` and `close` methods of
+    :class:`scholarly._proxy_pool.ProxyPool`, and can replace it in the
+    navigator.
+    """
+
+    def __init__(self, instances: list, on_refresh: Callable = None):
+        """
+        :param instances: the Tor instances
+        :type instances: list
+        :param on_refresh: function called with the dictionary
+                           {'http': url, 'https': url} of an instance once
+                           it has been refreshed
+        :type on_refresh: Callable
+        """
+        if not instances:
+            raise ValueError("A Tor pool needs at least one instance")
+        self.instances = list(instances)
+        self.on_refresh = on_refresh
+        self._by_proxy = {i.proxy: i for i in self.instances}
+        self._turn = itertools.count()
+        self._cond = threading.Condition()
+        # Renews the circuits without blocking the failed requests
+        self._refresher = concurrent.futures.ThreadPoolExecutor(
+            len(self.instances))
+
+    @classmethod
+    def launch(cls, tor_cmd: str, size: int, socks_port: int = None,
+               control_port: int = None, **kwargs) -> 'TorPool':
+        """Starts `size` Tor instances at the same time
+
+        :param tor_cmd: the Tor executable
+        :type tor_cmd: str
+        :param size: the number of instances
+        :type size: int
+        :param socks_port: the SOCKS port of the first instance, see
+                           :meth:`_ports`, defaults to free ports
+        :type socks_port: int
+        :param control_port: the control port of the first instance,
+                             defaults to free ports
+        :type control_port: int
+        :raises: Exception if an instance could not be started, after
+                 stopping the others
+        """
+        ports = cls._ports(size, socks_port, control_port)
+        instances = []
+        errors = []
+        with concurrent.futures.ThreadPoolExecutor(size) as executor:
+            futures = [executor.submit(TorInstance.launch, tor_cmd, *p)
+                       for p in ports]
+            for future in futures:
+                try:
+                    instances.append(future.result())
+                except Exception as e:
+                    logger.info(f"Exception {e} while launching Tor")
+                    errors.append(e)
+        if errors:
+            for instance in instances:
+                instance.close()
+            raise Exception(f"Cannot launch Tor: {len(instances)} of {size} "
+                            f"instances started, {errors[0]}")
+        return cls(instances, **kwargs)
+
+    @staticmethod
+    def _ports(size: int, socks_port: int = None,
+               control_port: int = None) -> list:
+        """Returns the SOCKS and control ports of the instances of a pool.
+
+        Instance `i` listens on ``socks_port + 2*i`` and
+        ``control_port + 2*i``, so that the documented ports 9050 and 9051
+        give every instance its own pair. A port left to None is picked
+        among the free ports by each instance.
+
+        :raises: ValueError if a port is used by two instances
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        ports = [(socks_port and socks_port + 2 * i,
+                  control_port and control_port + 2 * i)
+                 for i in range(size)]
+        given = [port for pair in ports for port in pair if port]
+        if len(set(given)) != len(given):
+            raise ValueError(f"The SOCKS ports from {socks_port} and the "
+                             f"control ports from {control_port} of "
+                             f"{size} Tor instances overlap")
+        return ports
+
+    def acquire(self, timeout: float = None) -> str:
+        """Picks the instance of a request, waiting for one to be ready if
+        they are all being refreshed. The proxy must be given back with
+        :meth:`release`.
+
+        :param timeout: maximum seconds to wait, defaults to None
+        :type timeout: float
+        :returns: the SOCKS proxy url of the instance
+        :rtype: {str}
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if not self.instances:
+                    raise Exception("The Tor pool is closed.")
+                ready = [i for i in self.instances if not i.refreshing]
+                if ready:
+                    least = min(i.in_use for i in ready)
+                    ready = [i for i in ready if i.in_use == least]
+                    instance = ready[next(self._turn) % len(ready)]
+                    instance.in_use += 1
+                    instance.requests += 1
+                    return instance.proxy
+                wait = None
+                if deadline is not None:
+                    wait = deadline - time.monotonic()
+                    if wait <= 0:
+                        raise Exception("No Tor instance is ready.")
+                self._cond.wait(wait)
+
+    def release(self, proxy: str, ok: bool, latency: float = None,
+                captcha: bool = False):
+        """Records the outcome of a request. When it failed, the circuits
+        of the instance are renewed in the background, and the instance is
+        not picked until they are.
+
+        :param proxy: the proxy returned by :meth:`acquire`
+        :type proxy: str
+        :param ok: whether the page was fetched, or None when the request
+                   was not sent
+        :type ok: bool
+        :param latency: the seconds the request took
+        :type latency: float
+        :param captcha: whether a CAPTCHA was served
+        :type captcha: bool
+        """
+        instance = self._by_proxy.get(proxy)
+        if instance is None:
+            return
+        with self._cond:
+            instance.in_use = max(instance.in_use - 1, 0)
+            if ok or ok is None:
+                return
+            instance.failures += 1
+            if instance.refreshing:
+                # Another request already renews its circuits
+                return
+            instance.refreshing = True
+            since = None if latency is None else time.monotonic() - latency
+            try:
+                self._refresher.submit(self._refresh, instance, since)
+            except RuntimeError:
+                # The pool is closed
+                instance.refreshing = False
+
+    def _refresh(self, instance: TorInstance, since: float):
+        try:
+            if instance.refresh(since) and self.on_refresh is not None:
+                self.on_refresh({'http': instance.proxy,
+                                 'https': instance.proxy})
+        except Exception as e:
+            logger.info(f"Exception {e} while refreshing {instance.proxy}")
+        finally:
+            with self._cond:
+                instance.refreshing = False
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Returns the ports and counters of every instance, with the
+        statistics of the renewals of its circuits
+
+        :rtype: {dict}
+        """
+        with self._cond:
+            return {i.proxy: dict(i.controller.stats(),
+                                  socks_port=i.socks_port,
+                                  control_port=i.control_port,
+                                  requests=i.requests,
+                                  failures=i.failures,
+                                  in_use=i.in_use,
+                                  ready=not i.refreshing)
+                    for i in self.instances}
+
+    def close(self):
+        """Stops every Tor process of the pool"""
+        with self._cond:
+            instances, self.instances = self.instances, []
+            self._by_proxy = {}
+            self._cond.notify_all()
+        self._refresher.shutdown(wait=False)
+        for instance in instances:
+            instance.close()
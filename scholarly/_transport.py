@@ -0,0 +1,226 @@
+"""Transports sending the HTTP requests of the navigator"""
+import abc
+import hashlib
+import json
+import os
+import threading
+from ._cache import normalize_url
+from ._sessions import SessionPool
+
+
+class Response(object):
+    """A response served without the network"""
+
+    __slots__ = ('url', 'status_code', 'text')
+
+    def __init__(self, url: str, status_code: int, text: str):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+
+    @property
+    def content(self) -> bytes:
+        return self.text.encode('utf-8')
+
+
+class Transport(abc.ABC):
+    """Sends the requests of the navigator.
+
+    A transport returns responses with the `status_code`, `text` and
+    `content` attributes of a `requests` response, and may keep
+    connections open per proxy, which :meth:`discard` closes when the proxy
+    is rotated or its Tor circuit renewed. Transports that do not use the
+    network set `remote` to False, and their requests are not spaced by
+    the rate limiter.
+    """
+
+    remote = True
+
+    @abc.abstractmethod
+    def get(self, url: str, headers: dict, cookies: dict, proxies: dict,
+            timeout: float):
+        """Sends a GET request
+
+        :param url: the url
+        :type url: str
+        :param headers: the headers of the request
+        :type headers: dict
+        :param cookies: the cookies of the request
+        :type cookies: dict
+        :param proxies: A dictionary {'http': url1, 'https': url1} with the
+                        urls of the proxies, or None
+        :type proxies: dict
+        :param timeout: seconds to wait for the server
+        :type timeout: float
+        :raises: Exception on connection errors
+        """
+
+    def discard(self, proxies: dict = None):
+        """Closes the connections kept open through a proxy"""
+
+    def invalidate(self, url: str):
+        """Tells that the page served for a url was not valid, such as a
+        CAPTCHA"""
+
+    def close(self):
+        """Closes every connection"""
+
+
+class RequestsTransport(Transport):
+    """Sends the requests with `requests`, reusing keep-alive sessions
+    from a :class:`SessionPool`"""
+
+    def __init__(self, size: int = 4, idle_timeout: float = 60.0):
+        """
+        :param size: maximum number of idle sessions kept per proxy
+        :type size: int
+        :param idle_timeout: seconds after which an idle session is closed
+        :type idle_timeout: float
+        """
+        self.sessions = SessionPool(size, idle_timeout)
+
+    def get(self, url, headers, cookies, proxies, timeout):
+        session = self.sessions.acquire(proxies)
+        try:
+            resp = session.get(url, headers=headers, cookies=cookies,
+                               timeout=timeout)
+        except Exception:
+            self.sessions.release(proxies, session, discard=True)
+            raise
+        self.sessions.release(proxies, session)
+        return resp
+
+    def discard(self, proxies=None):
+        self.sessions.discard(proxies)
+
+    def close(self):
+        self.sessions.close()
+
+
+class HttpxTransport(Transport):
+    """Sends the requests with `httpx`, with one connection pool per proxy
+    and optionally HTTP/2, which multiplexes the concurrent requests of a
+    proxy over a single connection. Requires the `httpx` package, plus
+    `h2` for HTTP/2 and `socksio` for SOCKS proxies such as Tor.
+    """
+
+    def __init__(self, http2: bool = False, max_connections: int = 10):
+        """
+        :param http2: whether to negotiate HTTP/2
+        :type http2: bool
+        :param max_connections: maximum number of connections per proxy
+        :type max_connections: int
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("The httpx transport requires the httpx "
+                              "package: pip install httpx")
+        self._httpx = httpx
+        self.http2 = http2
+        self.max_connections = max_connections
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _client(self, proxies: dict):
+        key = SessionPool._key(proxies)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                kwargs = {'http2': self.http2, 'follow_redirects': True,
+                          'limits': self._httpx.Limits(
+                              max_connections=self.max_connections)}
+                try:
+                    client = self._httpx.Client(proxy=key, **kwargs)
+                except TypeError:
+                    # httpx before 0.26
+                    client = self._httpx.Client(proxies=key, **kwargs)
+                self._clients[key] = client
+        return client
+
+    def get(self, url, headers, cookies, proxies, timeout):
+        headers = dict(headers)
+        # Cookies are sent per request, and not kept by the client
+        headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in cookies.items())
+        return self._client(proxies).get(url, headers=headers,
+                                         timeout=timeout)
+
+    def discard(self, proxies=None):
+        with self._lock:
+            client = self._clients.pop(SessionPool._key(proxies), None)
+        if client is not None:
+            client.close()
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
+
+
+class ReplayTransport(Transport):
+    """Serves the pages saved in a directory, and records new ones.
+
+    Every page is stored as a JSON file named after the hash of its
+    normalized url. In ``replay`` mode only the saved pages are served,
+    without the network, and a page that was not saved gets a 404
+    response. In ``record`` mode every request goes through `transport`
+    and its successful responses are saved. In ``auto`` mode the saved
+    pages are served and the missing ones are fetched and saved.
+    """
+
+    def __init__(self, directory: str, mode: str = 'replay',
+                 transport: Transport = None):
+        """
+        :param directory: the directory of the saved pages
+        :type directory: str
+        :param mode: ``replay``, ``record`` or ``auto``
+        :type mode: str
+        :param transport: the transport fetching the pages to record,
+                          defaults to a :class:`RequestsTransport`
+        :type transport: Transport
+        """
+        if mode not in ('replay', 'record', 'auto'):
+            raise ValueError(f"Unknown mode {mode}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.mode = mode
+        self.remote = mode != 'replay'
+        self.transport = None
+        if mode != 'replay':
+            self.transport = transport or RequestsTransport()
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha1(normalize_url(url).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, url, headers, cookies, proxies, timeout):
+        path = self._path(url)
+        if self.mode != 'record' and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                saved = json.load(f)
+            return Response(url, saved['status_code'], saved['text'])
+        if self.mode == 'replay':
+            return Response(url, 404, '')
+        resp = self.transport.get(url, headers, cookies, proxies, timeout)
+        if resp.status_code == 200:
+            tmp = path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'url': url, 'status_code': resp.status_code,
+                           'text': resp.text}, f)
+            os.replace(tmp, path)
+        return resp
+
+    def invalidate(self, url):
+        try:
+            os.remove(self._path(url))
+        except FileNotFoundError:
+            pass
+
+    def discard(self, proxies=None):
+        if self.transport is not None:
+            self.transport.discard(proxies)
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
@@ -1,4 +1,7 @@
+from ._concurrency import imap_unordered
+from ._parse import ParsedPage, parse_profile
 from .publication import Publication
+from typing import Callable
 import re
 import pprint
 
@@ -8,6 +11,10 @@ _HOST = 'https://scholar.google.com{0}'
 _PAGESIZE = 100
 _EMAILAUTHORRE = r'Verified email at '
 _CITATIONAUTH = '/citations?hl=en&user={0}'
+_CSTARTRE = r'cstart=(\d+)'
+_SORTBYRE = r'sortby=(\w+)'
+_INDICES = ('citedby', 'citedby5y', 'hindex', 'hindex5y', 'i10index',
+            'i10index5y')
 
 
 class Author:
@@ -91,22 +98,109 @@ class Author:
                  for c in soup.find_all('span', class_='gsc_g_al')]
         self.cites_per_year = dict(zip(years, cites))
 
-    def _fill_publications(self, soup):
+    def _fill_publications(self, soup, concurrency: int = 1):
         self.publications = list()
-        pubstart = 0
-        url_citations = _CITATIONAUTH.format(self.id)
+        url = self._profile_url()
+        if concurrency > 1:
+            self._fill_publications_concurrently(url, soup, concurrency)
+            return
+        prefetcher = self.nav._make_prefetcher(self._next_publications_page,
+                                               parse_profile, self.id,
+                                               ['publications'])
+
+        try:
+            while True:
+                next_url = self._next_publications_page(url, soup)
+                # The next page loads while the rows of this one are parsed
+                prefetcher.prefetch(next_url)
+                self._add_publications(soup)
+                if next_url is None:
+                    break
+                url = next_url
+                soup = prefetcher.get(url)
+        finally:
+            prefetcher.close()
+
+    async def _afill_publications(self, soup):
+        self.publications = list()
+        url = self._profile_url()
 
         while True:
-            for row in soup.find_all('tr', class_='gsc_a_tr'):
-                new_pub = Publication(self.nav, row, 'citations')
-                self.publications.append(new_pub)
-            if 'disabled' not in soup.find('button', id='gsc_bpf_more').attrs:
-                pubstart += _PAGESIZE
-                url = '{0}&cstart={1}&pagesize={2}'.format(
-                    url_citations, pubstart, _PAGESIZE)
-                soup = self.nav._get_soup(url)
-            else:
+            self._add_publications(soup)
+            url = self._next_publications_page(url, soup)
+            if url is None:
                 break
+            soup = await self.nav._aget_soup(url)
+
+    def _fill_publications_concurrently(self, url: str, soup,
+                                        concurrency: int):
+        """Fetches the following pages of publications `concurrency` at a
+        time, since their urls only depend on their offset. The pages of a
+        batch after the last page are fetched for nothing, at most
+        `concurrency` - 1 requests per profile."""
+        self._add_publications(soup)
+        while self._next_publications_page(url, soup) is not None:
+            urls = [url]
+            for _ in range(concurrency):
+                urls.append(self._publications_page(urls[-1]))
+            urls = urls[1:]
+            soups = {}
+            for page, result, error in imap_unordered(self._get_profile_page,
+                                                      urls, concurrency):
+                if error is not None:
+                    raise error
+                soups[page] = result
+            # The pages are added in order, up to the last one
+            for url in urls:
+                soup = soups[url]
+                self._add_publications(soup)
+                if self._next_publications_page(url, soup) is None:
+                    break
+
+    def _get_profile_page(self, url: str):
+        """Returns the soup of a page of the profile, or its
+        :class:`ParsedPage` when the navigator parses the pages in a pool
+        of processes"""
+        if self.nav._parse_pool is not None:
+            return self.nav._parse_page(url, parse_profile, self.id,
+                                        ['publications'])
+        return self.nav._get_soup(url)
+
+    def _add_publications(self, soup):
+        """Adds the publications listed in a page of the profile, but the
+        rows repeated from the previous page when the order of the profile
+        changed between the two requests"""
+        listed = {pub.id_citations for pub in self.publications}
+        if isinstance(soup, ParsedPage):
+            pubs = [record.to_publication(self.nav)
+                    for record in soup.records]
+        else:
+            pubs = [Publication(self.nav, row, 'citations')
+                    for row in soup.find_all('tr', class_='gsc_a_tr')]
+        for new_pub in pubs:
+            if new_pub.id_citations in listed:
+                continue
+            self.publications.append(new_pub)
+
+    def _next_publications_page(self, url: str, soup) -> str:
+        """Returns the url of the page of publications after `url`, or None
+        if it is the last one"""
+        if isinstance(soup, ParsedPage):
+            return soup.next_url
+        if 'disabled' in soup.find('button', id='gsc_bpf_more').attrs:
+            return None
+        return self._publications_page(url)
+
+    def _publications_page(self, url: str) -> str:
+        """Returns the url of the page of publications after `url`"""
+        pubstart = re.findall(_CSTARTRE, url)
+        pubstart = int(pubstart[0]) if pubstart else 0
+        url_next = '{0}&cstart={1}&pagesize={2}'.format(
+            _CITATIONAUTH.format(self.id), pubstart + _PAGESIZE, _PAGESIZE)
+        sortby = re.findall(_SORTBYRE, url)
+        if sortby:
+            url_next += '&sortby={0}'.format(sortby[0])
+        return url_next
 
     def _fill_coauthors(self, soup):
         self.coauthors = []
@@ -118,11 +212,16 @@ class Author:
                 class_="gsc_rsb_a_ext").text
             self.coauthors.append(new_coauthor)
 
-    def fill(self, sections: list = []):
+    def fill(self, sections: list = [], keep_html: bool = False,
+             concurrency: int = 1):
         """Populate the Author with information from their profile
 
         The `sections` argument allows for finer granularity of the profile
-        information to be pulled.
+        information to be pulled. Sections that are already filled are
+        skipped, so filling the missing sections of an author costs a
+        single request for the profile page, plus the following pages of
+        publications when ``publications`` is requested, and no request
+        at all when every section is filled.
 
         :param sections: Sections of author profile to be filled, defaults to ``[]``.
 
@@ -133,6 +232,14 @@ class Author:
             * ``publications``: fills publications;
             * ``[]``: fills all of the above
         :type sections: ['basics','citations','counts','coauthors','publications',[]] list, optional
+        :param keep_html: Whether to keep the HTML of the profile page in
+                          the ``html`` attribute, defaults to False
+        :type keep_html: bool, optional
+        :param concurrency: number of pages of publications fetched at the
+                            same time after the first one, defaults to 1.
+                            With more than one, up to `concurrency` - 1
+                            pages past the last one may be requested.
+        :type concurrency: int, optional
         :returns: The filled object if fill was successfull, False otherwise.
         :rtype: Author or bool
 
@@ -186,26 +293,214 @@ class Author:
              'url_picture': 'https://scholar.google.com/citations?view_op=medium_photo&user=4bahYMkAAAAJ'}
         """
         try:
-            sections = [section.lower() for section in sections]
-            url_citations = _CITATIONAUTH.format(self.id)
-            url = '{0}&pagesize={1}'.format(url_citations, _PAGESIZE)
-            soup = self.nav._get_soup(url)
+            return self._fill(sections, keep_html, concurrency)
+        except Exception:
+            return False
+
+    def _fill(self, sections: list = [], keep_html: bool = False,
+              concurrency: int = 1):
+        """Same as :meth:`fill`, raising the exceptions instead of
+        returning False"""
+        to_fill = self._sections_to_fill(sections)
+        if not to_fill and not keep_html:
+            return self
+        if self.nav._parse_pool is not None and not keep_html:
+            return self._fill_parsed(to_fill, concurrency)
+        soup = self.nav._get_soup(self._profile_url())
+        if keep_html:
             self.html = soup.prettify(formatter="html")
 
-            if sections == []:
-                for i in self._sections:
-                    if i not in self._filled:
-                        getattr(self, f'_fill_{i}')(soup)
+        for i in to_fill:
+            if i == 'publications':
+                self._fill_publications(soup, concurrency)
             else:
-                for i in sections:
-                    if i in self._sections and i not in self._filled:
-                        getattr(self, f'_fill_{i}')(soup)
-                        self._filled.add(i)
+                getattr(self, f'_fill_{i}')(soup)
+            self._filled.add(i)
+        return self
+
+    def _fill_parsed(self, to_fill: list, concurrency: int):
+        """Fills the sections from the record of the profile extracted in
+        the pool of processes of the navigator"""
+        page = self.nav._parse_page(self._profile_url(), parse_profile,
+                                    self.id, to_fill)
+        filled = page.author.to_author(self.nav)
+        for key, value in filled.__dict__.items():
+            if key not in ('nav', '_sections', '_filled', 'html', 'id',
+                           'url_picture'):
+                setattr(self, key, value)
+        if 'publications' in to_fill:
+            self._fill_publications(page, concurrency)
+        self._filled.update(to_fill)
+        return self
+
+    async def afill(self, sections: list = [], keep_html: bool = False):
+        """Coroutine version of :meth:`fill`"""
+        try:
+            to_fill = self._sections_to_fill(sections)
+            if not to_fill and not keep_html:
+                return self
+            soup = await self.nav._aget_soup(self._profile_url())
+            if keep_html:
+                self.html = soup.prettify(formatter="html")
+
+            for i in to_fill:
+                if i == 'publications':
+                    await self._afill_publications(soup)
+                else:
+                    getattr(self, f'_fill_{i}')(soup)
+                self._filled.add(i)
         except Exception:
             return False
 
         return self
 
+    def fill_publications(self, concurrency: int = 4,
+                          progress: Callable[[int, int], None] = None) -> list:
+        """Fill all the publications of the author concurrently
+
+        Fills the ``publications`` section first if needed, then calls
+        :meth:`Publication.fill` on every publication that is not filled
+        yet, with at most `concurrency` requests in flight. The requests
+        still go through the rate limits of the navigator.
+
+        :param concurrency: maximum number of publications filled at the
+                            same time, defaults to 4
+        :type concurrency: int, optional
+        :param progress: function called as ``progress(done, total)``
+                         after each publication, defaults to None
+        :type progress: Callable[[int, int], None], optional
+        :returns: the ``(publication, exception)`` pairs of the
+                  publications that could not be filled
+        :rtype: list
+        :raises: Exception if the publications of the profile cannot be
+                 fetched
+
+        :Example::
+
+            author = scholarly.get_author('4bahYMkAAAAJ')
+            failures = author.fill_publications(
+                concurrency=8, progress=lambda done, total: print(done, total))
+        """
+        if ('publications' not in self._filled
+                and not self.fill(sections=['publications'])):
+            raise Exception("Cannot fetch the publications of the author.")
+        pubs = [pub for pub in self.publications if not pub.filled]
+        failures = []
+        results = imap_unordered(Publication.fill, pubs, concurrency)
+        for done, (pub, _, error) in enumerate(results, 1):
+            if error is not None:
+                failures.append((pub, error))
+            if progress is not None:
+                progress(done, len(pubs))
+        return failures
+
+    def refresh(self, previous, all_counts: bool = False) -> dict:
+        """Brings the author up to date from a previous snapshot, fetching
+        only the publications that are new
+
+        The profile page is read with the publications sorted by date, which
+        fills the ``basics``, ``indices``, ``counts`` and ``coauthors``
+        sections and lists the newest publications first. The following
+        pages are only read until a page lists a publication of the
+        snapshot, so that an author without new publications costs a single
+        request, and the citation counts are only updated for the
+        publications of the pages read. When the citation indices changed
+        and `all_counts` is True, every page is read to report every
+        changed citation count, which costs as many requests as a fill.
+
+        The publications of the author are then the new ones, followed by
+        the publications of the snapshot with their current citation
+        counts, and ``author.to_record()`` is the snapshot of the next
+        refresh.
+
+        :param previous: the snapshot, as returned by :meth:`to_record`, or
+                         a filled Author
+        :type previous: AuthorRecord or Author
+        :param all_counts: whether to read every page when the citation
+                           indices changed, defaults to False
+        :type all_counts: bool, optional
+        :returns: a dict with the ``indices`` and the citations per year
+                  (``cites_per_year``) that changed, as ``{key: (old,
+                  new)}``, the ``new_publications``, the changed citation
+                  counts of the publications, as ``{id_citations: (old,
+                  new)}`` in ``cites``, and the number of ``pages`` read
+        :rtype: dict
+        :raises: Exception if the profile cannot be fetched
+
+        :Example::
+
+            snapshot = scholarly.get_author('4bahYMkAAAAJ').fill().to_record()
+            # A week later
+            author = scholarly.get_author('4bahYMkAAAAJ')
+            delta = author.refresh(snapshot)
+            for pub in delta['new_publications']:
+                print(pub.bib['title'])
+            snapshot = author.to_record()
+        """
+        if isinstance(previous, Author):
+            previous = previous.to_record()
+        known = {p.id_citations: p for p in previous.publications or ()}
+        url = '{0}&sortby=pubdate'.format(self._profile_url())
+        soup = self.nav._get_soup(url)
+        for section in ('basics', 'indices', 'counts', 'coauthors'):
+            getattr(self, f'_fill_{section}')(soup)
+            self._filled.add(section)
+
+        indices = {key: (getattr(previous, key), getattr(self, key, None))
+                   for key in _INDICES
+                   if getattr(previous, key) != getattr(self, key, None)}
+        old_counts = previous.cites_per_year or {}
+        cites_per_year = {year: (old_counts.get(year), count)
+                          for year, count in self.cites_per_year.items()
+                          if old_counts.get(year) != count}
+        read_all = all_counts and bool(indices or cites_per_year)
+
+        fetched = []
+        pages = 1
+        while True:
+            page = [Publication(self.nav, row, 'citations')
+                    for row in soup.find_all('tr', class_='gsc_a_tr')]
+            fetched.extend(page)
+            if not read_all and any(p.id_citations in known for p in page):
+                break
+            url = self._next_publications_page(url, soup)
+            if url is None:
+                break
+            soup = self.nav._get_soup(url)
+            pages += 1
+
+        # Rows repeated at page boundaries are only counted once
+        unique = {}
+        for pub in fetched:
+            unique.setdefault(pub.id_citations, pub)
+        new = [p for p in unique.values() if p.id_citations not in known]
+        current = {id: int(p.bib['cites']) for id, p in unique.items()
+                   if id in known}
+        cites = {}
+        publications = list(new)
+        for id, record in known.items():
+            pub = record.to_publication(self.nav)
+            if id in current and current[id] != record.cites:
+                cites[id] = (record.cites, current[id])
+                pub.bib['cites'] = str(current[id])
+            publications.append(pub)
+        self.publications = publications
+        self._filled.add('publications')
+        return {'indices': indices, 'cites_per_year': cites_per_year,
+                'new_publications': new, 'cites': cites, 'pages': pages}
+
+    def _profile_url(self) -> str:
+        url_citations = _CITATIONAUTH.format(self.id)
+        return '{0}&pagesize={1}'.format(url_citations, _PAGESIZE)
+
+    def _sections_to_fill(self, sections: list) -> list:
+        """Returns the requested sections that are not filled yet"""
+        sections = [section.lower() for section in sections]
+        if sections == []:
+            sections = self._sections
+        return [i for i in sections
+                if i in self._sections and i not in self._filled]
+
     @property
     def filled(self) -> bool:
         """Returns whether or not the author characteristics are filled
@@ -215,6 +510,15 @@ class Author:
         """
         return self._filled == self._sections
 
+    def to_record(self):
+        """Returns a compact record of the author, without the navigator
+        and the HTML of the profile, for holding many authors in memory
+
+        :rtype: {AuthorRecord}
+        """
+        from .records import AuthorRecord
+        return AuthorRecord.from_author(self)
+
     def __str__(self):
         pdict = dict(self.__dict__)
         try:
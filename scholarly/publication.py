@@ -3,6 +3,8 @@ import bibtexparser
 import arrow
 import pprint
 from bibtexparser.bibdatabase import BibDatabase
+from ._checkpoint import Checkpoint
+from ._parse import ParsedPage, parse_search_pubs
 
 _HOST = 'https://scholar.google.com{0}'
 _SCHOLARPUBRE = r'cites=([\w-]*)'
@@ -13,21 +15,71 @@ _BIBCITE = '/scholar?q=info:{0}:scholar.google.com/\
 &output=cite&scirp={1}&hl=en'
 
 
+def _next_scholar_page(url: str, soup) -> str:
+    """Returns the url of the page of search results after `url`, or None"""
+    next_button = soup.find(class_='gs_ico gs_ico_nav_next')
+    if next_button:
+        return next_button.parent['href']
+    return None
+
+
 class _SearchScholarIterator(object):
     """Iterator that returns Publication objects from the search page
     I have removed all logging from here for simplicity. -V
+
+    The iterator can be pickled, and resumes on the page where it was when
+    unpickled. With a :class:`Checkpoint`, its progress is also written to
+    a journal file, and a new iterator opened on the same journal resumes
+    where the previous one stopped.
     """
 
-    def __init__(self, nav, url: str):
+    def __init__(self, nav, url: str, checkpoint: Checkpoint = None):
         self._url = url
         self._nav = nav
-        self._load_url(url)
+        self._checkpoint = checkpoint
+        if checkpoint is not None:
+            self._resume(checkpoint.page_url, checkpoint.pos,
+                         checkpoint.seen, checkpoint.done)
+        else:
+            self._resume(url, 0, [], False)
+
+    def _resume(self, page_url: str, pos: int, seen: list, done: bool):
+        self._prefetcher = self._nav._make_prefetcher(_next_scholar_page,
+                                                      parse_search_pubs)
+        # Results returned before the iteration was resumed are skipped
+        self._skip = set(seen)
+        self._seen = list(seen)
+        self._done = done
+        if done:
+            self._page_url, self._soup, self._rows = page_url, None, []
+            self._pos = 0
+        else:
+            self._load_url(page_url)
+            self._pos = pos
 
     def _load_url(self, url: str):
         # this is temporary until setup json file
-        self._soup = self._nav._get_soup(url)
+        self._page_url = url
+        self._soup = self._prefetcher.get(url)
         self._pos = 0
-        self._rows = self._soup.find_all('div', class_='gs_r gs_or gs_scl')
+        if isinstance(self._soup, ParsedPage):
+            # The rows were extracted in the pool of processes
+            self._rows = self._soup.records
+        else:
+            self._rows = self._soup.find_all('div',
+                                             class_='gs_r gs_or gs_scl')
+        if self._checkpoint is not None:
+            self._checkpoint.page(url)
+
+    def close(self):
+        """Stops reading the next pages ahead, when the iteration is left
+        before the end"""
+        self._prefetcher.close()
+
+    def __del__(self):
+        prefetcher = getattr(self, '_prefetcher', None)
+        if prefetcher is not None:
+            prefetcher.close()
 
     # Iterator protocol
 
@@ -35,26 +87,94 @@ class _SearchScholarIterator(object):
         return self
 
     def __next__(self):
-        if self._pos < len(self._rows):
-            row = self._rows[self._pos]
-            self._pos += 1
-            return Publication(self._nav, row, 'scholar')
-        elif self._soup.find(class_='gs_ico gs_ico_nav_next'):
-            url = self._soup.find(
-                class_='gs_ico gs_ico_nav_next').parent['href']
+        while True:
+            while self._pos < len(self._rows):
+                row = self._rows[self._pos]
+                self._pos += 1
+                self._prefetcher.progress(self._page_url, self._soup,
+                                          self._pos, len(self._rows))
+                parsed = isinstance(self._soup, ParsedPage)
+                cid = row.cid if parsed else row.get('data-cid')
+                # Results without a cluster id are only skipped by their
+                # position, when the iteration resumes
+                if cid is not None:
+                    if cid in self._skip:
+                        continue
+                    self._seen.append(cid)
+                if parsed:
+                    pub = row.to_publication(self._nav)
+                else:
+                    pub = Publication(self._nav, row, 'scholar')
+                if self._checkpoint is not None:
+                    self._checkpoint.advance(cid, self._pos)
+                return pub
+            url = None
+            if isinstance(self._soup, ParsedPage):
+                url = self._soup.next_url
+            elif self._soup is not None:
+                url = _next_scholar_page(self._page_url, self._soup)
+            if url is None:
+                break
             self._load_url(url)
-            return self.__next__()
-        else:
-            raise StopIteration
+        self._done = True
+        self.close()
+        if self._checkpoint is not None and not self._checkpoint.done:
+            self._checkpoint.finish()
+        raise StopIteration
 
     # Pickle protocol
     def __getstate__(self):
-        return {'url': self._url, 'pos': self._pos}
+        return {'url': self._url, 'page_url': self._page_url,
+                'pos': self._pos, 'seen': self._seen,
+                'done': self._done}
 
     def __setstate__(self, state):
-        # this needs validation -V
-        self._load_url(state['url'])
-        self._pos = state['pos']
+        from ._navigator import Navigator
+        self._url = state['url']
+        self._nav = Navigator()
+        self._checkpoint = None
+        self._resume(state.get('page_url', state['url']), state['pos'],
+                     state.get('seen', []), state.get('done', False))
+
+
+class _AsyncSearchScholarIterator(object):
+    """Async iterator that returns Publication objects from the search page
+
+    The pages are fetched with the coroutines of the navigator, so several
+    searches can run concurrently in the same event loop.
+    """
+
+    def __init__(self, nav, url: str):
+        self._url = url
+        self._nav = nav
+        self._soup = None
+        self._pos = 0
+        self._rows = []
+
+    async def _load_url(self, url: str):
+        self._page_url = url
+        self._soup = await self._nav._aget_soup(url)
+        self._pos = 0
+        self._rows = self._soup.find_all('div', class_='gs_r gs_or gs_scl')
+
+    # Async iterator protocol
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._soup is None:
+            await self._load_url(self._url)
+        if self._pos < len(self._rows):
+            row = self._rows[self._pos]
+            self._pos += 1
+            return Publication(self._nav, row, 'scholar')
+        url = _next_scholar_page(self._page_url, self._soup)
+        if url is not None:
+            await self._load_url(url)
+            return await self.__anext__()
+        else:
+            raise StopAsyncIteration
 
 
 class Publication(object):
@@ -107,6 +227,8 @@ class Publication(object):
 
         cid = __data.get('data-cid')
         pos = __data.get('data-rp')
+        # Cluster id of the result, the same on every page listing it
+        self.cid = cid
 
         self.bib['gsrank'] = str(int(pos) + 1)
 
@@ -150,7 +272,8 @@ class Publication(object):
             if (link is not None and
                     link.get('title') is not None and
                     'Cite' == link.get('title')):
-                self.url_scholarbib = self._get_bibtex(cid, pos)
+                # The link of the bibtex entry is read from the cite popup
+                # when it is first needed, see url_scholarbib
                 sclib = self.nav.publib.format(id=cid)
                 self.url_add_sclib = sclib
 
@@ -173,66 +296,131 @@ class Publication(object):
         """
         return self._filled
 
+    def __getattr__(self, name: str):
+        # The link of the bibtex entry of a search result costs a request
+        # for its cite popup, which is only made when the link is read, so
+        # reading it, even through hasattr, goes to the network. A failed
+        # request is an AttributeError, as getattr and hasattr expect, and
+        # resolve_bibtex raises the error of the request instead.
+        if name == 'url_scholarbib' and self._has_cite_popup():
+            try:
+                return self.resolve_bibtex()
+            except Exception as e:
+                raise AttributeError(f"'{type(self).__name__}' object has "
+                                     f"no attribute '{name}': {e}") from e
+        raise AttributeError(f"'{type(self).__name__}' object has no "
+                             f"attribute '{name}'")
+
+    def resolve_bibtex(self) -> str:
+        """Reads the link of the bibtex entry of a search result from its
+        cite popup, which costs one request the first time
+
+        :returns: the ``url_scholarbib`` of the publication, or None when
+                  it has none
+        :rtype: str
+        :raises: the exception of the request for the cite popup
+        """
+        if self._has_cite_popup():
+            self.url_scholarbib = self._get_bibtex(*self._cite_popup())
+        return self.__dict__.get('url_scholarbib')
+
+    def _has_cite_popup(self) -> bool:
+        """Returns whether the bibtex link of a search result is still to
+        be read from its cite popup"""
+        return ('url_scholarbib' not in self.__dict__
+                and self.__dict__.get('source') == 'scholar'
+                and self.__dict__.get('cid') is not None
+                and 'url_add_sclib' in self.__dict__)
+
+    def _cite_popup(self) -> tuple:
+        """Returns the cluster id and position of the result, which
+        identify its cite popup"""
+        return self.cid, str(int(self.bib['gsrank']) - 1)
+
+    async def _aresolve_bibtex(self):
+        """Coroutine reading the bibtex link from the cite popup"""
+        if self._has_cite_popup():
+            soup = await self.nav._aget_soup(_BIBCITE.format(
+                *self._cite_popup()))
+            self.url_scholarbib = self._bibtex_link(soup)
+
     def fill(self):
         """Populate the Publication with information from its profile"""
         if self.source == 'citations':
             url = _CITATIONPUB.format(self.id_citations)
-            soup = self.nav._get_soup(url)
-            self.bib['title'] = soup.find('div', id='gsc_vcd_title').text
-            if soup.find('a', class_='gsc_vcd_title_link'):
-                self.bib['url'] = soup.find(
-                    'a', class_='gsc_vcd_title_link')['href']
-            for item in soup.find_all('div', class_='gs_scl'):
-                key = item.find(class_='gsc_vcd_field').text.strip().lower()
-                val = item.find(class_='gsc_vcd_value')
-                if key == 'authors':
-                    self.bib['author'] = ' and '.join(
-                        [i.strip() for i in val.text.split(',')])
-                elif key == 'journal':
-                    self.bib['journal'] = val.text
-                elif key == 'volume':
-                    self.bib['volume'] = val.text
-                elif key == 'issue':
-                    self.bib['number'] = val.text
-                elif key == 'pages':
-                    self.bib['pages'] = val.text
-                elif key == 'publisher':
-                    self.bib['publisher'] = val.text
-                elif key == 'Publication date':
-
-                    patterns = ['YYYY/M',
-                                'YYYY/MM/DD',
-                                'YYYY',
-                                'YYYY/M/DD',
-                                'YYYY/M/D',
-                                'YYYY/MM/D']
-                    self.bib['year'] = arrow.get(val.text, patterns).year
-                elif key == 'description':
-                    if val.text[0:8].lower() == 'abstract':
-                        val = val.text[9:].strip()
-                    abstract = val.find(class_='gsh_csp')
-                    if abstract is None:
-                        abstract = val.find(class_='gsh_small')
-                    self.bib['abstract'] = abstract.text
-                elif key == 'total citations':
-                    self.bib['cites'] = re.findall(
-                        _SCHOLARPUBRE, val.a['href'])[0]
-
-            # number of citation per year
-            years = [int(y.text) for y in soup.find_all(class_='gsc_vcd_g_t')]
-            cites = [int(c.text) for c in soup.find_all(class_='gsc_vcd_g_al')]
-            self.cites_per_year = dict(zip(years, cites))
-
-            if soup.find('div', class_='gsc_vcd_title_ggi'):
-                self.bib['eprint'] = soup.find(
-                    'div', class_='gsc_vcd_title_ggi').a['href']
-            self._filled = True
+            self._fill_citation(self.nav._get_soup(url))
+        elif self.source == 'scholar':
+            self.resolve_bibtex()
+            self._fill_bibtex(self.nav._get_page(self.url_scholarbib))
+        return self
+
+    async def afill(self):
+        """Coroutine version of :meth:`fill`"""
+        if self.source == 'citations':
+            url = _CITATIONPUB.format(self.id_citations)
+            self._fill_citation(await self.nav._aget_soup(url))
         elif self.source == 'scholar':
-            bibtex = self.nav._get_page(self.url_scholarbib)
-            self.bib.update(bibtexparser.loads(bibtex).entries[0])
-            self._filled = True
+            await self._aresolve_bibtex()
+            self._fill_bibtex(await self.nav._aget_page(self.url_scholarbib))
         return self
 
+    def _fill_citation(self, soup):
+        """Populate the Publication from its page on the author profile"""
+        self.bib['title'] = soup.find('div', id='gsc_vcd_title').text
+        if soup.find('a', class_='gsc_vcd_title_link'):
+            self.bib['url'] = soup.find(
+                'a', class_='gsc_vcd_title_link')['href']
+        for item in soup.find_all('div', class_='gs_scl'):
+            key = item.find(class_='gsc_vcd_field').text.strip().lower()
+            val = item.find(class_='gsc_vcd_value')
+            if key == 'authors':
+                self.bib['author'] = ' and '.join(
+                    [i.strip() for i in val.text.split(',')])
+            elif key == 'journal':
+                self.bib['journal'] = val.text
+            elif key == 'volume':
+                self.bib['volume'] = val.text
+            elif key == 'issue':
+                self.bib['number'] = val.text
+            elif key == 'pages':
+                self.bib['pages'] = val.text
+            elif key == 'publisher':
+                self.bib['publisher'] = val.text
+            elif key == 'Publication date':
+
+                patterns = ['YYYY/M',
+                            'YYYY/MM/DD',
+                            'YYYY',
+                            'YYYY/M/DD',
+                            'YYYY/M/D',
+                            'YYYY/MM/D']
+                self.bib['year'] = arrow.get(val.text, patterns).year
+            elif key == 'description':
+                if val.text[0:8].lower() == 'abstract':
+                    val = val.text[9:].strip()
+                abstract = val.find(class_='gsh_csp')
+                if abstract is None:
+                    abstract = val.find(class_='gsh_small')
+                self.bib['abstract'] = abstract.text
+            elif key == 'total citations':
+                self.bib['cites'] = re.findall(
+                    _SCHOLARPUBRE, val.a['href'])[0]
+
+        # number of citation per year
+        years = [int(y.text) for y in soup.find_all(class_='gsc_vcd_g_t')]
+        cites = [int(c.text) for c in soup.find_all(class_='gsc_vcd_g_al')]
+        self.cites_per_year = dict(zip(years, cites))
+
+        if soup.find('div', class_='gsc_vcd_title_ggi'):
+            self.bib['eprint'] = soup.find(
+                'div', class_='gsc_vcd_title_ggi').a['href']
+        self._filled = True
+
+    def _fill_bibtex(self, bibtex: str):
+        """Populate the Publication from its bibtex entry"""
+        self.bib.update(bibtexparser.loads(bibtex).entries[0])
+        self._filled = True
+
     @property
     def citedby(self) -> _SearchScholarIterator or list:
         """Searches GScholar for other articles that cite this Publication and
@@ -260,7 +448,11 @@ class Publication(object):
 
     def _get_bibtex(self, cid: str, pos: str) -> str:
         bib_url = _BIBCITE.format(cid, pos)
-        soup = self.nav._get_soup(bib_url)
+        return self._bibtex_link(self.nav._get_soup(bib_url))
+
+    @staticmethod
+    def _bibtex_link(soup) -> str:
+        """Returns the link of the bibtex entry in a cite popup"""
         styles = soup.find_all('a', class_='gs_citi')
 
         for link in styles:
@@ -268,6 +460,15 @@ class Publication(object):
                 return link.get('href')
         return ''
 
+    def to_record(self):
+        """Returns a compact record of the publication, without the
+        navigator, for holding many publications in memory
+
+        :rtype: {PublicationRecord}
+        """
+        from .records import PublicationRecord
+        return PublicationRecord.from_publication(self)
+
     def __str__(self):
         pdict = dict(self.__dict__)
         try:
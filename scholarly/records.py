@@ -0,0 +1,273 @@
+"""Compact records of authors and publications, for holding large result
+sets in memory"""
+import pprint
+import sys
+from .author import Author
+from .publication import Publication
+
+_HOST = 'https://scholar.google.com{0}'
+
+
+def _intern(value):
+    """Interns a string, or every string of a list, so that repeated venues
+    and author names share their memory"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(sys.intern(v) if isinstance(v, str) else v
+                     for v in value)
+    return value
+
+
+def _pop_int(values: dict, key: str):
+    """Removes a numeric value from a dict and returns it as an int.
+    Values that are not numbers are left in the dict."""
+    value = values.get(key)
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        del values[key]
+        return int(value)
+    return None
+
+
+def _records(values):
+    """Converts a list of publications or authors, or of their dict views,
+    to a tuple of records"""
+    if values is None:
+        return None
+    records = []
+    for value in values:
+        if isinstance(value, Publication):
+            value = PublicationRecord.from_publication(value)
+        elif isinstance(value, Author):
+            value = AuthorRecord.from_author(value)
+        elif isinstance(value, dict):
+            if 'bib' in value:
+                value = PublicationRecord.from_dict(value)
+            else:
+                value = AuthorRecord.from_dict(value)
+        records.append(value)
+    return tuple(records)
+
+
+def _listify(value):
+    return list(value) if isinstance(value, tuple) else value
+
+
+class _Record(object):
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return (type(self) is type(other)
+                and all(getattr(self, s) == getattr(other, s)
+                        for s in self.__slots__))
+
+    def __str__(self):
+        return pprint.pformat(self.to_dict())
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class PublicationRecord(_Record):
+    """A publication without the navigator, with numeric fields stored as
+    ints and interned venue and author strings.
+
+    Bib fields without a dedicated slot, such as the ones added by
+    :meth:`Publication.fill`, are kept in the `extra` dict.
+    """
+
+    __slots__ = ('source', 'filled', 'title', 'author', 'venue', 'year',
+                 'cites', 'gsrank', 'url', 'eprint', 'abstract', 'cid',
+                 'id_citations', 'citations_link', 'url_scholarbib',
+                 'url_add_sclib', 'cites_per_year', 'extra')
+
+    def __init__(self, **fields):
+        for slot in self.__slots__:
+            setattr(self, slot, fields.get(slot))
+        self.filled = bool(self.filled)
+
+    @classmethod
+    def from_publication(cls, pub: Publication) -> 'PublicationRecord':
+        """Builds the record of a Publication
+
+        :param pub: the publication
+        :type pub: Publication
+        :rtype: {PublicationRecord}
+        """
+        view = {k: v for k, v in pub.__dict__.items()
+                if k not in ('nav', '_filled')}
+        view['filled'] = pub.filled
+        return cls.from_dict(view)
+
+    @classmethod
+    def from_dict(cls, view: dict) -> 'PublicationRecord':
+        """Builds a record from the dict view of a publication, as printed
+        by :class:`Publication`
+
+        :param view: the dict view of the publication
+        :type view: dict
+        :rtype: {PublicationRecord}
+        """
+        bib = dict(view.get('bib', {}))
+        return cls(source=_intern(view.get('source')),
+                   filled=view.get('filled', False),
+                   title=bib.pop('title', None),
+                   author=_intern(bib.pop('author', None)),
+                   venue=_intern(bib.pop('venue', None)),
+                   year=_pop_int(bib, 'year'),
+                   cites=_pop_int(bib, 'cites'),
+                   gsrank=_pop_int(bib, 'gsrank'),
+                   url=bib.pop('url', None),
+                   eprint=bib.pop('eprint', None),
+                   abstract=bib.pop('abstract', None),
+                   cid=view.get('cid'),
+                   id_citations=view.get('id_citations'),
+                   citations_link=view.get('citations_link'),
+                   url_scholarbib=view.get('url_scholarbib'),
+                   url_add_sclib=view.get('url_add_sclib'),
+                   cites_per_year=view.get('cites_per_year'),
+                   extra={k: _intern(v) if k in ('journal', 'publisher')
+                          else v for k, v in bib.items()} or None)
+
+    def to_dict(self) -> dict:
+        """Returns the dict view of the publication, as printed by
+        :class:`Publication`
+
+        :rtype: {dict}
+        """
+        bib = {}
+        for key in ('title', 'author', 'venue', 'url', 'eprint', 'abstract'):
+            value = getattr(self, key)
+            if value is not None:
+                bib[key] = _listify(value)
+        for key in ('year', 'cites', 'gsrank'):
+            value = getattr(self, key)
+            if value is not None:
+                bib[key] = str(value)
+        if self.extra:
+            bib.update(self.extra)
+        view = {'bib': bib, 'source': self.source, 'filled': self.filled}
+        for key in ('cid', 'id_citations', 'citations_link',
+                    'url_scholarbib', 'url_add_sclib', 'cites_per_year'):
+            value = getattr(self, key)
+            if value is not None:
+                view[key] = value
+        return view
+
+    def to_publication(self, nav=None) -> Publication:
+        """Rebuilds a Publication that can be filled again
+
+        :param nav: the navigator of the publication, defaults to the
+                    navigator of scholarly
+        :rtype: {Publication}
+        """
+        if nav is None:
+            from ._navigator import Navigator
+            nav = Navigator()
+        view = self.to_dict()
+        pub = Publication(nav, None)
+        pub.source = view.pop('source')
+        pub._filled = view.pop('filled')
+        pub.__dict__.update(view)
+        return pub
+
+
+class AuthorRecord(_Record):
+    """An author without the navigator and the HTML of the profile, with
+    interned affiliation and interests, and the publications and
+    co-authors stored as records.
+    """
+
+    __slots__ = ('id', 'filled', 'name', 'affiliation', 'email', 'homepage',
+                 'interests', 'citedby', 'citedby5y', 'hindex', 'hindex5y',
+                 'i10index', 'i10index5y', 'cites_per_year', 'coauthors',
+                 'publications')
+
+    _SECTIONS = ('basics', 'indices', 'counts', 'coauthors', 'publications')
+    _NUMBERS = ('citedby', 'citedby5y', 'hindex', 'hindex5y', 'i10index',
+                'i10index5y')
+
+    def __init__(self, **fields):
+        for slot in self.__slots__:
+            setattr(self, slot, fields.get(slot))
+        self.filled = frozenset(self.filled or ())
+
+    @classmethod
+    def from_author(cls, author: Author) -> 'AuthorRecord':
+        """Builds the record of an Author
+
+        :param author: the author
+        :type author: Author
+        :rtype: {AuthorRecord}
+        """
+        view = {k: v for k, v in author.__dict__.items()
+                if k not in ('nav', '_sections', '_filled', 'html')}
+        record = cls.from_dict(view)
+        record.filled = frozenset(author._filled)
+        return record
+
+    @classmethod
+    def from_dict(cls, view: dict) -> 'AuthorRecord':
+        """Builds a record from the dict view of an author, as printed by
+        :class:`Author` or returned by :meth:`to_dict`
+
+        :param view: the dict view of the author, whose ``filled`` is the
+                     list of filled sections, or whether all of them are
+        :type view: dict
+        :rtype: {AuthorRecord}
+        """
+        fields = {k: view.get(k) for k in ('id', 'name', 'email', 'homepage',
+                                           'cites_per_year')}
+        fields.update({k: int(view[k]) for k in cls._NUMBERS
+                       if view.get(k) is not None})
+        filled = view.get('filled')
+        if not isinstance(filled, (list, tuple, set, frozenset)):
+            filled = cls._SECTIONS if filled else ()
+        return cls(filled=filled,
+                   affiliation=_intern(view.get('affiliation')),
+                   interests=_intern(view.get('interests')),
+                   coauthors=_records(view.get('coauthors')),
+                   publications=_records(view.get('publications')),
+                   **fields)
+
+    def to_dict(self) -> dict:
+        """Returns the dict view of the author, as printed by
+        :class:`Author` but with the list of filled sections as ``filled``
+
+        :rtype: {dict}
+        """
+        view = {'id': self.id, 'filled': sorted(self.filled)}
+        for key in self.__slots__[2:]:
+            value = getattr(self, key)
+            if value is None:
+                continue
+            if key in ('coauthors', 'publications'):
+                value = [v.to_dict() for v in value]
+            view[key] = _listify(value)
+        pic = '/citations?view_op=medium_photo&user={}'.format(self.id)
+        view['url_picture'] = _HOST.format(pic)
+        return view
+
+    def to_author(self, nav=None) -> Author:
+        """Rebuilds an Author that can be filled again
+
+        :param nav: the navigator of the author, defaults to the navigator
+                    of scholarly
+        :rtype: {Author}
+        """
+        if nav is None:
+            from ._navigator import Navigator
+            nav = Navigator()
+        author = Author(nav, self.id)
+        author._filled = set(self.filled)
+        for key in self.__slots__[2:]:
+            value = getattr(self, key)
+            if value is None:
+                continue
+            if key == 'coauthors':
+                value = [v.to_author(nav) for v in value]
+            elif key == 'publications':
+                value = [v.to_publication(nav) for v in value]
+            setattr(author, key, _listify(value))
+        return author
+
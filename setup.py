@@ -32,5 +32,6 @@ setuptools.setup(
                       'stem',
                       'fake_useragent',
                       'PySocks'],
+    extras_require={'lxml': ['lxml']},
     test_suite="test_module.py"
 )
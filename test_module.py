@@ -1,7 +1,36 @@
 import unittest
+import asyncio
+import csv
+import gzip
+import http.server
+import importlib.util
+import json
+import os
+import tempfile
+from unittest import mock
 import sys
 from scholarly import scholarly
+import pickle
 import random
+import re
+import threading
+import time
+from bs4 import BeautifulSoup
+from scholarly.author import Author
+from scholarly.publication import Publication
+from scholarly.records import AuthorRecord
+from bs4.builder import builder_registry
+from scholarly._cache import ResponseCache, normalize_url, url_class
+from scholarly._concurrency import SingleFlight
+from scholarly._crawler import GraphSink
+from scholarly._navigator import Navigator
+from scholarly._prefetch import PagePrefetcher
+from scholarly._proxy_pool import ProxyPool
+from scholarly._ratelimit import RateLimiter
+from scholarly._sessions import SessionPool
+from scholarly._tor import TorController, TorInstance, TorPool
+from scholarly._transport import HttpxTransport, ReplayTransport, Response, Transport
+from stem import CircStatus
 
 
 class TestScholarly(unittest.TestCase):
@@ -166,5 +195,1275 @@ class TestScholarly(unittest.TestCase):
         self.assertEqual(author.id, u'4bahYMkAAAAJ')
 
 
+class TestResponseCache(unittest.TestCase):
+
+    def test_normalize_and_classify(self):
+        """
+        Urls that only differ in the order of their parameters share a key,
+        and pages are classified by their kind
+        """
+        self.assertEqual(
+            normalize_url('https://Scholar.google.com/citations?user=X&hl=en'),
+            normalize_url('https://scholar.google.com/citations?hl=en&user=X'))
+        self.assertEqual(url_class('https://scholar.google.com/citations?hl=en&user=X'), 'profile')
+        self.assertEqual(url_class('https://scholar.google.com/scholar?hl=en&q=x'), 'search')
+        self.assertEqual(url_class(
+            'https://scholar.google.com/citations?hl=en&view_op=view_citation&citation_for_view=X:Y'),
+            'citation')
+
+    def test_ttl_and_eviction(self):
+        """
+        Expired pages are misses, and the least recently used pages are
+        evicted when the cache is full
+        """
+        cache = ResponseCache(':memory:', ttl={'search': 0.05}, max_size=10)
+        cache.put('https://scholar.google.com/scholar?q=a', '12345')
+        self.assertEqual(cache.get('https://scholar.google.com/scholar?q=a'), '12345')
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('https://scholar.google.com/scholar?q=a'))
+
+        cache.put('https://scholar.google.com/citations?user=a', '12345')
+        cache.put('https://scholar.google.com/citations?user=b', '12345')
+        cache.get('https://scholar.google.com/citations?user=a')
+        cache.put('https://scholar.google.com/citations?user=c', '12345')
+        self.assertIsNone(cache.get('https://scholar.google.com/citations?user=b'))
+        self.assertEqual(cache.get('https://scholar.google.com/citations?user=a'), '12345')
+        stats = cache.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 2)
+
+
+class TestSessionPool(unittest.TestCase):
+
+    def test_reuse_and_discard(self):
+        """
+        Released sessions are reused for the same proxy only, and are
+        dropped once the proxy is discarded
+        """
+        pool = SessionPool(size=1)
+        tor = {'http': 'socks5://127.0.0.1:9050', 'https': 'socks5://127.0.0.1:9050'}
+        session = pool.acquire(tor)
+        self.assertEqual(session.proxies, tor)
+        pool.release(tor, session)
+        self.assertIs(pool.acquire(tor), session)
+        self.assertIsNot(pool.acquire(None), session)
+
+        pool.discard(tor)
+        pool.release(tor, session)
+        self.assertIsNot(pool.acquire(tor), session)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_token_bucket(self):
+        """
+        A burst goes out without waiting, then requests are spaced by the
+        rate, independently for each identity
+        """
+        limiter = RateLimiter(rate=1, burst=2, jitter=0)
+        self.assertEqual(limiter.reserve('a'), 0)
+        self.assertEqual(limiter.reserve('a'), 0)
+        self.assertAlmostEqual(limiter.reserve('a'), 1, places=1)
+        self.assertEqual(limiter.reserve('b'), 0)
+
+    def test_adaptive(self):
+        """
+        The rate of an identity is halved on a CAPTCHA and recovers after
+        clean responses
+        """
+        limiter = RateLimiter(rate=1, jitter=0, adaptive=True)
+        limiter.on_captcha('a')
+        self.assertEqual(limiter.get_rate('a'), 0.5)
+        self.assertEqual(limiter.get_rate('b'), 1)
+        for _ in range(10):
+            limiter.on_success('a')
+        self.assertEqual(limiter.get_rate('a'), 1)
+
+
+class TestProxyPool(unittest.TestCase):
+
+    @staticmethod
+    def _check(proxies):
+        time.sleep(0.2)
+        return 'bad' not in proxies['http']
+
+    def test_validation_and_selection(self):
+        """
+        Proxies are checked concurrently, only working ones are picked, and
+        concurrent requests go through different proxies
+        """
+        proxies = ['http://good{}:3128'.format(i) for i in range(8)]
+        start = time.monotonic()
+        pool = ProxyPool(self._check, proxies + ['http://bad:3128'])
+        while any(s['state'] == 'checking' for s in pool.stats().values()):
+            time.sleep(0.05)
+        self.assertLess(time.monotonic() - start, 1)
+        picked = {pool.acquire(timeout=5) for _ in range(8)}
+        self.assertEqual(picked, set(proxies))
+        self.assertEqual(pool.stats()['http://bad:3128']['state'],
+                         'quarantined')
+        pool.close()
+
+    def test_quarantine(self):
+        """
+        A failing proxy is put in quarantine, checked again once it is over
+        and dropped after too many quarantines
+        """
+        pool = ProxyPool(self._check, ['http://a:3128'], max_failures=2,
+                         quarantine=0.1, max_strikes=1)
+        proxy = pool.acquire(timeout=5)
+        pool.release(proxy, True, 0.5)
+        for _ in range(2):
+            pool.release(pool.acquire(timeout=5), False)
+        self.assertEqual(pool.stats()[proxy]['state'], 'quarantined')
+        self.assertEqual(pool.acquire(timeout=5), proxy)
+        pool.release(proxy, False, captcha=True)
+        pool.release(proxy, False, captcha=True)
+        self.assertNotIn(proxy, pool.stats())
+        self.assertRaises(Exception, pool.acquire, 1)
+        pool.close()
+
+    def test_failing_source(self):
+        """
+        A source that raises or repeats its proxies is given up, and the
+        pool then raises instead of waiting for it
+        """
+        draws = []
+
+        def source():
+            draws.append(None)
+            if len(draws) % 2:
+                raise Exception("No more proxies")
+            return 'http://bad:3128'
+
+        pool = ProxyPool(self._check, source=source, size=2, max_bad_draws=4)
+        start = time.monotonic()
+        self.assertRaises(Exception, pool.acquire)
+        self.assertLess(time.monotonic() - start, 5)
+        count = len(draws)
+        self.assertLessEqual(count, 2 + 4 + 2)
+        self.assertRaises(Exception, pool.acquire, 0.5)
+        self.assertEqual(len(draws), count)
+        pool.close()
+
+    def test_dead_source(self):
+        """
+        A source that only gives new proxies that do not work is given up,
+        and its proxies are not kept
+        """
+        draws = []
+
+        def source():
+            draws.append(None)
+            return 'http://bad{}:3128'.format(len(draws))
+
+        pool = ProxyPool(self._check, source=source, size=2, max_bad_draws=4)
+        start = time.monotonic()
+        self.assertRaises(Exception, pool.acquire)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertLessEqual(len(draws), 4 + 2)
+        self.assertEqual(pool.stats(), {})
+        pool.close()
+
+
+class TestTorPool(unittest.TestCase):
+
+    def test_balance_and_refresh(self):
+        """
+        Requests are spread over the instances, and a failure renews the
+        circuits of its instance only, which is left aside meanwhile
+        """
+        instances = [TorInstance(None, 9050 + i, 9550 + i) for i in range(3)]
+        refreshed = []
+        done = threading.Event()
+        pool = TorPool(instances, on_refresh=lambda proxies: (
+            refreshed.append(proxies), done.set()))
+        picked = [pool.acquire() for _ in range(3)]
+        self.assertEqual(set(picked), {i.proxy for i in instances})
+        for proxy in picked[1:]:
+            pool.release(proxy, True)
+
+        renew = threading.Event()
+        with mock.patch.object(TorInstance, 'refresh',
+                               side_effect=lambda since: renew.wait(5)):
+            # The failed request does not wait for the renewal
+            pool.release(picked[0], False)
+            others = [pool.acquire() for _ in range(4)]
+            self.assertNotIn(picked[0], others)
+            for proxy in others:
+                pool.release(proxy, True)
+            renew.set()
+            self.assertTrue(done.wait(5))
+        self.assertEqual(refreshed, [{'http': picked[0], 'https': picked[0]}])
+        deadline = time.monotonic() + 5
+        while not pool.stats()[picked[0]]['ready']:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertIn(picked[0], {pool.acquire() for _ in range(3)})
+        pool.close()
+
+    def test_launch_ports(self):
+        """
+        Every instance of a pool gets its own SOCKS and control ports, and
+        the pool is not started when one of them fails
+        """
+        self.assertEqual(TorPool._ports(3, 9050, 9051),
+                         [(9050, 9051), (9052, 9053), (9054, 9055)])
+        self.assertEqual(TorPool._ports(2), [(None, None), (None, None)])
+        with self.assertRaises(ValueError):
+            TorPool._ports(3, 9050, 9052)
+
+        def launch(tor_cmd, socks_port, control_port):
+            if socks_port == 9052:
+                raise OSError("Address already in use")
+            return TorInstance(None, socks_port, control_port)
+
+        with mock.patch.object(TorInstance, 'launch', side_effect=launch), \
+                mock.patch.object(TorInstance, 'close') as close:
+            with self.assertRaises(Exception):
+                TorPool.launch('tor', 3, 9050, 9051)
+            self.assertEqual(close.call_count, 2)
+            pool = TorPool.launch('tor', 1, 9050, 9051)
+        self.assertEqual(pool.instances[0].control_port, 9051)
+
+    def test_coalesced_refresh(self):
+        """
+        Concurrent refreshes send a single NEWNYM, which returns once a new
+        circuit is built, and failures older than it do not send another
+        """
+        tor = TorController(9051, timeout=5)
+        built = mock.Mock(status=CircStatus.BUILT)
+        controller = mock.Mock()
+        controller.get_newnym_wait.return_value = 0
+        controller.signal.side_effect = lambda signal: threading.Timer(
+            0.2, tor._on_circuit, [built]).start()
+
+        sent = time.monotonic()
+        with mock.patch('scholarly._tor.Controller.from_port',
+                        return_value=controller):
+            threads = [threading.Thread(target=tor.refresh, args=(sent,))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertTrue(tor.refresh(sent))
+
+        self.assertEqual(controller.signal.call_count, 1)
+        stats = tor.stats()
+        self.assertEqual((stats['refreshes'], stats['coalesced']), (1, 4))
+        self.assertGreaterEqual(stats['latency_last'], 0.2)
+
+    def test_refresh_timeout(self):
+        """
+        A NEWNYM after which no circuit is built in time is a failed
+        renewal, left out of the latencies
+        """
+        tor = TorController(9051, timeout=0.1)
+        controller = mock.Mock()
+        controller.get_newnym_wait.return_value = 0
+        with mock.patch('scholarly._tor.Controller.from_port',
+                        return_value=controller):
+            self.assertFalse(tor.refresh())
+        stats = tor.stats()
+        self.assertEqual((stats['refreshes'], stats['refresh_failures']),
+                         (0, 1))
+        self.assertIsNone(stats['latency_last'])
+
+    def test_shared_controller(self):
+        """
+        Threads failing at the same time create a single controller, which
+        sends a single NEWNYM
+        """
+        class TorNavigator(Navigator):
+            pass
+
+        nav = TorNavigator()
+        controller = mock.Mock()
+        controller.get_newnym_wait.return_value = 0
+
+        def signal(signal):
+            time.sleep(0.1)
+            nav._tor_controller._on_circuit(
+                mock.Mock(status=CircStatus.BUILT))
+
+        controller.signal.side_effect = signal
+        sent = time.monotonic()
+        with mock.patch('scholarly._tor.Controller.from_port',
+                        return_value=controller) as from_port, \
+                mock.patch('scholarly._navigator.TorController',
+                           side_effect=lambda *a: (time.sleep(0.05),
+                                                   TorController(*a))[1]):
+            threads = [threading.Thread(target=nav._refresh_tor_id,
+                                        args=(9051, None, sent))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(from_port.call_count, 1)
+        self.assertEqual(controller.signal.call_count, 1)
+
+    def test_failed_refresh(self):
+        """
+        A request through Tor whose circuits cannot be renewed gives up
+        after the retries, waiting for the rate limiter between them
+        """
+        class RetryNavigator(Navigator):
+            pass
+
+        nav = RetryNavigator()
+        nav._max_retries = 3
+        nav._can_refresh_tor = True
+        nav._rate_limiter = mock.Mock()
+        nav._rate_limiter.reserve.return_value = 0
+        nav._transport = mock.Mock(remote=True)
+        nav._transport.get.return_value = mock.Mock(status_code=429, text='', content=b'')
+        with mock.patch.object(nav, '_refresh_tor_id', return_value=False):
+            self.assertRaises(Exception, nav._request_page, 'https://scholar.google.com/scholar?q=x')
+        self.assertEqual(nav._transport.get.call_count, 3)
+        # Every retry waits for the rate limiter
+        self.assertEqual(nav._rate_limiter.reserve.call_count, 2)
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_request_metrics(self):
+        """
+        Requests, retries, CAPTCHAs, bytes and parse times are counted per
+        kind of page and proxy, and the hooks are called
+        """
+        class MetricsNavigator(Navigator):
+            pass
+
+        nav = MetricsNavigator()
+        nav._rate_limiter = RateLimiter(rate=1000, jitter=0)
+        captcha = mock.Mock(status_code=200, text='/sorry/image',
+                            content=b'/sorry/image')
+        page = mock.Mock(status_code=200, text='<html></html>',
+                         content=b'<html></html>')
+        nav._transport = mock.Mock(remote=True)
+        nav._transport.get.side_effect = [captcha, page]
+        events = []
+        nav._metrics.add_hook('on_retry',
+                              lambda **info: events.append(info))
+
+        nav._get_soup('/citations?hl=en&user=abc')
+        counters = {(name, tuple(sorted(s['labels'].values()))): s['value']
+                    for name, series in nav._metrics.snapshot()['counters'].items()
+                    for s in series}
+        self.assertEqual(counters[('requests_total', ('captcha', 'direct', 'profile'))], 1)
+        self.assertEqual(counters[('requests_total', ('direct', 'ok', 'profile'))], 1)
+        self.assertEqual(counters[('retries_total', ('direct', 'profile'))], 1)
+        self.assertEqual(counters[('bytes_total', ('direct', 'profile'))], 25)
+        self.assertEqual(events, [{'url': 'https://scholar.google.com/citations?hl=en&user=abc',
+                                   'proxy': None, 'attempt': 1, 'reason': 'captcha'}])
+        text = nav._metrics.to_prometheus()
+        self.assertIn('scholarly_parse_seconds_count{parser="html.parser"} 1', text)
+        self.assertIn('scholarly_captchas_total{proxy="direct"} 1', text)
+
+    def test_retry_waits(self):
+        """
+        A retry after a CAPTCHA waits for the rate limiter, which the
+        CAPTCHA slowed down
+        """
+        class WaitNavigator(Navigator):
+            pass
+
+        nav = WaitNavigator()
+        nav._rate_limiter = RateLimiter(rate=4, jitter=0, adaptive=True, min_rate=1)
+        # The first request takes the only token of the bucket
+        nav._rate_limiter.reserve(None)
+        captcha = mock.Mock(status_code=200, text='/sorry/image', content=b'/sorry/image')
+        page = mock.Mock(status_code=200, text='<html></html>', content=b'<html></html>')
+        nav._transport = mock.Mock(remote=True)
+        sent = []
+        nav._transport.get.side_effect = lambda *args: (sent.append(time.monotonic()),
+                                                        [captcha, page][len(sent) - 1])[1]
+        with mock.patch.object(nav._rate_limiter, 'reserve',
+                               wraps=nav._rate_limiter.reserve) as reserve:
+            self.assertEqual(nav._request_page('https://scholar.google.com/scholar?q=x'), page.text)
+        self.assertEqual(reserve.call_count, 1)
+        # At the halved rate of 2 requests per second
+        self.assertGreater(sent[1] - sent[0], 0.4)
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_coalesced_requests(self):
+        """
+        Concurrent requests for the same page share one fetch and its
+        result or error, and the saved fetches are counted
+        """
+        class FlightNavigator(Navigator):
+            pass
+
+        nav = FlightNavigator()
+        nav._rate_limiter = RateLimiter(rate=1000, jitter=0)
+        nav._max_retries = 1
+        gate = threading.Event()
+
+        def get(url, headers, cookies, proxies, timeout):
+            gate.wait(5)
+            if 'user=broken' in url:
+                raise Exception("Connection reset")
+            return Response(url, 200, '<html></html>')
+
+        nav._transport = mock.Mock(remote=True)
+        nav._transport.get.side_effect = get
+        urls = ['https://scholar.google.com/citations?hl=en&user=abc',
+                'https://scholar.google.com/citations?user=abc&hl=en'] * 2
+        urls += ['https://scholar.google.com/citations?hl=en&user=broken'] * 2
+        results = {}
+
+        def fetch(i):
+            try:
+                results[i] = nav._get_page(urls[i])
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=fetch, args=(i,)) for i in range(len(urls))]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        gate.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(nav._transport.get.call_count, 2)
+        self.assertEqual([results[i] for i in range(4)], ['<html></html>'] * 4)
+        self.assertIs(results[4], results[5])
+        self.assertIsInstance(results[4], Exception)
+        counters = nav._metrics.snapshot()['counters']
+        self.assertEqual(sum(s['value'] for s in counters['coalesced_total']), 4)
+
+        # A finished fetch is not shared with the next request
+        nav._get_page(urls[0])
+        self.assertEqual(nav._transport.get.call_count, 3)
+
+    def test_interrupted_call(self):
+        """
+        An interruption of the shared call is raised in its caller only,
+        and a waiting caller makes the call again
+        """
+        flight = SingleFlight()
+        started = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(None)
+            if len(calls) == 1:
+                started.set()
+                time.sleep(0.2)
+                raise KeyboardInterrupt
+            return 'page'
+
+        results = {}
+
+        def leader():
+            try:
+                flight.call('key', fn)
+            except KeyboardInterrupt as e:
+                results['leader'] = e
+
+        def follower():
+            results['follower'] = flight.call('key', fn)
+
+        first = threading.Thread(target=leader)
+        first.start()
+        started.wait(5)
+        second = threading.Thread(target=follower)
+        second.start()
+        first.join()
+        second.join()
+        self.assertIsInstance(results['leader'], KeyboardInterrupt)
+        self.assertEqual(results['follower'], 'page')
+        self.assertEqual(len(calls), 2)
+
+
+class TestTransport(unittest.TestCase):
+
+    class _FixtureTransport(Transport):
+        """Serves the saved pages of test_data, with a CAPTCHA first"""
+
+        def __init__(self):
+            self.urls = []
+
+        def get(self, url, headers, cookies, proxies, timeout):
+            self.urls.append(url)
+            if len(self.urls) == 1:
+                return Response(url, 200, 'scholarly_captcha')
+            return Response(url, 200, _FixtureNavigator()._get_page(url))
+
+    def test_record_and_replay(self):
+        """
+        Pages fetched in record mode are served again without the network,
+        and CAPTCHAs are not recorded
+        """
+        class ReplayNavigator(Navigator):
+            pass
+
+        nav = ReplayNavigator()
+        nav._rate_limiter = RateLimiter(rate=1000, jitter=0)
+        fixtures = self._FixtureTransport()
+        with tempfile.TemporaryDirectory() as directory:
+            nav._set_transport(ReplayTransport(directory, 'auto', fixtures))
+            author = nav.get_author('4bahYMkAAAAJ').fill()
+            expected = [str(p) for p in nav.search_publications('/scholar?hl=en&q=naive+physics')]
+            fetched = len(fixtures.urls)
+
+            nav._set_transport(ReplayTransport(directory))
+            nav._rate_limiter = RateLimiter(rate=1 / 3600, jitter=0)
+            start = time.monotonic()
+            self.assertEqual(str(nav.get_author('4bahYMkAAAAJ').fill()), str(author))
+            self.assertEqual([str(p) for p in nav.search_publications('/scholar?hl=en&q=naive+physics')],
+                             expected)
+            self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(len(fixtures.urls), fetched)
+        self.assertEqual(fixtures.urls[0], fixtures.urls[1])
+
+    @unittest.skipIf(importlib.util.find_spec('httpx') is None,
+                     "httpx is not installed")
+    def test_httpx_transport(self):
+        """
+        Pages fetched with httpx are recorded and replayed
+        """
+        body = _FixtureNavigator()._get_page('https://scholar.google.com/scholar?q=x')
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/scholar?hl=en&q=x'
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                recorder = ReplayTransport(directory, 'record', HttpxTransport())
+                resp = recorder.get(url, {'User-Agent': 'scholarly'}, {'GSP': 'ID=1'}, None, 5)
+                self.assertEqual((resp.status_code, resp.text), (200, body))
+                recorder.close()
+                resp = ReplayTransport(directory).get(url, {}, {}, None, 5)
+                self.assertEqual((resp.status_code, resp.text), (200, body))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_abstract_transport(self):
+        """
+        A transport must implement get
+        """
+        class NoGet(Transport):
+            pass
+
+        self.assertRaises(TypeError, NoGet)
+
+
+class TestAsync(unittest.TestCase):
+
+    class _PagesTransport(Transport):
+        """Serves the saved pages of test_data"""
+
+        def __init__(self, remote=False):
+            self.remote = remote
+            self.urls = []
+
+        def get(self, url, headers, cookies, proxies, timeout):
+            self.urls.append(url)
+            time.sleep(0.05)
+            return Response(url, 200, _FixtureNavigator()._get_page(url))
+
+    def test_parity(self):
+        """
+        The coroutines give the same objects as the sync methods, and
+        concurrent requests for the same page share a single fetch
+        """
+        class AsyncNavigator(Navigator):
+            pass
+
+        nav = AsyncNavigator()
+        transport = self._PagesTransport()
+        nav._set_transport(transport)
+        search = '/scholar?hl=en&q=naive+physics'
+        authors = '/citations?hl=en&view_op=search_authors&mauthors=x'
+
+        async def crawl():
+            pubs = [pub async for pub in nav.asearch_publications(search)]
+            found = [a async for a in nav.asearch_authors(authors)]
+            author = await nav.get_author('4bahYMkAAAAJ').afill()
+            await author.publications[0].afill()
+            await pubs[0].afill()
+            author.html = None
+            return [str(o) for o in pubs + found + [author]]
+
+        async def same_page():
+            url = 'https://scholar.google.com' + search
+            return await asyncio.gather(nav._aget_page(url),
+                                        nav._aget_page(url))
+
+        fixtures = _FixtureNavigator()
+        pubs = list(fixtures.search_publications(search))
+        found = list(fixtures.search_authors(authors))
+        author = fixtures.get_author('4bahYMkAAAAJ').fill()
+        author.publications[0].fill()
+        pubs[0].fill()
+        author.html = None
+        expected = [str(o) for o in pubs + found + [author]]
+
+        self.assertEqual(asyncio.run(crawl()), expected)
+        del transport.urls[:]
+        first, second = asyncio.run(same_page())
+        self.assertEqual(first, second)
+        self.assertEqual(len(transport.urls), 1)
+        soup = asyncio.run(nav._aget_soup(search))
+        self.assertEqual(len(soup.find_all('div', 'gs_or')), 10)
+
+    def test_cancelled_wait(self):
+        """
+        A request cancelled during its politeness delay gives its proxy
+        back to the pool
+        """
+        class CancelNavigator(Navigator):
+            pass
+
+        nav = CancelNavigator()
+        transport = self._PagesTransport(remote=True)
+        nav._set_transport(transport)
+        nav._rate_limiter = RateLimiter(rate=1 / 3600, jitter=0)
+        pool = ProxyPool(lambda proxies: True, ['http://p1'])
+        nav._proxy_pool = pool
+        try:
+            pool.release(pool.acquire(timeout=5), None)
+            nav._politeness_delay('http://p1')
+
+            async def cancel():
+                task = asyncio.ensure_future(
+                    nav._aget_page('https://scholar.google.com/scholar?q=x'))
+                await asyncio.sleep(0.5)
+                self.assertEqual(pool.stats()['http://p1']['in_use'], 1)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+
+            asyncio.run(cancel())
+            stats = pool.stats()['http://p1']
+            self.assertEqual((stats['in_use'], stats['successes'],
+                              stats['failures']), (0, 0, 0))
+            self.assertEqual(transport.urls, [])
+        finally:
+            nav._proxy_pool = None
+            pool.close()
+
+
+class TestFillPublications(unittest.TestCase):
+
+    class _FakeNav(object):
+        """Serves the citation page of every publication but the broken one"""
+
+        def __init__(self):
+            self.lock = threading.Lock()
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+        def _get_soup(self, url):
+            with self.lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            time.sleep(0.05)
+            with self.lock:
+                self.in_flight -= 1
+            if url.endswith('broken'):
+                raise Exception("Cannot fetch the page from Google Scholar.")
+            return BeautifulSoup('<div id="gsc_vcd_title">{0}</div>'.format(url[-1]),
+                                 'html.parser')
+
+    def test_fill_publications(self):
+        """
+        Publications are filled concurrently and the failures are collected
+        without stopping the others
+        """
+        nav = self._FakeNav()
+        author = Author(nav, 'AUTHORID')
+        author.publications = []
+        for id_citations in ['AUTHORID:1', 'AUTHORID:2', 'AUTHORID:3', 'AUTHORID:broken']:
+            pub = Publication(nav, None)
+            pub.source = 'citations'
+            pub.id_citations = id_citations
+            author.publications.append(pub)
+        author._filled.add('publications')
+
+        progress = []
+        failures = author.fill_publications(
+            concurrency=2, progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0][0].id_citations, 'AUTHORID:broken')
+        self.assertEqual(progress[-1], (4, 4))
+        self.assertEqual(nav.max_in_flight, 2)
+        self.assertEqual([p.bib.get('title') for p in author.publications], ['1', '2', '3', None])
+
+
+class TestPagePrefetcher(unittest.TestCase):
+
+    def test_read_ahead(self):
+        """
+        Pages are read ahead up to the depth once the threshold is passed,
+        and nothing more is fetched after closing
+        """
+        fetched = []
+
+        def fetch(url):
+            fetched.append(url)
+            return url
+
+        def next_url(url, soup):
+            n = int(url[1:]) + 1
+            return 'p{0}'.format(n) if n < 5 else None
+
+        prefetcher = PagePrefetcher(fetch, next_url, depth=2, threshold=0.5)
+        self.assertEqual(prefetcher.get('p0'), 'p0')
+        prefetcher.progress('p0', 'p0', 4, 10)
+        time.sleep(0.1)
+        self.assertEqual(fetched, ['p0'])
+        prefetcher.progress('p0', 'p0', 5, 10)
+        time.sleep(0.1)
+        self.assertEqual(fetched, ['p0', 'p1', 'p2'])
+        self.assertEqual(prefetcher.get('p1'), 'p1')
+        time.sleep(0.1)
+        self.assertEqual(fetched, ['p0', 'p1', 'p2', 'p3'])
+        prefetcher.close()
+        self.assertEqual(prefetcher.get('p2'), 'p2')
+        time.sleep(0.1)
+        self.assertEqual(fetched, ['p0', 'p1', 'p2', 'p3', 'p2'])
+
+
+_TEST_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data')
+
+
+class _FixtureNavigator(Navigator):
+    """Navigator that serves the saved pages of test_data instead of
+    fetching them from Google Scholar"""
+
+    requests = []
+
+    def _get_page(self, pagerequest: str) -> str:
+        self.requests.append(pagerequest)
+        cls = url_class(pagerequest)
+        if '.bib?' in pagerequest:
+            name = 'bibtex.bib'
+        elif cls == 'bibtex':
+            name = 'bibcite.html'
+        elif cls == 'citation':
+            name = 'citation.html'
+        elif cls == 'author_search':
+            name = 'search_authors.html'
+        elif cls == 'profile':
+            name = 'author_profile.html'
+        elif 'start=10' in pagerequest:
+            name = 'search_pubs_last.html'
+        else:
+            name = 'search_pubs.html'
+        with open(os.path.join(_TEST_DATA, name), encoding='utf-8') as f:
+            return f.read()
+
+
+class TestParsers(unittest.TestCase):
+
+    def _parse_all(self, parser):
+        """Parses every saved page and returns the printed objects"""
+        nav = _FixtureNavigator()
+        nav._set_parser(parser)
+        pubs = list(nav.search_publications('/scholar?hl=en&q=naive+physics'))
+        authors = list(nav.search_authors('/citations?hl=en&view_op=search_authors&mauthors=x'))
+        author = nav.get_author('4bahYMkAAAAJ').fill()
+        author.html = None
+        author.publications[0].fill()
+        pubs[0].fill()
+        return [str(o) for o in pubs + authors + [author]]
+
+    def test_fixture_pages(self):
+        """
+        The saved pages are parsed into the expected objects
+        """
+        nav = _FixtureNavigator()
+        nav._set_parser('html.parser')
+        pubs = list(nav.search_publications('/scholar?hl=en&q=naive+physics'))
+        self.assertEqual(len(pubs), 14)
+        self.assertTrue(all(p.bib['title'] for p in pubs))
+        author = nav.get_author('4bahYMkAAAAJ').fill()
+        self.assertTrue(author.filled)
+        self.assertEqual(author.name, 'Steven A. Cholewiak, PhD')
+        self.assertEqual(author.hindex, 8)
+        self.assertEqual(len(author.publications), 20)
+        self.assertEqual(len(author.coauthors), 6)
+        pub = author.publications[0].fill()
+        self.assertEqual(pub.bib['journal'], 'Journal of vision')
+        self.assertEqual(pubs[0].fill().bib['ID'], 'cholewiak2015perception')
+
+    def test_full_profile_page(self):
+        """
+        A full page of 100 publications of the benchmark corpus is parsed
+        """
+        nav = _FixtureNavigator()
+        with open(os.path.join(_TEST_DATA, 'author_profile_100.html'), encoding='utf-8') as f:
+            soup = nav._make_soup(f.read())
+        author = Author(nav, '4bahYMkAAAAJ')
+        author.publications = []
+        author._add_publications(soup)
+        self.assertEqual(len(author.publications), 100)
+        self.assertIsNotNone(author._next_publications_page(author._profile_url(), soup))
+
+    def test_parity(self):
+        """
+        Every available parser gives the same objects as html.parser
+        """
+        expected = self._parse_all('html.parser')
+        for parser in ['lxml', 'html5lib']:
+            if builder_registry.lookup(parser) is None:
+                continue
+            with self.subTest(parser=parser):
+                self.assertEqual(self._parse_all(parser), expected)
+
+    def test_parse_pool(self):
+        """
+        Pages parsed in a pool of processes give the same objects as pages
+        parsed in the fetching thread
+        """
+        expected = self._parse_all('html.parser')
+        nav = _FixtureNavigator()
+        nav._set_parse_pool(2)
+        try:
+            self.assertEqual(self._parse_all('html.parser'), expected)
+        finally:
+            nav._set_parse_pool(0)
+
+
+class TestAuthorFill(unittest.TestCase):
+
+    def test_incremental_fill(self):
+        """
+        Filling only the missing sections costs one request, filled sections
+        cost none, and the HTML is only kept on demand
+        """
+        nav = _FixtureNavigator()
+        nav.requests.clear()
+        author = nav.get_author('4bahYMkAAAAJ')
+        author.fill(sections=['basics', 'indices'])
+        self.assertEqual(len(nav.requests), 1)
+        self.assertIsNone(author.html)
+        author.fill(sections=['basics'])
+        self.assertEqual(len(nav.requests), 1)
+        author.fill(sections=['counts', 'basics'], keep_html=True)
+        self.assertEqual(len(nav.requests), 2)
+        self.assertIn('gsc_prf_in', author.html)
+        author.fill()
+        author.fill()
+        self.assertEqual(len(nav.requests), 3)
+        self.assertTrue(author.filled)
+
+    def test_get_authors(self):
+        """
+        Authors are filled once per id, and a failure is reported without
+        stopping the others
+        """
+        nav = _FixtureNavigator()
+        nav.requests.clear()
+        get_page = nav._get_page
+
+        def fail_unknown(url):
+            if 'user=unknown' in url:
+                raise Exception("Cannot fetch the page from Google Scholar.")
+            return get_page(url)
+
+        ids = ['4bahYMkAAAAJ', 'unknown', '4bahYMkAAAAJ', 'Smr99uEAAAAJ']
+        with mock.patch.object(nav, '_get_page', side_effect=fail_unknown):
+            results = {id: (author, error) for id, author, error
+                       in nav.get_authors(ids, sections=['basics'], concurrency=2)}
+        self.assertEqual(set(results), set(ids))
+        self.assertEqual(results['Smr99uEAAAAJ'][0].name, 'Steven A. Cholewiak, PhD')
+        self.assertIsNone(results['unknown'][0])
+        self.assertIn('Cannot fetch', str(results['unknown'][1]))
+        self.assertEqual(len(nav.requests), 2)
+
+    def test_lazy_bibtex(self):
+        """
+        Search results are built without fetching their cite popups, which
+        are fetched when the bibtex link is needed, or in a batch
+        """
+        nav = _FixtureNavigator()
+        nav.requests.clear()
+        pubs = list(nav.search_publications('/scholar?hl=en&q=naive+physics'))
+        self.assertEqual(len(pubs), 14)
+        self.assertEqual([url_class(r) for r in nav.requests], ['search', 'search'])
+        self.assertNotIn('url_scholarbib', str(pubs[0]))
+
+        self.assertIn('scholar.bib', pubs[0].url_scholarbib)
+        self.assertEqual(len(nav.requests), 3)
+        copy = pubs[1].to_record().to_publication(nav)
+        self.assertEqual(scholarly.resolve_bibtex([], concurrency=2), [])
+        self.assertEqual(nav.resolve_bibtex(pubs + [copy], concurrency=4), [])
+        self.assertEqual(len(nav.requests), 3 + 14)
+        self.assertEqual(copy.url_scholarbib, pubs[1].url_scholarbib)
+        pubs[2].fill()
+        self.assertEqual(len(nav.requests), 3 + 14 + 1)
+        self.assertTrue(pubs[2].filled)
+
+        # A failed request for the popup is an AttributeError when the
+        # attribute is read, and raised as such by resolve_bibtex
+        pub = nav.search_publication('/scholar?hl=en&q=naive+physics')
+        with mock.patch.object(nav, '_get_soup', side_effect=KeyError('popup')):
+            self.assertFalse(hasattr(pub, 'url_scholarbib'))
+            self.assertIsNone(getattr(pub, 'url_scholarbib', None))
+            self.assertRaises(KeyError, pub.resolve_bibtex)
+        self.assertIn('scholar.bib', pub.resolve_bibtex())
+
+    def test_concurrent_publication_pages(self):
+        """
+        The pages of publications after the first one are fetched
+        concurrently and merged in order, without the repeated rows
+        """
+        nav = _FixtureNavigator()
+
+        def read(name):
+            with open(os.path.join(_TEST_DATA, name), encoding='utf-8') as f:
+                return f.read()
+
+        def profile_page(url):
+            nav.requests.append(url)
+            start = int(re.findall(r'cstart=(\d+)', url)[0]) if 'cstart' in url else 0
+            if start == 0:
+                return read('author_profile_100.html')
+            if start < 300:
+                return read('author_profile_100.html').replace(
+                    'citation_for_view=4bahYMkAAAAJ:', f'citation_for_view=4bahYMkAAAAJ:p{start}')
+            # The last page repeats the rows of the first one but one
+            return read('author_profile.html')
+
+        with mock.patch.object(nav, '_get_page', side_effect=profile_page):
+            nav.requests.clear()
+            expected = nav.get_author('4bahYMkAAAAJ').fill(sections=['publications'])
+            self.assertEqual(len(nav.requests), 4)
+            ids = [p.id_citations for p in expected.publications]
+            self.assertEqual(len(ids), 301)
+            self.assertEqual(len(set(ids)), 301)
+            for concurrency, requests in ((3, 4), (2, 5)):
+                nav.requests.clear()
+                author = nav.get_author('4bahYMkAAAAJ')
+                author.fill(sections=['publications'], concurrency=concurrency)
+                self.assertEqual(len(nav.requests), requests)
+                self.assertEqual([p.id_citations for p in author.publications], ids)
+
+    def test_refresh(self):
+        """
+        Refreshing an author without changes costs one request, and the new
+        publications and changed counts are returned as a delta
+        """
+        nav = _FixtureNavigator()
+        snapshot = nav.get_author('4bahYMkAAAAJ').fill().to_record()
+        nav.requests.clear()
+        author = nav.get_author('4bahYMkAAAAJ')
+        delta = author.refresh(snapshot)
+        self.assertEqual(len(nav.requests), 1)
+        self.assertIn('sortby=pubdate', nav.requests[0])
+        self.assertEqual(delta, {'indices': {}, 'cites_per_year': {}, 'new_publications': [],
+                                 'cites': {}, 'pages': 1})
+        self.assertEqual(author.to_record(), snapshot)
+
+        first = snapshot.publications[0]
+        snapshot.publications = snapshot.publications[1:]
+        snapshot.publications[0].cites += 5
+        snapshot.citedby = 250
+        delta = author.refresh(snapshot)
+        self.assertEqual(delta['indices'], {'citedby': (250, 262)})
+        self.assertEqual([p.id_citations for p in delta['new_publications']], [first.id_citations])
+        changed = snapshot.publications[0]
+        self.assertEqual(delta['cites'], {changed.id_citations: (changed.cites, changed.cites - 5)})
+        self.assertEqual(len(author.publications), 20)
+
+        # The following pages are read until a known publication is listed
+        get_page = nav._get_page
+
+        def long_profile(url):
+            if url_class(url) == 'profile' and 'cstart' not in url:
+                nav.requests.append(url)
+                with open(os.path.join(_TEST_DATA, 'author_profile_100.html'), encoding='utf-8') as f:
+                    return f.read()
+            return get_page(url)
+
+        # Only the first publication of the short profile is not in the long one
+        snapshot.publications = (first,)
+        with mock.patch.object(nav, '_get_page', side_effect=long_profile):
+            nav.requests.clear()
+            delta = nav.get_author('4bahYMkAAAAJ').refresh(snapshot)
+            self.assertEqual(delta['pages'], 2)
+            self.assertEqual(len(delta['new_publications']), 100)
+            self.assertIn('cstart=100', nav.requests[1])
+            self.assertIn('sortby=pubdate', nav.requests[1])
+
+            author = nav.get_author('4bahYMkAAAAJ')
+            author.refresh(snapshot, all_counts=True)
+            snapshot = author.to_record()
+            nav.requests.clear()
+            delta = nav.get_author('4bahYMkAAAAJ').refresh(snapshot)
+            self.assertEqual(delta['pages'], 1)
+            self.assertEqual(delta['new_publications'], [])
+
+            # Changed indices only read every page when asked to
+            snapshot.citedby -= 10
+            delta = nav.get_author('4bahYMkAAAAJ').refresh(snapshot)
+            self.assertEqual(delta['indices'], {'citedby': (snapshot.citedby, snapshot.citedby + 10)})
+            self.assertEqual(delta['pages'], 1)
+            self.assertEqual(delta['new_publications'], [])
+            delta = nav.get_author('4bahYMkAAAAJ').refresh(snapshot, all_counts=True)
+            self.assertEqual(delta['pages'], 2)
+
+
+class TestRecords(unittest.TestCase):
+
+    def test_round_trip(self):
+        """
+        Records hold typed fields, pickle, and convert back to the same
+        authors and publications
+        """
+        nav = _FixtureNavigator()
+        nav._set_parser('html.parser')
+        pubs = list(nav.search_publications('/scholar?hl=en&q=naive+physics'))
+        author = nav.get_author('4bahYMkAAAAJ').fill()
+        author.publications[0].fill()
+        for pub in pubs + author.publications:
+            record = pub.to_record()
+            self.assertEqual(str(record.to_publication(nav)), str(pub))
+            self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+        record = author.to_record()
+        self.assertIsInstance(record.publications[1].cites, int)
+        self.assertIsInstance(record.publications[1].year, int)
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertEqual(str(record.to_author(nav)), str(author))
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+
+        # A partly filled author keeps its filled sections
+        partial = nav.get_author('4bahYMkAAAAJ').fill(sections=['basics'])
+        record = partial.to_record()
+        self.assertEqual(record.filled, {'basics'})
+        self.assertEqual(record.to_dict()['filled'], ['basics'])
+        copy = AuthorRecord.from_dict(record.to_dict())
+        self.assertEqual(copy, record)
+        self.assertEqual(copy.to_author(nav)._filled, {'basics'})
+
+
+class TestExport(unittest.TestCase):
+
+    def test_export(self):
+        """
+        Search results and authors are streamed to JSONL, compressed JSONL
+        and CSV with typed fields
+        """
+        nav = _FixtureNavigator()
+        author = nav.get_author('4bahYMkAAAAJ').fill()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'pubs.jsonl.gz')
+            count = scholarly.export(nav.search_publications('/scholar?hl=en&q=x'),
+                                     path, compression='gzip')
+            self.assertEqual(count, 14)
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                rows = [json.loads(line) for line in f]
+            self.assertEqual(len(rows), 14)
+            self.assertEqual(rows[0]['type'], 'publication')
+            self.assertEqual(rows[0]['gsrank'], 1)
+
+            path = os.path.join(tmp, 'author.jsonl')
+            scholarly.export([author], path)
+            with open(path, encoding='utf-8') as f:
+                row = json.loads(f.readline())
+            self.assertEqual(row['hindex'], 8)
+            self.assertEqual(len(row['publications']), 20)
+            self.assertEqual(len(row['coauthors']), 6)
+
+            path = os.path.join(tmp, 'pubs.csv')
+            scholarly.export(author.publications, path, format='csv')
+            with open(path, encoding='utf-8', newline='') as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(len(rows), 20)
+            self.assertEqual(rows[0]['title'], author.publications[0].bib['title'])
+            with self.assertRaises(ValueError):
+                scholarly.export(author.publications + [author], path, format='csv')
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def _search_requests(self, nav):
+        return [r for r in nav.requests if url_class(r) in ('search', 'author_search')]
+
+    def test_resume_search(self):
+        """
+        An interrupted search resumes on the page where it stopped, without
+        fetching the previous pages or returning the same results again
+        """
+        nav = _FixtureNavigator()
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = os.path.join(tmp, 'search.json')
+            url = '/scholar?hl=en&q=naive+physics'
+            pubs = nav.search_publications(url, journal, checkpoint_every=1)
+            first = [next(pubs).bib['title'] for _ in range(12)]
+            nav.requests.clear()
+            rest = [p.bib['title'] for p in nav.search_publications(url, journal)]
+            self.assertEqual(len(self._search_requests(nav)), 1)
+            self.assertIn('start=10', nav.requests[0])
+            self.assertEqual(len(rest), 2)
+            self.assertFalse(set(first) & set(rest))
+            self.assertEqual(list(nav.search_publications(url, journal)), [])
+
+            journal = os.path.join(tmp, 'authors.json')
+            url = '/citations?hl=en&view_op=search_authors&mauthors=x'
+            authors = nav.search_authors(url, journal, checkpoint_every=1)
+            first = [next(authors).id for _ in range(4)]
+            rest = [a.id for a in nav.search_authors(url, journal)]
+            self.assertEqual(len(rest), 6)
+            self.assertFalse(set(first) & set(rest))
+
+    def test_resume_without_ids(self):
+        """
+        Results without a cluster id are resumed from the position in the
+        page, and are not all skipped
+        """
+        nav = _FixtureNavigator()
+        get_page = nav._get_page
+
+        def without_ids(url):
+            return re.sub(r' data-cid="[^"]*"', '', get_page(url))
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(nav, '_get_page', side_effect=without_ids):
+            journal = os.path.join(tmp, 'search.json')
+            url = '/scholar?hl=en&q=naive+physics'
+            everything = [p.bib['title'] for p in nav.search_publications(url)]
+            pubs = nav.search_publications(url, journal, checkpoint_every=1)
+            first = [next(pubs).bib['title'] for _ in range(12)]
+            with open(journal) as f:
+                self.assertEqual(json.load(f)['seen'], [])
+            rest = [p.bib['title'] for p in nav.search_publications(url, journal)]
+            self.assertEqual(first + rest, everything)
+
+    def test_pickle(self):
+        """
+        An unpickled search iterator continues from its current page
+        """
+        nav = _FixtureNavigator()
+        pubs = nav.search_publications('/scholar?hl=en&q=naive+physics')
+        first = [next(pubs).bib['title'] for _ in range(11)]
+        nav.requests.clear()
+        with mock.patch('scholarly._navigator.Navigator', return_value=nav):
+            resumed = pickle.loads(pickle.dumps(pubs))
+        self.assertEqual(len(self._search_requests(nav)), 1)
+        rest = [p.bib['title'] for p in resumed]
+        self.assertEqual(len(rest), 3)
+        self.assertFalse(set(first) & set(rest))
+
+
+
+class TestCrawler(unittest.TestCase):
+
+    class _StopSink(GraphSink):
+        """Sink whose writes fail after a number of nodes, as a crawl that
+        is killed"""
+
+        def __init__(self, path, nodes):
+            super().__init__(path)
+            self.nodes = nodes
+
+        def node(self, row):
+            if self.nodes == 0:
+                raise KeyboardInterrupt
+            self.nodes -= 1
+            super().node(row)
+
+    def _read(self, path):
+        with open(path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        nodes = [r['id'] for r in rows if r['type'] == 'author']
+        edges = [(r['source'], r['target']) for r in rows if r['type'] == 'edge']
+        return nodes, edges
+
+    def test_coauthor_crawl(self):
+        """
+        Every author is filled once within the depth and node budget, and an
+        interrupted crawl resumes without crawling the same authors again
+        """
+        nav = _FixtureNavigator()
+        seed = '4bahYMkAAAAJ'
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'graph.jsonl')
+            nav.requests.clear()
+            stats = nav.crawl_coauthors([seed, seed], path, max_depth=1, concurrency=3)
+            nodes, edges = self._read(path)
+            self.assertEqual(len(nodes), 7)
+            self.assertEqual(len(set(nodes)), 7)
+            self.assertEqual(len(nav.requests), 7)
+            # Every author of the fixture lists the same six coauthors
+            self.assertEqual(len(edges), 6 + 6 * 5)
+            self.assertEqual(stats, {'nodes': 7, 'edges': 36, 'failures': []})
+
+            stats = nav.crawl_coauthors([seed], path, max_depth=3, max_nodes=4)
+            self.assertEqual(stats['nodes'], 4)
+            self.assertEqual(len(self._read(path)[1]), 3 + 3 * 2)
+
+            checkpoint = os.path.join(tmp, 'graph.json')
+            with self.assertRaises(KeyboardInterrupt):
+                nav.crawl_coauthors([seed], self._StopSink(path, 3), max_depth=1,
+                                    checkpoint=checkpoint, checkpoint_every=1,
+                                    concurrency=1)
+            first, _ = self._read(path)
+            self.assertEqual(len(first), 3)
+            nav.requests.clear()
+            stats = nav.crawl_coauthors([seed], path, max_depth=1,
+                                        checkpoint=checkpoint, concurrency=1)
+            nodes, edges = self._read(path)
+            self.assertEqual(len(nav.requests), 4)
+            self.assertEqual(sorted(nodes), sorted(set(nodes)))
+            self.assertEqual(len(nodes), 7)
+            self.assertEqual(len(edges), 36)
+            with self.assertRaises(ValueError):
+                nav.crawl_coauthors(['Smm3jZNNAAAAJ'], path, checkpoint=checkpoint)
+
+    def test_citation_crawl(self):
+        """
+        Papers reached from several publications are searched once, the
+        citing papers are capped per publication, and edges go from the
+        citing paper to the cited one
+        """
+        nav = _FixtureNavigator()
+        seed = next(iter(nav.search_publications('/scholar?hl=en&q=x')))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'citations.jsonl')
+            checkpoint = os.path.join(tmp, 'citations.json')
+            nav.requests.clear()
+            stats = nav.crawl_citations([seed], path, max_depth=2, max_citing=5,
+                                        concurrency=2, checkpoint=checkpoint)
+            with open(path, encoding='utf-8') as f:
+                rows = [json.loads(line) for line in f]
+            nodes = [r for r in rows if r['type'] == 'publication']
+            edges = [(r['source'], r['target']) for r in rows if r['type'] == 'edge']
+            # Every citation search of the fixture lists the seed first
+            self.assertEqual(len(nodes), 5)
+            self.assertEqual(len({n['cid'] for n in nodes}), 5)
+            self.assertEqual([n['depth'] for n in nodes], [0, 1, 1, 1, 1])
+            self.assertEqual(len(edges), 4 + 4 * 4)
+            self.assertEqual(sum(1 for source, target in edges if target == seed.cid), 4)
+            self.assertEqual(stats['edges'], 20)
+            searches = [r for r in nav.requests if url_class(r) == 'search']
+            self.assertEqual(len(searches), 5)
+
+            nav.requests.clear()
+            stats = nav.crawl_citations([seed], path, checkpoint=checkpoint)
+            self.assertEqual(stats['nodes'], 5)
+            self.assertEqual(nav.requests, [])
+
 if __name__ == '__main__':
     unittest.main()